@@ -21,10 +21,17 @@ setup(name=xwing_font_converter.__prog_name__,
       ],
       packages=find_packages(),
       include_package_data=True,
+      extras_require={
+          'pillow': ['Pillow'],
+          'fonttools': ['fonttools'],
+      },
       entry_points={
           'console_scripts': [
               'xwing-font-converter = xwing_font_converter.xwing_font_converter:main',
               'xwing-font-converter-gui = xwing_font_converter.xwing_font_converter_gui:main',
+              'xwing-font-converter-serve = xwing_font_converter.xwing_font_converter_serve:main',
+              'xwing-font-converter-diff = xwing_font_converter.xwing_font_converter_diff:main',
+              'xwing-font-converter-bench = xwing_font_converter.benchmark:main',
           ],
       },
       )
@@ -0,0 +1,109 @@
+# coding=utf-8
+"""
+Streaming of rendered images into a zip or tar archive, images being added one by one without intermediate files
+"""
+import io
+import tarfile
+import time
+import zipfile
+
+# archive extension: (archive type, tarfile mode)
+ARCHIVE_FORMATS = [('.tar.gz', ('tar', 'w:gz')),
+                   ('.tgz', ('tar', 'w:gz')),
+                   ('.tar.bz2', ('tar', 'w:bz2')),
+                   ('.tar', ('tar', 'w')),
+                   ('.zip', ('zip', None))]
+COMPRESSED_FILE_FORMATS = ['gif', 'png', 'webp']  # already compressed, stored as is in zip archives
+
+
+def get_archive_format(archive_path):
+    """
+    :return: Archive type ('zip' or 'tar') and tarfile mode of given path, None if extension is not supported
+    :rtype: tuple
+    """
+    for extension, archive_format in ARCHIVE_FORMATS:
+        if archive_path.lower().endswith(extension):
+            return archive_format
+    return None
+
+
+class ArchiveWriter(object):
+    """
+    Write images into a zip or tar archive (according to its extension), only one image being held in memory at
+    a time:
+
+        with ArchiveWriter('ships.tar.gz') as archive:
+            for name, data in fc.iter_images(file_format='png'):
+                archive.add(name, data)
+    """
+
+    def __init__(self, archive_path):
+        """
+        :param archive_path: Path of archive (.zip, .tar, .tar.gz, .tgz or .tar.bz2)
+        :type archive_path: str
+
+        :raise AttributeError if archive extension is not supported
+        """
+        super(ArchiveWriter, self).__init__()
+
+        archive_format = get_archive_format(archive_path)
+        if archive_format is None:
+            raise AttributeError("Archive should end with {extensions} (got: {path})"
+                                 .format(extensions=','.join(extension for extension, _ in ARCHIVE_FORMATS),
+                                         path=archive_path))
+
+        self._archive_type, mode = archive_format
+        if self._archive_type == 'zip':
+            self._archive = zipfile.ZipFile(archive_path, 'w', zipfile.ZIP_DEFLATED, allowZip64=True)
+        else:
+            self._archive = tarfile.open(archive_path, mode)
+        self._mtime = time.time()
+        self._count = 0
+
+    @property
+    def count(self):
+        """
+        :return: Number of images added
+        :rtype: int
+        """
+        return self._count
+
+    def add(self, name, data):
+        """
+        Add an image to archive
+
+        :param name: Path of image in archive
+        :type name: str
+
+        :param data: Encoded image
+        :type data: bytes
+
+        :rtype: None
+        """
+        if self._archive_type == 'zip':
+            info = zipfile.ZipInfo(name, time.localtime(self._mtime)[:6])
+            info.external_attr = 0o644 << 16
+            info.compress_type = zipfile.ZIP_STORED if name.rpartition('.')[2] in COMPRESSED_FILE_FORMATS \
+                else zipfile.ZIP_DEFLATED
+            self._archive.writestr(info, data)
+        else:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mtime = self._mtime
+            info.mode = 0o644
+            self._archive.addfile(info, io.BytesIO(data))
+        self._count += 1
+
+    def close(self):
+        """
+        Finish archive (writing its index)
+
+        :rtype: None
+        """
+        self._archive.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,134 @@
+# coding=utf-8
+"""
+Asyncio facade of FontConverter, for conversions to be awaited from event loop based services (bots, web backends)
+"""
+import functools
+
+try:
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+except ImportError:  # python 2, only asyncio applications need this module
+    asyncio = ThreadPoolExecutor = None
+
+from scheduler import DEFAULT_JOBS
+
+
+class AsyncFontConverter(object):
+    """
+    Run FontConverter methods on a bounded pool of threads, returning asyncio futures instead of blocking event loop:
+
+        converter = AsyncFontConverter(fc, max_concurrency=4)
+        data = await converter.render_image('t65xwing', color='red', file_format='png')
+        await converter.convert_2_images(color='white', file_format='png')
+
+    Rendering (and ImageMagick subprocesses waits) happen in worker threads, at most max_concurrency calls at once,
+    other calls waiting for a free worker. Converter must be initialized and its map loaded.
+    """
+
+    def __init__(self, font_converter, max_concurrency=DEFAULT_JOBS, loop=None):
+        """
+        :param font_converter: Initialized converter
+        :type font_converter: FontConverter
+
+        :param max_concurrency: Number of calls run at once (glyphs or whole conversions)
+        :type max_concurrency: int
+
+        :param loop: Event loop of returned futures, current one by default
+        :type loop: asyncio.AbstractEventLoop
+
+        :raise ImportError if asyncio is not available (python 2)
+        """
+        super(AsyncFontConverter, self).__init__()
+
+        if asyncio is None:
+            raise ImportError("asyncio (python 3) is required by AsyncFontConverter")
+
+        self._font_converter = font_converter
+        self._executor = ThreadPoolExecutor(max(1, int(max_concurrency)))
+        self._loop = loop
+
+    @property
+    def font_converter(self):
+        return self._font_converter
+
+    def render_image(self, element, **options):
+        """
+        Render one element into an encoded image
+
+        :see: FontConverter.render_image
+
+        :rtype: asyncio.Future of bytes
+        """
+        return self.__run(self._font_converter.render_image, element, **options)
+
+    def render_images(self, elements, return_exceptions=False, **options):
+        """
+        Render many elements with same options, at most max_concurrency at once
+
+        :param elements: Element names
+        :type elements: list
+
+        :param return_exceptions: Whether errors are returned in place of failed images instead of raised
+        :type return_exceptions: bool
+
+        :see: FontConverter.render_image
+
+        :return: Encoded images, in elements order
+        :rtype: asyncio.Future of list
+        """
+        return asyncio.gather(*[self.render_image(element, **options) for element in elements],
+                              return_exceptions=return_exceptions)
+
+    def convert_2_images(self, **options):
+        """
+        Convert all elements into images. Cancelling returned future cancels conversion (see FontConverter.cancel).
+
+        :see: FontConverter.convert_2_images
+
+        :rtype: asyncio.Future
+        """
+        return self.__run_cancellable(self._font_converter.convert_2_images, **options)
+
+    def convert_2_atlas(self, **options):
+        """
+        Convert all elements into atlases
+
+        :see: FontConverter.convert_2_atlas
+
+        :return: Index of images coordinates
+        :rtype: asyncio.Future of dict
+        """
+        return self.__run(self._font_converter.convert_2_atlas, **options)
+
+    def close(self, wait=False):
+        """
+        Release worker threads, once running calls are done
+
+        :param wait: Block until running calls are done
+        :type wait: bool
+
+        :rtype: None
+        """
+        self._executor.shutdown(wait=wait)
+
+    def __run(self, func, *args, **kwargs):
+        """
+        :return: Future of func result, run by a worker
+        :rtype: asyncio.Future
+        """
+        loop = self._loop if self._loop is not None else asyncio.get_event_loop()
+        return loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    def __run_cancellable(self, func, *args, **kwargs):
+        """
+        :see: __run, cancelling future cancels converter running conversion
+        """
+        self._font_converter.reset_cancel()  # before worker starts, cancel of previous conversion is forgotten
+        future = self.__run(func, *args, **kwargs)
+
+        def on_done(done_future):
+            if done_future.cancelled():
+                self._font_converter.cancel()
+
+        future.add_done_callback(on_done)
+        return future
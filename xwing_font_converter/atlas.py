@@ -0,0 +1,184 @@
+# coding=utf-8
+"""
+Packing of images into texture atlases (sprite sheets) with their coordinates index
+"""
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional, only needed to build atlases
+    Image = None
+
+DEFAULT_ATLAS_NAME = 'atlas'
+DEFAULT_ATLAS_SIZE = 1024
+ATLAS_PADDING = 1  # transparent pixels between images to avoid bleeding when scaled
+CSS_CLASS_PREFIX = 'xwing-'
+
+
+class MaxRectsPacker(object):
+    """
+    MaxRects rectangle packer using best short side fit heuristic
+
+    :seealso: Jukka Jylanki, A Thousand Ways to Pack the Bin
+    """
+
+    def __init__(self, width, height):
+        super(MaxRectsPacker, self).__init__()
+
+        self._width = width
+        self._height = height
+        self._free_rects = [(0, 0, width, height)]
+
+    def insert(self, width, height):
+        """
+        Find place of a rectangle and reserve it
+
+        :param width: Rectangle width
+        :type width: int
+
+        :param height: Rectangle height
+        :type height: int
+
+        :return: Top left position of placed rectangle, None if rectangle does not fit anymore
+        :rtype: tuple
+        """
+        best_position = None
+        best_fit = None
+        for free_x, free_y, free_width, free_height in self._free_rects:
+            if width <= free_width and height <= free_height:
+                leftover_width, leftover_height = free_width - width, free_height - height
+                fit = (min(leftover_width, leftover_height), max(leftover_width, leftover_height))
+                if best_fit is None or fit < best_fit:
+                    best_position, best_fit = (free_x, free_y), fit
+
+        if best_position is not None:
+            self.__split_free_rects((best_position[0], best_position[1], width, height))
+        return best_position
+
+    def __split_free_rects(self, used):
+        """
+        Split free rectangles overlapped by used one into maximal free rectangles around it
+
+        :param used: Used rectangle (x, y, width, height)
+        :type used: tuple
+
+        :rtype: None
+        """
+        used_x, used_y, used_width, used_height = used
+        free_rects = []
+        for free in self._free_rects:
+            free_x, free_y, free_width, free_height = free
+            if used_x >= free_x + free_width or used_x + used_width <= free_x or \
+                    used_y >= free_y + free_height or used_y + used_height <= free_y:
+                free_rects.append(free)
+                continue
+
+            if used_x > free_x:
+                free_rects.append((free_x, free_y, used_x - free_x, free_height))
+            if used_x + used_width < free_x + free_width:
+                free_rects.append((used_x + used_width, free_y, free_x + free_width - used_x - used_width, free_height))
+            if used_y > free_y:
+                free_rects.append((free_x, free_y, free_width, used_y - free_y))
+            if used_y + used_height < free_y + free_height:
+                free_rects.append((free_x, used_y + used_height, free_width,
+                                   free_y + free_height - used_y - used_height))
+
+        # remove free rectangles contained in another one
+        self._free_rects = [rect for index, rect in enumerate(free_rects)
+                            if not any(_contains(other, rect) and (other != rect or other_index < index)
+                                       for other_index, other in enumerate(free_rects) if other_index != index)]
+
+
+def _contains(rect, other):
+    """
+    Check if rectangle contains other one
+
+    :rtype: bool
+    """
+    return rect[0] <= other[0] and rect[1] <= other[1] and \
+        rect[0] + rect[2] >= other[0] + other[2] and rect[1] + rect[3] >= other[1] + other[3]
+
+
+def pack_atlases(images, atlas_size=DEFAULT_ATLAS_SIZE, padding=ATLAS_PADDING):
+    """
+    Pack images into as few atlases as possible, each atlas being cropped to its used area
+
+    :param images: Names with their RGBA image
+    :type images: list of (str, PIL.Image.Image)
+
+    :param atlas_size: Maximum width and height of an atlas
+    :type atlas_size: int
+
+    :param padding: Transparent pixels between images
+    :type padding: int
+
+    :raise ValueError if an image is bigger than atlas size
+
+    :return: Atlases images with coordinates (x, y, width, height) of each image name
+    :rtype: list of (PIL.Image.Image, dict)
+    """
+    pages = []  # couples of packer and placed images
+    # biggest first, for a denser packing
+    for name, image in sorted(images, key=lambda item: (max(item[1].size), min(item[1].size), item[0]), reverse=True):
+        width, height = image.size
+        if width + padding > atlas_size or height + padding > atlas_size:
+            raise ValueError(u"'{name}' image ({width}x{height}) does not fit in {size}x{size} atlas"
+                             .format(name=name, width=width, height=height, size=atlas_size))
+
+        for packer, placed in pages:
+            position = packer.insert(width + padding, height + padding)
+            if position is not None:
+                break
+        else:
+            packer, placed = MaxRectsPacker(atlas_size, atlas_size), []
+            pages.append((packer, placed))
+            position = packer.insert(width + padding, height + padding)
+
+        placed.append((name, image, position))
+
+    atlases = []
+    for _, placed in pages:
+        atlas = Image.new('RGBA', (max(x + image.size[0] for _, image, (x, _) in placed),
+                                   max(y + image.size[1] for _, image, (_, y) in placed)), (0, 0, 0, 0))
+        coordinates = {}
+        for name, image, (x, y) in placed:
+            atlas.paste(image, (x, y))
+            coordinates[name] = (x, y) + image.size
+        atlases.append((atlas, coordinates))
+    return atlases
+
+
+def get_index(atlases_files):
+    """
+    Get index of images coordinates in atlases
+
+    :param atlases_files: Atlases file names with coordinates of their images
+    :type atlases_files: list of (str, dict)
+
+    :rtype: dict
+    """
+    index = {}
+    for file_name, coordinates in atlases_files:
+        for name, (x, y, width, height) in coordinates.items():
+            index[name] = {'atlas': file_name, 'x': x, 'y': y, 'width': width, 'height': height}
+    return index
+
+
+def get_css(index, class_prefix=CSS_CLASS_PREFIX):
+    """
+    Get style sheet with one class per image of index, to use atlas as CSS sprites
+
+    :param index: Index of images coordinates
+    :type index: dict
+
+    :param class_prefix: Prefix of CSS classes
+    :type class_prefix: str
+
+    :rtype: str
+    """
+    rules = []
+    for name in sorted(index):
+        image = index[name]
+        rules.append(u".{prefix}{name} {{ display: inline-block; width: {width}px; height: {height}px; "
+                     u"background: url(\"{atlas}\") {x}px {y}px no-repeat; }}"
+                     .format(prefix=class_prefix, name=name, atlas=image['atlas'], x=-image['x'], y=-image['y'],
+                             width=image['width'], height=image['height']))
+    return u'\n'.join(rules) + u'\n'
@@ -0,0 +1,224 @@
+# coding=utf-8
+"""
+Batch conversion of many font and map pairs from a single job manifest, over one shared pool of workers
+"""
+import json
+import os
+import threading
+from multiprocessing.pool import ThreadPool
+
+try:
+    import yaml
+except ImportError:  # PyYAML is optional, JSON manifests are always supported
+    yaml = None
+
+from atlas import DEFAULT_ATLAS_NAME, DEFAULT_ATLAS_SIZE
+from encoding import DEFAULT_COMPRESSION
+from font_converter import FontConverter, DEFAULT_BACKEND, DEFAULT_POINTSIZE, DEFAULT_SIZE
+from logger import get_logger
+from metrics import Metrics
+from scheduler import DEFAULT_JOBS, JobScheduler
+
+REQUIRED_KEYS = ['map', 'ttf', 'output']
+# options of each batch job, same names as converter command line options
+DEFAULT_OPTIONS = {'name': None,
+                   'color': 'black',
+                   'pointsize': DEFAULT_POINTSIZE,
+                   'size': DEFAULT_SIZE,
+                   'format': 'gif',
+                   'trim': False,
+                   'width': False,
+                   'force': False,
+                   'prune': False,
+                   'atlas': None,  # atlas name, or true for default one
+                   'atlas_size': DEFAULT_ATLAS_SIZE,
+                   'compression': DEFAULT_COMPRESSION,
+                   'effects': None,
+                   'scales': None}
+
+
+def load_batch(batch_file_path):
+    """
+    Load job manifest listing conversions to run, as JSON (or YAML if PyYAML is installed):
+
+        {"defaults": {"format": "png", "trim": true},
+         "jobs": [{"map": "ships-map.json", "ttf": "xwing-miniatures-ships.ttf", "output": "ships", "size": [32, 72]},
+                  {"map": "icons-map.json", "ttf": "xwing-miniatures.ttf", "output": "icons", "color": "white"}]}
+
+    Each job has a map, a font and an output folder (relative to manifest folder) with conversion options named as
+    converter command line options, defaults section applying to every job. Job name defaults to map name, suffixed
+    with job number for jobs sharing a map. Each job needs its own output folder, as images written there are tracked
+    (and pruned) by job.
+
+    :param batch_file_path: Path of job manifest (.json, .yaml or .yml)
+    :type batch_file_path: str
+
+    :raise ValueError in case of invalid manifest
+
+    :return: Jobs with all their options
+    :rtype: list of dict
+    """
+    with open(batch_file_path, 'r') as batch_file:
+        if os.path.splitext(batch_file_path)[1] in ('.yaml', '.yml'):
+            if yaml is None:
+                raise ValueError("PyYAML is required to read YAML job manifest {}".format(batch_file_path))
+            data = yaml.safe_load(batch_file)
+        else:
+            data = json.load(batch_file)
+
+    if not isinstance(data, dict) or not isinstance(data.get('jobs'), list) or not data['jobs']:
+        raise ValueError("Job manifest {} should have a non empty 'jobs' list".format(batch_file_path))
+
+    base_folder = os.path.dirname(os.path.abspath(batch_file_path))
+    defaults = data.get('defaults', {})
+    jobs = []
+    names = set()
+    outputs = {}  # output folder: job number, each folder having its own manifest of images
+    for number, job in enumerate(data['jobs']):
+        options = dict(DEFAULT_OPTIONS)
+        options.update(defaults)
+        options.update(job)
+
+        unknown = sorted(set(options) - set(DEFAULT_OPTIONS) - set(REQUIRED_KEYS))
+        if unknown:
+            raise ValueError("Unknown option(s) {options} in job {number} of {path}"
+                             .format(options=','.join(unknown), number=number, path=batch_file_path))
+        missing = [key for key in REQUIRED_KEYS if not options.get(key)]
+        if missing:
+            raise ValueError("Missing {keys} in job {number} of {path}"
+                             .format(keys=','.join(missing), number=number, path=batch_file_path))
+
+        for key in REQUIRED_KEYS:
+            options[key] = os.path.join(base_folder, os.path.expanduser(options[key]))
+        output = os.path.realpath(options['output'])
+        if output in outputs:
+            raise ValueError("Jobs {first} and {number} of {path} have the same output folder {output}"
+                             .format(first=outputs[output], number=number, path=batch_file_path, output=output))
+        outputs[output] = number
+        if options['name'] is None:
+            options['name'] = os.path.splitext(os.path.basename(options['map']))[0]
+            if options['name'] in names:  # jobs sharing a map, errors are reported by job name
+                options['name'] = u"{name}-{number}".format(name=options['name'], number=number)
+        if options['name'] in names:
+            raise ValueError("Duplicate name {name} of job {number} in {path}"
+                             .format(name=options['name'], number=number, path=batch_file_path))
+        names.add(options['name'])
+        jobs.append(options)
+    return jobs
+
+
+class BatchConverter(object):
+    """
+    Run conversions of many font and map pairs at once.
+
+    Elements of all fonts are converted by the same workers, so that a big font is spread over all of them instead
+    of keeping a single one busy while small fonts are done.
+    """
+
+    def __init__(self, jobs, workers=DEFAULT_JOBS, backend=DEFAULT_BACKEND, cache_dir=None, max_in_flight=None):
+        """
+        :param jobs: Conversions to run (see load_batch)
+        :type jobs: list of dict
+
+        :param workers: Number of elements converted in parallel, all fonts together
+        :type workers: int
+
+        :param backend: Rendering backend of all conversions
+        :type backend: str
+
+        :param cache_dir: Folder of glyphs cache, None to disable it
+        :type cache_dir: str
+
+        :param max_in_flight: Maximum number of elements of a job rendered ahead of written ones (see JobScheduler)
+        :type max_in_flight: int
+        """
+        super(BatchConverter, self).__init__()
+
+        self._jobs = jobs
+        self._workers = max(1, int(workers))
+        self._backend = backend
+        self._cache_dir = cache_dir
+        self._max_in_flight = max_in_flight
+        self._metrics = Metrics()
+        self._log = get_logger()
+
+    @property
+    def metrics(self):
+        """
+        Timers and counters of all conversions together
+
+        :see: FontConverter.metrics
+
+        :rtype: Metrics
+        """
+        return self._metrics
+
+    def run(self):
+        """
+        Convert all jobs, a failing job does not stop other ones
+
+        :return: Error of each failed job by job name
+        :rtype: dict
+        """
+        errors = {}
+        pool = ThreadPool(self._workers)
+        scheduler = JobScheduler(self._workers, pool=pool, max_in_flight=self._max_in_flight)
+        try:
+            converters = []
+            for job in self._jobs:
+                try:
+                    fc = FontConverter(map_file_path=job['map'],
+                                       ttf_file_path=job['ttf'],
+                                       output_folder=job['output'],
+                                       backend=self._backend,
+                                       cache_dir=self._cache_dir,
+                                       metrics=self._metrics,
+                                       scheduler=scheduler,
+                                       compression=job['compression'])
+                    if not fc.init_font_converter():
+                        raise ValueError("Unable to init converter of {}".format(job['name']))
+                    fc.get_elements_from_map()
+                except Exception as err:
+                    self._log.error(u"Batch job {name} failed: {error}".format(name=job['name'], error=err))
+                    errors[job['name']] = err
+                    continue
+                converters.append((job, fc))
+
+            # biggest fonts first, for workers to end together
+            converters.sort(key=lambda item: len(item[1].element_map), reverse=True)
+
+            # one lightweight thread per job feeds shared workers with its elements and writes its images
+            threads = [threading.Thread(target=self.__convert, args=(job, fc, errors)) for job, fc in converters]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            pool.terminate()
+            pool.join()
+
+        self._log.info("{done}/{count} batch job(s) done".format(done=len(self._jobs) - len(errors),
+                                                                count=len(self._jobs)))
+        return errors
+
+    def __convert(self, job, fc, errors):
+        """
+        Run conversion of one job, storing its error if any
+        """
+        self._log.info(u"Converting {name} ({count} elements) into {output}"
+                       .format(name=job['name'], count=len(fc.element_map), output=job['output']))
+        try:
+            if job['atlas'] and job['scales']:
+                raise AttributeError("Atlases can not be made of many scales")
+            elif job['atlas']:
+                fc.convert_2_atlas(color=job['color'], point_size=job['pointsize'], file_format=job['format'],
+                                   trim=job['trim'], size=job['size'], width=job['width'],
+                                   name=DEFAULT_ATLAS_NAME if job['atlas'] is True else job['atlas'],
+                                   atlas_size=job['atlas_size'], effects=job['effects'])
+            else:
+                fc.convert_2_images(color=job['color'], point_size=job['pointsize'], file_format=job['format'],
+                                    trim=job['trim'], size=job['size'], width=job['width'], force=job['force'],
+                                    prune=job['prune'], effects=job['effects'], scales=job['scales'])
+        except Exception as err:
+            self._log.error(u"Batch job {name} failed: {error}".format(name=job['name'], error=err))
+            errors[job['name']] = err
@@ -0,0 +1,286 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""
+X-Wing font converter benchmark
+
+Measure conversion throughput and latency on bundled fonts and maps, across formats, point sizes and job counts,
+and report them as JSON to catch regressions between releases.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:  # not available on windows
+    resource = None
+
+import xwing_font_converter
+from font_converter import FontConverter, AVAILABLE_BACKENDS, AVAILABLE_FILE_FORMATS, DEFAULT_BACKEND, \
+    DEFAULT_POINTSIZE, VECTOR_FILE_FORMATS
+from metrics import percentile
+from scheduler import DEFAULT_JOBS
+
+__all__ = ['main']
+
+RESOURCES_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resources')
+BENCHMARK_FONTS = {
+    'ships': (os.path.join(RESOURCES_FOLDER, 'ships-map.json'),
+              os.path.join(RESOURCES_FOLDER, 'xwing-miniatures-ships.ttf')),
+    'icons': (os.path.join(RESOURCES_FOLDER, 'icons-map.json'),
+              os.path.join(RESOURCES_FOLDER, 'xwing-miniatures.ttf')),
+}
+BENCHMARK_RESIZE = 32  # size of resize_images stage
+DEFAULT_TOLERANCE = 0.10  # relative throughput loss tolerated when comparing with a baseline
+
+
+def get_peak_rss():
+    """
+    Get peak resident set size of process (since its start, never decreases)
+
+    :return: Peak RSS in KB, None if unavailable on this platform
+    :rtype: int
+    """
+    if resource is None:
+        return None
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak_rss // 1024 if sys.platform == 'darwin' else peak_rss  # bytes on macOS, KB elsewhere
+
+
+def get_files_size(files):
+    """
+    :return: Total size of existing files in bytes
+    :rtype: int
+    """
+    return sum(os.path.getsize(path) for path in files if os.path.exists(path))
+
+
+def measure(func):
+    """
+    Execute func and measure its wall time
+
+    :return: Value returned by func and elapsed seconds
+    :rtype: tuple
+    """
+    start = time.time()
+    value = func()
+    return value, time.time() - start
+
+
+def get_stage_result(seconds, glyphs, bytes_written, initial_peak_rss, latencies=None):
+    """
+    :param initial_peak_rss: Peak RSS of process before case, as peak RSS never decreases
+    :type initial_peak_rss: int
+
+    :return: Measures of one stage, as reported in JSON. Memory is reported as increase of process peak RSS since
+             case start, 0 meaning that case stayed under memory peak of earlier cases.
+    :rtype: dict
+    """
+    peak_rss = get_peak_rss()
+    result = {'seconds': round(seconds, 6),
+              'glyphs': glyphs,
+              'glyphs_per_sec': round(glyphs / seconds, 3) if seconds > 0 else None,
+              'bytes_written': bytes_written,
+              'peak_rss_increase_kb': peak_rss - initial_peak_rss if peak_rss is not None else None}
+    if latencies is not None:
+        result['latency_p50_ms'] = round(percentile(latencies, 50) * 1000, 3) if latencies else None
+        result['latency_p95_ms'] = round(percentile(latencies, 95) * 1000, 3) if latencies else None
+    return result
+
+
+def run_case(font, file_format, point_size, jobs, backend=DEFAULT_BACKEND):
+    """
+    Convert every element of a bundled font into a temporary folder, measuring each stage (trim and resize of
+    written images being skipped for vector formats)
+
+    :param font: Name of font in BENCHMARK_FONTS
+    :type font: str
+
+    :param file_format: Image format
+    :type file_format: str
+
+    :param point_size: Size of font
+    :type point_size: int
+
+    :param jobs: Number of elements converted in parallel
+    :type jobs: int
+
+    :param backend: Rendering backend
+    :type backend: str
+
+    :raise RuntimeError if font converter can not be initialized
+    :raise ImportError or AttributeError if format is not supported (eg: svg without fontTools)
+
+    :return: Case parameters with measures of each stage
+    :rtype: dict
+    """
+    map_file, ttf_file = BENCHMARK_FONTS[font]
+    initial_peak_rss = get_peak_rss()
+    output_folder = tempfile.mkdtemp(prefix='xwing-font-converter-bench-')
+    try:
+        fc = FontConverter(map_file_path=map_file, ttf_file_path=ttf_file, output_folder=output_folder,
+                           backend=backend)
+        if not fc.init_font_converter():
+            raise RuntimeError("Unable to init font converter with {} backend".format(backend))
+
+        stages = {}
+        _, seconds = measure(fc.get_elements_from_map)
+        glyphs = len(fc.element_map)
+        stages['get_elements_from_map'] = get_stage_result(seconds, glyphs, 0, initial_peak_rss)
+
+        _, seconds = measure(lambda: fc.convert_2_images(color='black', point_size=point_size,
+                                                         file_format=file_format, jobs=jobs))
+        stages['convert_2_images'] = get_stage_result(seconds, glyphs, get_files_size(fc.output_files),
+                                                      initial_peak_rss, latencies=fc.metrics.get_samples('glyph'))
+
+        if file_format not in VECTOR_FILE_FORMATS:  # svg images are sized when made from outlines
+            _, seconds = measure(lambda: fc.trim_images(jobs=jobs))
+            stages['trim_images'] = get_stage_result(seconds, glyphs, get_files_size(fc.output_files),
+                                                     initial_peak_rss)
+
+            _, seconds = measure(lambda: fc.resize_images(BENCHMARK_RESIZE, jobs=jobs))
+            stages['resize_images'] = get_stage_result(seconds, glyphs, get_files_size(fc.output_files),
+                                                       initial_peak_rss)
+    finally:
+        shutil.rmtree(output_folder, ignore_errors=True)
+
+    return {'font': font, 'format': file_format, 'point_size': point_size, 'jobs': jobs, 'backend': backend,
+            'stages': stages, 'metrics': fc.metrics.summary()}
+
+
+def run_benchmark(fonts, file_formats, point_sizes, jobs_counts, backend=DEFAULT_BACKEND):
+    """
+    Run a benchmark case for each combination of given parameters, cases which can not run in this environment
+    (eg: missing backend or fontTools) being marked as skipped with their reason
+
+    :see: run_case
+
+    :return: Environment description with results of each case
+    :rtype: dict
+    """
+    cases = []
+    for font in fonts:
+        for file_format in file_formats:
+            for point_size in point_sizes:
+                for jobs in jobs_counts:
+                    try:
+                        cases.append(run_case(font, file_format, point_size, jobs, backend=backend))
+                    except (ImportError, AttributeError, RuntimeError) as err:
+                        cases.append({'font': font, 'format': file_format, 'point_size': point_size, 'jobs': jobs,
+                                      'backend': backend, 'stages': {}, 'skipped': str(err)})
+
+    return {'version': xwing_font_converter.__version__,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': DEFAULT_JOBS,
+            'timestamp': int(time.time()),
+            'cases': cases}
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Compare conversion throughput of cases with same parameters in a baseline
+
+    :param results: Benchmark results
+    :type results: dict
+
+    :param baseline: Previous benchmark results
+    :type baseline: dict
+
+    :param tolerance: Relative throughput loss tolerated
+    :type tolerance: float
+
+    :return: Description of each regression
+    :rtype: list of str
+    """
+    def get_key(case):
+        return case['font'], case['format'], case['point_size'], case['jobs'], case['backend']
+
+    baseline_cases = dict((get_key(case), case) for case in baseline.get('cases', []))
+    regressions = []
+    for case in results['cases']:
+        previous = baseline_cases.get(get_key(case))
+        if previous is None:
+            continue
+        for stage, measures in sorted(case['stages'].items()):
+            previous_rate = previous['stages'].get(stage, {}).get('glyphs_per_sec')
+            rate = measures['glyphs_per_sec']
+            if previous_rate and rate is not None and rate < previous_rate * (1 - tolerance):
+                regressions.append("{font} {format} {point_size}pt {jobs} job(s) {stage}: "
+                                   "{rate} glyphs/sec (was {previous})"
+                                   .format(stage=stage, rate=rate, previous=previous_rate, **case))
+    return regressions
+
+
+parser = argparse.ArgumentParser(description='X-Wing font converter benchmark by KalHamaar')
+
+parser.add_argument('--font', dest='FONTS', default=sorted(BENCHMARK_FONTS), action='store', nargs='+',
+                    choices=sorted(BENCHMARK_FONTS),
+                    help='bundled fonts to convert (default: all)')
+
+parser.add_argument('-f', '--format', dest='FORMATS', default=AVAILABLE_FILE_FORMATS, action='store', nargs='+',
+                    choices=AVAILABLE_FILE_FORMATS,
+                    help='image formats (default: all)')
+
+parser.add_argument('-p', '--pointsize', dest='POINTSIZES', default=[DEFAULT_POINTSIZE], action='store', nargs='+',
+                    type=int,
+                    help='font point sizes (default: %(default)s)')
+
+parser.add_argument('-j', '--jobs', dest='JOBS', default=sorted(set([1, DEFAULT_JOBS])), action='store', nargs='+',
+                    type=int,
+                    help='numbers of elements converted in parallel (default: 1 and CPU count)')
+
+parser.add_argument('-b', '--backend', dest='BACKEND', default=DEFAULT_BACKEND, action='store',
+                    choices=AVAILABLE_BACKENDS,
+                    help='rendering backend (default: %(default)s)')
+
+parser.add_argument('-o', '--output', dest='OUTPUT', action='store',
+                    help='JSON results file (default: standard output)')
+
+parser.add_argument('--baseline', dest='BASELINE', action='store',
+                    help='previous JSON results, exit with error if conversion got slower')
+
+parser.add_argument('--tolerance', dest='TOLERANCE', default=DEFAULT_TOLERANCE, action='store', type=float,
+                    help='relative throughput loss tolerated against baseline (default: %(default)s)')
+
+
+def main():
+    """
+    Main entry point for benchmark
+
+    :return:
+    """
+    args = parser.parse_args()
+
+    # converter logs would be part of measures
+    logging.disable(logging.CRITICAL)
+
+    results = run_benchmark(args.FONTS, args.FORMATS, args.POINTSIZES, args.JOBS, backend=args.BACKEND)
+    for case in results['cases']:
+        if 'skipped' in case:
+            sys.stderr.write("Skipped {font} {format} {point_size}pt {jobs} job(s): {skipped}\n".format(**case))
+
+    if args.OUTPUT:
+        with open(args.OUTPUT, 'w') as output_file:
+            json.dump(results, output_file, indent=1, sort_keys=True)
+    else:
+        json.dump(results, sys.stdout, indent=1, sort_keys=True)
+        sys.stdout.write('\n')
+
+    if args.BASELINE:
+        with open(args.BASELINE, 'r') as baseline_file:
+            regressions = compare(results, json.load(baseline_file), tolerance=args.TOLERANCE)
+        for regression in regressions:
+            sys.stderr.write("Regression: {}\n".format(regression))
+        if regressions:
+            sys.exit(-1)
+
+
+if __name__ == '__main__':
+    main()
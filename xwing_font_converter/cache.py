@@ -0,0 +1,201 @@
+# coding=utf-8
+"""
+Persistent cache of rendered glyphs alpha masks, shared between runs and output folders
+"""
+import hashlib
+import os
+import struct
+import tempfile
+import threading
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional, cache is only used by pillow backend
+    Image = None
+
+from logger import get_logger
+
+CACHE_VERSION = 1  # to increase when rendering changes, invalidates all cached masks
+DEFAULT_CACHE_SIZE = 64 * 1024 * 1024  # bytes
+EVICTION_RATIO = 0.9  # eviction goes below maximum size, for next writes not to evict again at once
+MASK_HEADER = struct.Struct('>HH')  # width, height
+MASK_EXTENSION = '.mask'
+
+
+def get_default_cache_dir():
+    """
+    Get user cache directory of converter (as XDG_CACHE_HOME on unix, LOCALAPPDATA on windows)
+
+    :rtype: str
+    """
+    base_dir = os.environ.get('XDG_CACHE_HOME') or os.environ.get('LOCALAPPDATA') or \
+        os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base_dir, 'xwing-font-converter')
+
+
+DEFAULT_CACHE_DIR = get_default_cache_dir()
+
+
+class GlyphCache(object):
+    """
+    Content addressed cache of raw alpha masks, keyed by font hash, code point and render parameters.
+
+    Least recently used masks are evicted when cache exceeds its maximum size, down to 90% of it. Cache size is kept
+    as a running total, cache folder being only scanned on first write and on eviction.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_size=DEFAULT_CACHE_SIZE):
+        super(GlyphCache, self).__init__()
+
+        self._cache_dir = os.path.expanduser(cache_dir)
+        self._max_size = max_size
+        self._lock = threading.Lock()
+        self._size = None  # computed on first write
+        self._log = get_logger()
+
+    @property
+    def cache_dir(self):
+        return self._cache_dir
+
+    @staticmethod
+    def get_key(font_hash, code_point, point_size, size):
+        """
+        Get cache key of a glyph mask
+
+        :param font_hash: Hash of font file content
+        :type font_hash: str
+
+        :param code_point: Unicode code point of glyph
+        :type code_point: int
+
+        :param point_size: Size of font
+        :type point_size: int
+
+        :param size: Size in pixel of square mask
+        :type size: int
+
+        :rtype: str
+        """
+        key = u"{version}:{font}:{code}:{point_size}:{size}".format(version=CACHE_VERSION, font=font_hash,
+                                                                   code=code_point, point_size=int(point_size),
+                                                                   size=int(size))
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """
+        Get cached mask, and mark it as recently used
+
+        :param key: Cache key
+        :type key: str
+
+        :return: 'L' mode mask or None if not cached
+        :rtype: PIL.Image.Image
+        """
+        mask_path = self.__get_path(key)
+        try:
+            with open(mask_path, 'rb') as mask_file:
+                data = mask_file.read()
+            os.utime(mask_path, None)
+        except (IOError, OSError):
+            return None
+
+        if len(data) < MASK_HEADER.size:
+            return None
+        width, height = MASK_HEADER.unpack(data[:MASK_HEADER.size])
+        if len(data) != MASK_HEADER.size + width * height:
+            return None  # truncated entry, will be overwritten
+        return Image.frombytes('L', (width, height), data[MASK_HEADER.size:])
+
+    def put(self, key, mask):
+        """
+        Store mask in cache, evicting least recently used masks if needed
+
+        :param key: Cache key
+        :type key: str
+
+        :param mask: 'L' mode mask
+        :type mask: PIL.Image.Image
+
+        :rtype: None
+        """
+        data = MASK_HEADER.pack(*mask.size) + mask.tobytes()
+        mask_path = self.__get_path(key)
+        try:
+            if not os.path.exists(os.path.dirname(mask_path)):
+                os.makedirs(os.path.dirname(mask_path))
+        except OSError:
+            pass  # created by another thread
+
+        replaced_size = 0
+        try:
+            # write then rename, for readers to never see partial masks
+            handle, tmp_path = tempfile.mkstemp(dir=os.path.dirname(mask_path))
+            with os.fdopen(handle, 'wb') as mask_file:
+                mask_file.write(data)
+            if os.path.exists(mask_path):  # rename does not overwrite on windows
+                replaced_size = os.path.getsize(mask_path)
+                os.remove(mask_path)
+            os.rename(tmp_path, mask_path)
+        except (IOError, OSError) as err:
+            self._log.warning("Unable to write glyph cache {}: {}".format(mask_path, err))
+            return
+
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self.__list_entries())
+            else:
+                self._size += len(data) - replaced_size
+            if self._size > self._max_size:
+                self.__evict()
+
+    def clear(self):
+        """
+        Remove all cached masks
+
+        :rtype: None
+        """
+        with self._lock:
+            for path, _, _ in self.__list_entries():
+                os.remove(path)
+            self._size = 0
+
+    def __get_path(self, key):
+        return os.path.join(self._cache_dir, key[:2], key + MASK_EXTENSION)
+
+    def __list_entries(self):
+        """
+        List cached masks
+
+        :return: Path, size and last use time of each mask
+        :rtype: list of (str, int, float)
+        """
+        entries = []
+        for root, _, files in os.walk(self._cache_dir):
+            for file_name in files:
+                if file_name.endswith(MASK_EXTENSION):
+                    path = os.path.join(root, file_name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def __evict(self):
+        """
+        Remove least recently used masks until cache is back under its low-water size (lock must be held)
+
+        :rtype: None
+        """
+        entries = sorted(self.__list_entries(), key=lambda entry: entry[2])
+        self._size = sum(size for _, size, _ in entries)  # resync running total with other writers
+        low_water_size = int(self._max_size * EVICTION_RATIO)
+        for path, size, _ in entries:
+            if self._size <= low_water_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self._size -= size
+        self._log.debug("Glyph cache evicted down to {} bytes".format(self._size))
@@ -0,0 +1,81 @@
+# coding=utf-8
+"""
+Colors of rendered glyphs: ImageMagick color names, or any hex (#rgb, #rgba, #rrggbb, #rrggbbaa) or
+rgb(r, g, b) / rgba(r, g, b, alpha) color
+"""
+import re
+
+try:
+    from PIL import ImageColor
+except ImportError:  # Pillow is optional, colors are then given as is to ImageMagick
+    ImageColor = None
+
+AVAILABLE_COLORS = ['black', 'white',  'blue', 'red', 'grey', 'violet', 'green', 'yellow', 'steelblue1']
+# ImageMagick (X11) color names unknown from Pillow
+EXTRA_COLORS = {'steelblue1': '#63b8ff'}
+
+HEX_COLOR = re.compile(r'^#([0-9a-fA-F]{3,4}|[0-9a-fA-F]{6}|[0-9a-fA-F]{8})$')
+RGB_COLOR = re.compile(r'^rgba?\(\s*(\d{1,3})\s*,\s*(\d{1,3})\s*,\s*(\d{1,3})\s*(?:,\s*(\d*\.?\d+)\s*)?\)$')
+
+
+def parse_color(color):
+    """
+    Parse a hex or rgb()/rgba() color (alpha of rgba() being between 0 and 1)
+
+    :param color: Color
+    :type color: str
+
+    :return: RGBA tuple, None if color is not a valid hex or rgb color (eg: a color name)
+    :rtype: tuple
+    """
+    match = HEX_COLOR.match(color)
+    if match:
+        digits = match.group(1)
+        if len(digits) <= 4:
+            digits = ''.join(digit * 2 for digit in digits)
+        rgba = tuple(int(digits[index:index + 2], 16) for index in range(0, len(digits), 2))
+        return rgba if len(rgba) == 4 else rgba + (255,)
+
+    match = RGB_COLOR.match(color)
+    if match:
+        rgb = tuple(int(value) for value in match.group(1, 2, 3))
+        alpha = float(match.group(4)) if match.group(4) is not None else 1.0
+        if max(rgb) <= 255 and alpha <= 1:
+            return rgb + (int(round(alpha * 255)),)
+    return None
+
+
+def is_valid_color(color):
+    """
+    :return: Whether color is a known color name or a valid hex or rgb color
+    :rtype: bool
+    """
+    return color in AVAILABLE_COLORS or parse_color(color) is not None
+
+
+def get_rgba(color):
+    """
+    Get RGBA tuple of given color (color names require Pillow)
+
+    :param color: Color name (as ImageMagick ones), hex or rgb color
+    :type color: str
+
+    :rtype: tuple
+    """
+    rgba = parse_color(color)
+    if rgba is None:
+        rgba = ImageColor.getrgb(EXTRA_COLORS.get(color, color))[:3] + (255,)
+    return rgba
+
+
+def get_color_name(color):
+    """
+    Get name of color usable in file names and URLs: color names are kept, other colors are written as hex digits
+    (without alpha if opaque), eg: 'rgba(255, 0, 0, 0.5)' gives 'ff000080'
+
+    :rtype: str
+    """
+    rgba = parse_color(color)
+    if rgba is None:
+        return color
+    return ''.join('{:02x}'.format(value) for value in (rgba if rgba[3] < 255 else rgba[:3]))
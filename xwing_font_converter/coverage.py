@@ -0,0 +1,46 @@
+# coding=utf-8
+"""
+Coverage of a font: code points which have a glyph with an outline, read from its cmap table
+"""
+try:
+    from fontTools.pens.boundsPen import ControlBoundsPen
+    from fontTools.ttLib import TTFont
+except ImportError:  # fontTools is optional, elements are then rendered without precheck
+    ControlBoundsPen = TTFont = None
+
+
+def get_font_coverage(ttf_file_path):
+    """
+    Get code points of font mapped to a glyph with an outline (eg: space is mapped but has nothing to render)
+
+    :param ttf_file_path: Path of font
+    :type ttf_file_path: str
+
+    :raise ImportError if fontTools is not installed
+
+    :rtype: frozenset
+    """
+    if TTFont is None:
+        raise ImportError("fontTools is required to read font coverage")
+
+    font = TTFont(ttf_file_path, lazy=True)
+    try:
+        cmap = font.getBestCmap() or {}
+        covered = set()
+        if 'glyf' in font:
+            # empty TrueType glyphs have no data, no need to decompile outlines
+            loca = font['loca']
+            for code_point, glyph_name in cmap.items():
+                glyph_id = font.getGlyphID(glyph_name)
+                if loca[glyph_id + 1] > loca[glyph_id]:
+                    covered.add(code_point)
+        else:
+            glyph_set = font.getGlyphSet()
+            for code_point, glyph_name in cmap.items():
+                pen = ControlBoundsPen(glyph_set)
+                glyph_set[glyph_name].draw(pen)
+                if pen.bounds is not None:
+                    covered.add(code_point)
+    finally:
+        font.close()
+    return frozenset(covered)
@@ -0,0 +1,382 @@
+# coding=utf-8
+"""
+Painting of glyph alpha masks: flat color tint and composable effects (stroke outline, drop shadow, glow, two-tone
+gradient), all computed from the same rendered mask
+"""
+import math
+
+try:
+    from PIL import Image, ImageChops, ImageFilter
+except ImportError:  # Pillow is optional, effects are only available with pillow backend
+    Image = ImageChops = ImageFilter = None
+
+from colors import get_rgba, is_valid_color
+
+EFFECT_SEPARATOR = ':'
+# maximum arguments of parsed effects, for a requested effect not to take ages (stroke is made of width² passes)
+MAX_STROKE_WIDTH = 16
+MAX_EFFECT_OFFSET = 64
+MAX_EFFECT_RADIUS = 32  # glow radius and shadow blur
+
+
+def tint(mask, color):
+    """
+    Fill given color through alpha mask
+
+    :param mask: Alpha mask ('L' mode image)
+    :type mask: PIL.Image.Image
+
+    :param color: Color name (as ImageMagick ones), hex or rgb color
+    :type color: str
+
+    :rtype: PIL.Image.Image
+    """
+    rgba = get_rgba(color)
+    image = Image.new('RGBA', mask.size, rgba[:3])
+    image.putalpha(mask if rgba[3] == 255 else mask.point(lambda alpha: alpha * rgba[3] // 255))
+    return image
+
+
+def pad(mask, margin):
+    """
+    :return: Mask with a transparent border of given width around it
+    :rtype: PIL.Image.Image
+    """
+    if not margin:
+        return mask
+    padded = Image.new('L', (mask.size[0] + 2 * margin, mask.size[1] + 2 * margin), 0)
+    padded.paste(mask, (margin, margin))
+    return padded
+
+
+def dilate(mask, radius):
+    """
+    Grow mask by given radius with a round brush, keeping its antialiased edges. Mask border must be transparent
+    on at least radius pixels.
+
+    :rtype: PIL.Image.Image
+    """
+    # brush is made of horizontal segments: mask grown horizontally by each half width is shifted vertically, which
+    # takes O(radius) passes instead of O(radius²) for each offset of brush
+    rows = [mask]
+    for x_offset in range(1, radius + 1):
+        rows.append(ImageChops.lighter(rows[-1], ImageChops.lighter(ImageChops.offset(mask, x_offset, 0),
+                                                                    ImageChops.offset(mask, -x_offset, 0))))
+    dilated = rows[radius]
+    for y_offset in range(1, radius + 1):
+        row = rows[int(math.sqrt(radius ** 2 - y_offset ** 2))]
+        dilated = ImageChops.lighter(dilated, ImageChops.lighter(ImageChops.offset(row, 0, y_offset),
+                                                                 ImageChops.offset(row, 0, -y_offset)))
+    return dilated
+
+
+def _get_blur_margin(radius):
+    """
+    :return: Pixels reached by a gaussian blur of given radius
+    :rtype: int
+    """
+    return int(math.ceil(3 * radius))
+
+
+class StrokeEffect(object):
+    """
+    Outline of given width around glyph, drawn behind it
+    """
+    name = 'stroke'
+
+    def __init__(self, color='black', width=1):
+        super(StrokeEffect, self).__init__()
+
+        self._color = _check_color(color)
+        self._width = _check_number(width, 'width', minimum=1)
+
+    @property
+    def margin(self):
+        return self._width
+
+    def layer(self, mask):
+        """
+        :param mask: Glyph mask, padded with effects margin
+        :type mask: PIL.Image.Image
+
+        :return: Layer drawn behind glyph
+        :rtype: PIL.Image.Image
+        """
+        return tint(dilate(mask, self._width), self._color)
+
+    def check_limits(self):
+        """
+        :raise ValueError if effect arguments are above their maximum (see parse_effect)
+        """
+        _check_number(self._width, 'width', maximum=MAX_STROKE_WIDTH)
+
+    def scaled(self, factor):
+        """
+        :return: Same effect for images scaled by given factor (eg: @2x images)
+        :rtype: StrokeEffect
+        """
+        return StrokeEffect(self._color, max(1, _scale(self._width, factor)))
+
+    def __str__(self):
+        return EFFECT_SEPARATOR.join([self.name, self._color, str(self._width)])
+
+
+class ShadowEffect(object):
+    """
+    Blurred copy of glyph, shifted by given offset behind it
+    """
+    name = 'shadow'
+
+    def __init__(self, color='black', x_offset=2, y_offset=2, blur=2):
+        super(ShadowEffect, self).__init__()
+
+        self._color = _check_color(color)
+        self._x_offset = _check_number(x_offset, 'x offset')
+        self._y_offset = _check_number(y_offset, 'y offset')
+        self._blur = _check_number(blur, 'blur', minimum=0)
+
+    @property
+    def margin(self):
+        return max(abs(self._x_offset), abs(self._y_offset)) + _get_blur_margin(self._blur)
+
+    def layer(self, mask):
+        """
+        :see: StrokeEffect.layer
+        """
+        shadow = ImageChops.offset(mask, self._x_offset, self._y_offset)
+        if self._blur:
+            shadow = shadow.filter(ImageFilter.GaussianBlur(self._blur))
+        return tint(shadow, self._color)
+
+    def check_limits(self):
+        """
+        :see: StrokeEffect.check_limits
+        """
+        _check_number(abs(self._x_offset), 'x offset', maximum=MAX_EFFECT_OFFSET)
+        _check_number(abs(self._y_offset), 'y offset', maximum=MAX_EFFECT_OFFSET)
+        _check_number(self._blur, 'blur', maximum=MAX_EFFECT_RADIUS)
+
+    def scaled(self, factor):
+        """
+        :see: StrokeEffect.scaled
+        """
+        return ShadowEffect(self._color, _scale(self._x_offset, factor), _scale(self._y_offset, factor),
+                            _scale(self._blur, factor))
+
+    def __str__(self):
+        return EFFECT_SEPARATOR.join([self.name, self._color, str(self._x_offset), str(self._y_offset),
+                                      str(self._blur)])
+
+
+class GlowEffect(object):
+    """
+    Blurred halo around glyph, drawn behind it
+    """
+    name = 'glow'
+
+    def __init__(self, color='yellow', radius=3):
+        super(GlowEffect, self).__init__()
+
+        self._color = _check_color(color)
+        self._radius = _check_number(radius, 'radius', minimum=1)
+
+    @property
+    def margin(self):
+        return _get_blur_margin(self._radius)
+
+    def layer(self, mask):
+        """
+        :see: StrokeEffect.layer
+        """
+        glow = mask.filter(ImageFilter.GaussianBlur(self._radius))
+        return tint(glow.point(lambda alpha: min(255, 2 * alpha)), self._color)  # blur halves glyph edges opacity
+
+    def check_limits(self):
+        """
+        :see: StrokeEffect.check_limits
+        """
+        _check_number(self._radius, 'radius', maximum=MAX_EFFECT_RADIUS)
+
+    def scaled(self, factor):
+        """
+        :see: StrokeEffect.scaled
+        """
+        return GlowEffect(self._color, max(1, _scale(self._radius, factor)))
+
+    def __str__(self):
+        return EFFECT_SEPARATOR.join([self.name, self._color, str(self._radius)])
+
+
+class GradientEffect(object):
+    """
+    Vertical two-tone gradient from top to bottom of glyph, replacing fill color
+    """
+    name = 'gradient'
+
+    def __init__(self, top_color='white', bottom_color='black'):
+        super(GradientEffect, self).__init__()
+
+        self._top_color = _check_color(top_color)
+        self._bottom_color = _check_color(bottom_color)
+
+    @property
+    def margin(self):
+        return 0
+
+    def fill(self, mask):
+        """
+        :param mask: Glyph mask, padded with effects margin
+        :type mask: PIL.Image.Image
+
+        :return: Glyph filled with gradient, spanning glyph height whatever image size is
+        :rtype: PIL.Image.Image
+        """
+        top, bottom = mask.getbbox() and mask.getbbox()[1::2] or (0, mask.size[1])
+        blend = Image.new('L', mask.size, 0)
+        if bottom - top > 1:
+            blend.paste(Image.linear_gradient('L').resize((mask.size[0], bottom - top)), (0, top))
+        blend.paste(255, (0, bottom, mask.size[0], mask.size[1]))
+
+        image = Image.composite(Image.new('RGBA', mask.size, get_rgba(self._bottom_color)),
+                                Image.new('RGBA', mask.size, get_rgba(self._top_color)), blend)
+        image.putalpha(ImageChops.multiply(image.split()[-1], mask))
+        return image
+
+    def check_limits(self):
+        """
+        :see: StrokeEffect.check_limits
+        """
+        pass  # no size
+
+    def scaled(self, factor):
+        """
+        :see: StrokeEffect.scaled
+        """
+        return self
+
+    def __str__(self):
+        return EFFECT_SEPARATOR.join([self.name, self._top_color, self._bottom_color])
+
+
+AVAILABLE_EFFECTS = dict((effect.name, effect) for effect in [StrokeEffect, ShadowEffect, GlowEffect, GradientEffect])
+
+
+def _scale(value, factor):
+    """
+    :rtype: int
+    """
+    return int(round(value * factor))
+
+
+def _check_color(color):
+    """
+    :raise ValueError if color is unknown
+    """
+    if not is_valid_color(color):
+        raise ValueError("Unknown effect color '{}'".format(color))
+    return color
+
+
+def _check_number(value, name, minimum=None, maximum=None):
+    """
+    :raise ValueError if value is not an integer (between minimum and maximum)
+
+    :rtype: int
+    """
+    try:
+        number = int(value)
+    except ValueError:
+        raise ValueError("Effect {} should be an integer (got: {})".format(name, value))
+    if minimum is not None and number < minimum:
+        raise ValueError("Effect {} should be at least {} (got: {})".format(name, minimum, value))
+    if maximum is not None and number > maximum:
+        raise ValueError("Effect {} should be at most {} (got: {})".format(name, maximum, value))
+    return number
+
+
+def parse_effect(spec):
+    """
+    Parse an effect given as name and arguments separated by colons, arguments being optional:
+
+    - stroke:COLOR:WIDTH
+    - shadow:COLOR:X_OFFSET:Y_OFFSET:BLUR
+    - glow:COLOR:RADIUS
+    - gradient:TOP_COLOR:BOTTOM_COLOR
+
+    Stroke width is at most MAX_STROKE_WIDTH, shadow offsets MAX_EFFECT_OFFSET, glow radius and shadow blur
+    MAX_EFFECT_RADIUS (scaled effects of @2x or @3x images can exceed them).
+
+    :param spec: Effect specification, eg: 'stroke:white:2'
+    :type spec: str
+
+    :raise ValueError in case of unknown effect, wrong argument or argument above its maximum
+
+    :rtype: StrokeEffect or ShadowEffect or GlowEffect or GradientEffect
+    """
+    name, _, arguments = spec.partition(EFFECT_SEPARATOR)
+    if name not in AVAILABLE_EFFECTS:
+        raise ValueError("Effect should be in {effects} (got: {effect})"
+                         .format(effects=','.join(sorted(AVAILABLE_EFFECTS)), effect=name))
+    try:
+        effect = AVAILABLE_EFFECTS[name](*(arguments.split(EFFECT_SEPARATOR) if arguments else []))
+    except TypeError:
+        raise ValueError("Too many arguments for effect {}".format(spec))
+    effect.check_limits()
+    return effect
+
+
+def scale_effects(effects, factor):
+    """
+    Get effects for images scaled by given factor, their widths, offsets and radiuses being scaled
+
+    :type effects: tuple
+
+    :rtype: tuple
+    """
+    return effects if factor == 1 else tuple(effect.scaled(factor) for effect in effects)
+
+
+def get_background(mask, effects):
+    """
+    Pad mask for effects and draw effects layers behind glyph, which do not depend on glyph fill color
+
+    :param mask: Glyph mask
+    :type mask: PIL.Image.Image
+
+    :param effects: Effects, in drawing order
+    :type effects: list
+
+    :return: Padded mask and layers composited behind glyph (None if no effect is drawn behind glyph)
+    :rtype: tuple
+    """
+    mask = pad(mask, max([effect.margin for effect in effects] or [0]))
+    background = None
+    for effect in effects:
+        if hasattr(effect, 'layer'):
+            layer = effect.layer(mask)
+            background = layer if background is None else Image.alpha_composite(background, layer)
+    return mask, background
+
+
+def paint(mask, color, effects=(), background=None):
+    """
+    Paint glyph mask with color (or gradient effect) over effects layers
+
+    :param mask: Glyph mask
+    :type mask: PIL.Image.Image
+
+    :param color: Fill color, unused with gradient effect
+    :type color: str
+
+    :param effects: Effects, in drawing order
+    :type effects: list
+
+    :param background: Padded mask and effects layers of get_background, computed from mask and effects if not given
+    :type background: tuple
+
+    :rtype: PIL.Image.Image
+    """
+    mask, layers = background if background is not None else get_background(mask, effects)
+    fills = [effect for effect in effects if hasattr(effect, 'fill')]
+    image = fills[-1].fill(mask) if fills else tint(mask, color)
+    return Image.alpha_composite(layers, image) if layers is not None else image
@@ -0,0 +1,209 @@
+# coding=utf-8
+"""
+Encoding of rendered images into files: compression level, palette reduction of single color glyphs and metadata
+stripping
+"""
+import io
+
+try:
+    from PIL import Image, features
+except ImportError:  # Pillow is optional, ImageMagick backend encodes images itself
+    Image = features = None
+
+from metrics import Metrics
+
+COMPRESSION_LEVELS = ['fast', 'default', 'best']
+DEFAULT_COMPRESSION = 'default'
+PNG_COMPRESS_LEVELS = {'fast': 1, 'default': 6, 'best': 9}  # zlib level
+WEBP_METHODS = {'fast': 0, 'default': 4, 'best': 6}  # speed/size trade-off of lossless webp
+GIF_TRANSPARENCY_THRESHOLD = 128  # gif has no partial transparency, same 50% threshold as ImageMagick
+
+
+def is_format_available(file_format):
+    """
+    Check if Pillow can encode given raster format (webp depends on how Pillow was built)
+
+    :rtype: bool
+    """
+    if Image is None:
+        return False
+    if file_format == 'webp':
+        return features.check('webp')
+    return True
+
+
+def get_single_color(image):
+    """
+    Get color of an RGBA image whose pixels all have the same color, only their alpha varying (eg: tinted glyphs)
+
+    :return: RGB color, None if image has many colors
+    :rtype: tuple
+    """
+    colors = image.convert('RGB').getcolors(1)
+    return colors[0][1] if colors else None
+
+
+def get_alpha_paletted(image, color):
+    """
+    Get single color image as a palette image, its palette repeating color with alpha values in its transparency
+    (tRNS chunk of png). Only alpha values of image are in palette, pixels taking less than 8 bits when they fit.
+
+    :param image: RGBA image whose pixels all have given color
+    :type image: PIL.Image.Image
+
+    :param color: RGB color
+    :type color: tuple
+
+    :return: 'P' mode image and its png save parameters (transparency, bits per pixel)
+    :rtype: tuple
+    """
+    alpha = image.split()[-1]
+    alphas = [value for value, count in enumerate(alpha.histogram()) if count]
+    indexes = [0] * 256
+    for index, value in enumerate(alphas):
+        indexes[value] = index
+    paletted = Image.frombytes('P', image.size, alpha.point(indexes).tobytes())
+    paletted.putpalette(list(color) * len(alphas))
+    params = {'transparency': bytes(bytearray(alphas))}
+    if len(alphas) <= 16:  # 8 bits palette is sized by Pillow itself, as full 256 colors palette by old ones
+        params['bits'] = min(bits for bits in [1, 2, 4] if len(alphas) <= 2 ** bits)
+    return paletted, params
+
+
+class ImageEncoder(object):
+    """
+    Encode RGBA images, without any metadata.
+
+    Single color images (every glyph rendered by pillow backend) skip color quantization of gif. In png they are
+    stored as grayscale with alpha when their color is a gray, and tried as a palette of their color with alpha
+    values in its transparency: 'fast' compression takes grayscale or RGBA, 'default' one the smallest of them and
+    palette, 'best' one the smallest of all variants.
+    """
+
+    def __init__(self, compression=DEFAULT_COMPRESSION, metrics=None):
+        """
+        :param compression: Compression level (in COMPRESSION_LEVELS), trading encoding time for file size
+        :type compression: str
+
+        :param metrics: Collector of encoded sizes ('encoded_bytes' values)
+        :type metrics: Metrics
+
+        :raise AttributeError in case of unknown compression level
+        """
+        super(ImageEncoder, self).__init__()
+
+        if compression not in COMPRESSION_LEVELS:
+            raise AttributeError("Compression should be in {levels} (got: {compression})"
+                                 .format(levels=','.join(COMPRESSION_LEVELS), compression=compression))
+        self._compression = compression
+        self._metrics = metrics if metrics is not None else Metrics()
+
+    @property
+    def compression(self):
+        return self._compression
+
+    def encode(self, image, file_format):
+        """
+        Encode RGBA image with given format
+
+        :param image: RGBA image
+        :type image: PIL.Image.Image
+
+        :param file_format: Image file format (in 'gif', 'png', 'webp')
+        :type file_format: str
+
+        :rtype: bytes
+        """
+        if image.info:
+            image = image.copy()
+            image.info = {}  # metadata of images read from disk (eg: ICC profile) are not kept
+
+        if file_format == 'gif':
+            data = self.__encode_gif(image)
+        elif file_format == 'webp':
+            data = self.__save(image, 'WEBP', lossless=True, quality=100, method=WEBP_METHODS[self._compression])
+        else:
+            data = self.__encode_png(image)
+
+        self._metrics.observe('encoded_bytes', len(data), format=file_format)
+        return data
+
+    def save(self, image, output_file, file_format):
+        """
+        Encode RGBA image into given file (or file object)
+
+        :param output_file: Path or file object to write
+        :type output_file: str
+
+        :see: encode
+
+        :rtype: None
+        """
+        data = self.encode(image, file_format)
+        if hasattr(output_file, 'write'):
+            output_file.write(data)
+        else:
+            with open(output_file, 'wb') as image_file:
+                image_file.write(data)
+
+    def magick_args(self, file_format):
+        """
+        Get ImageMagick options applying same compression and stripping
+
+        :rtype: list
+        """
+        if file_format == 'webp':
+            return [u'-strip', u'-define', u'webp:lossless=true',
+                    u'-define', u"webp:method={}".format(WEBP_METHODS[self._compression])]
+        if file_format == 'png':
+            return [u'-strip', u'-define', u"png:compression-level={}".format(PNG_COMPRESS_LEVELS[self._compression])]
+        return [u'-strip']
+
+    def __encode_gif(self, image):
+        """
+        Encode gif, with a single color palette for single color images instead of an adaptive one
+
+        :rtype: bytes
+        """
+        alpha = image.split()[-1]
+        opaque = alpha.point(lambda a: 255 if a >= GIF_TRANSPARENCY_THRESHOLD else 0)
+        color = get_single_color(image)
+        if color is not None:
+            paletted = Image.new('P', image.size, 255)
+            paletted.putpalette(list(color) + [0, 0, 0] * 255)
+            paletted.paste(0, mask=opaque)
+        else:
+            paletted = image.convert('RGB').convert('P', palette=Image.ADAPTIVE, colors=255)
+            paletted.paste(255, Image.eval(opaque, lambda a: 255 - a))
+        return self.__save(paletted, 'GIF', transparency=255, optimize=self._compression != 'fast')
+
+    def __encode_png(self, image):
+        """
+        Encode png, as grayscale for gray single color images and as palette for other single color ones, trying
+        more variants as compression increases (palette overhead can outweigh its gain on small images)
+
+        :rtype: bytes
+        """
+        compress_level = PNG_COMPRESS_LEVELS[self._compression]
+        candidates = [(image, {})]
+        color = get_single_color(image)
+        if color is not None:
+            if color[0] == color[1] == color[2]:
+                candidates.insert(0, (Image.merge('LA', (Image.new('L', image.size, color[0]), image.split()[-1])),
+                                      {}))
+            candidates.append(get_alpha_paletted(image, color))
+        candidates = candidates[:{'fast': 1, 'default': 2, 'best': len(candidates)}[self._compression]]
+        optimizations = [False, True] if self._compression == 'best' else [False]  # optimize can grow small images
+
+        encoded = [self.__save(candidate, 'PNG', compress_level=compress_level, optimize=optimize, **params)
+                   for candidate, params in candidates for optimize in optimizations]
+        return min(encoded, key=len)
+
+    @staticmethod
+    def __save(image, pil_format, **params):
+        """
+        :rtype: bytes
+        """
+        image_data = io.BytesIO()
+        image.save(image_data, format=pil_format, **params)
+        return image_data.getvalue()
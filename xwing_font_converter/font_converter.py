@@ -1,49 +1,622 @@
 # coding=utf-8
+import io
 import json
 import locale
 import os
+import shutil
 import subprocess
+import tempfile
+import threading
 import time
+from collections import namedtuple
 
+try:
+    from shlex import quote
+except ImportError:  # python 2
+    from pipes import quote
+
+try:
+    from PIL import Image, ImageDraw, ImageFilter, ImageFont
+except ImportError:  # Pillow is optional, only ImageMagick backend is available without it
+    Image = ImageDraw = ImageFilter = ImageFont = None
+
+from archive import ArchiveWriter
+from atlas import DEFAULT_ATLAS_NAME, DEFAULT_ATLAS_SIZE, get_css, get_index, pack_atlases
+from cache import GlyphCache
+from colors import AVAILABLE_COLORS, EXTRA_COLORS, get_color_name, is_valid_color
+from coverage import get_font_coverage
+from effects import get_background, paint, parse_effect, scale_effects
+from encoding import DEFAULT_COMPRESSION, ImageEncoder, is_format_available
 from logger import get_logger
+from magick import escape_text, find_imagemagick
+from manifest import Manifest, get_file_hash
+from map_loader import MAP_FORMATS, get_character, load_map
+from metrics import Metrics, timed
+from scheduler import DEFAULT_JOBS, JobScheduler
+from svg import SvgRenderer
 
-AVAILABLE_COLORS = ['black', 'white',  'blue', 'red', 'grey', 'violet', 'green', 'yellow', 'steelblue1']
-AVAILABLE_FILE_FORMATS = ['gif', 'png']
+AVAILABLE_FILE_FORMATS = ['gif', 'png', 'webp', 'svg']
+VECTOR_FILE_FORMATS = ['svg']  # rendered from glyphs outlines instead of rendering backend
+MAX_FILES_PER_COMMAND = 500  # images processed by one mogrify command, to keep command lines short
+AVAILABLE_BACKENDS = ['pillow', 'imagemagick']
+DEFAULT_BACKEND = 'pillow' if Image is not None else 'imagemagick'
 DEFAULT_POINTSIZE = 50
 DEFAULT_SIZE = 72
 
 
+def _get_text_width(font, text):
+    """
+    Get width of text as drawn from origin (advance or ink right edge, whichever is farther)
+
+    :type font: PIL.ImageFont.FreeTypeFont
+
+    :rtype: int
+    """
+    if hasattr(font, 'getbbox'):  # Pillow >= 8, getsize was removed by Pillow 10
+        return font.getbbox(text)[2]
+    return font.getsize(text)[0]
+
+
+def as_list(value):
+    """
+    Get given option as a list, to accept either a single value or many
+
+    :rtype: list
+    """
+    return list(value) if isinstance(value, (list, tuple)) else [value]
+
+
+def get_output_name(element, color, file_format, point_size=None, size=None, scale=None):
+    """
+    Get image file name of element, point size and size are only part of name when given (batch of many of them),
+    colors other than names are written as hex digits. Scales other than 1 are appended as '@2x'.
+
+    :rtype: str
+    """
+    name = u"{element}-{color}".format(element=element, color=get_color_name(color))
+    if point_size is not None:
+        name += u"-{}pt".format(point_size)
+    if size is not None:
+        name += u"-{}px".format(size)
+    if scale is not None and scale != 1:
+        name += u"@{}x".format(scale)
+    return u"{name}.{format}".format(name=name, format=file_format)
+
+
+class RenderTarget(namedtuple('RenderTarget', ['color', 'point_size', 'stages', 'name', 'effects'])):
+    """
+    One image to produce from a glyph: options, stages to apply, image file name (format is taken from its
+    extension) and effects painted after stages
+    """
+    __slots__ = ()
+
+
+class ConversionError(RuntimeError):
+    """
+    Raised once all conversion jobs are done when some of them failed
+    """
+
+    def __init__(self, errors):
+        super(ConversionError, self).__init__(u"{count} element(s) failed to convert: {elements}"
+                                              .format(count=len(errors), elements=', '.join(sorted(errors))))
+        self.errors = errors
+
+
+class ConversionCancelled(RuntimeError):
+    """
+    Raised by a conversion stopped by FontConverter.cancel, images rendered before cancellation being kept
+    """
+
+
+class TrimStage(object):
+    """
+    Pipeline stage removing excess transparent border
+    """
+
+    def apply(self, image):
+        """
+        Apply stage on in-memory image
+
+        :param image: RGBA image or alpha mask
+        :type image: PIL.Image.Image
+
+        :rtype: PIL.Image.Image
+        """
+        bbox = image.split()[-1].getbbox()
+        return image.crop(bbox) if bbox else image
+
+    def magick_args(self):
+        """
+        Get ImageMagick operators equivalent to this stage
+
+        :rtype: list
+        """
+        return [u'-trim', u'+repage']
+
+
+class ResizeStage(object):
+    """
+    Pipeline stage resizing image to given height (or width) keeping aspect ratio
+    """
+
+    def __init__(self, size, width=False):
+        super(ResizeStage, self).__init__()
+
+        self._size = int(size)
+        self._width = width
+
+    @property
+    def size(self):
+        return self._size
+
+    @property
+    def width(self):
+        return self._width
+
+    def apply(self, image):
+        """
+        :see: TrimStage.apply
+        """
+        image_width, image_height = image.size
+        if self._width:
+            new_size = (self._size, max(1, int(round(image_height * self._size / float(image_width)))))
+        else:
+            new_size = (max(1, int(round(image_width * self._size / float(image_height)))), self._size)
+
+        # same as ImageMagick '-unsharp 0x1' then '-geometry'
+        image = image.filter(ImageFilter.UnsharpMask(radius=1, percent=100, threshold=0))
+        return image.resize(new_size, Image.LANCZOS)
+
+    def magick_args(self):
+        """
+        :see: TrimStage.magick_args
+        """
+        # default resize by height
+        resize = u'x{size}'.format(size=self._size)
+        if self._width:
+            resize = u'{size}x'.format(size=self._size)
+        return [u'-unsharp', u'0x1', u'-geometry', resize]
+
+
+class AlignStage(object):
+    """
+    Pipeline stage centering image on a transparent canvas whose dimensions are multiples of given number, for
+    images downscaled from it to keep exact ratios (eg: @2x image being twice as large as @1x one)
+    """
+
+    def __init__(self, multiple):
+        super(AlignStage, self).__init__()
+
+        self._multiple = int(multiple)
+
+    def apply(self, image):
+        """
+        :see: TrimStage.apply
+        """
+        new_size = tuple(-(-length // self._multiple) * self._multiple for length in image.size)
+        if new_size == image.size:
+            return image
+        aligned = Image.new(image.mode, new_size, 0)
+        aligned.paste(image, ((new_size[0] - image.size[0]) // 2, (new_size[1] - image.size[1]) // 2))
+        return aligned
+
+    def magick_args(self):
+        """
+        :see: TrimStage.magick_args
+        """
+        return []  # canvas size would depend on image size: not aligned with ImageMagick
+
+
+class ScaleStage(object):
+    """
+    Pipeline stage downscaling image by given factor, to derive lower resolutions from a high resolution render
+    """
+
+    def __init__(self, factor):
+        super(ScaleStage, self).__init__()
+
+        self._factor = float(factor)
+
+    @property
+    def factor(self):
+        return self._factor
+
+    def apply(self, image):
+        """
+        :see: TrimStage.apply
+        """
+        new_size = tuple(max(1, int(round(length * self._factor))) for length in image.size)
+        return image.resize(new_size, Image.LANCZOS)  # filter support grows with factor: no aliasing
+
+    def magick_args(self):
+        """
+        :see: TrimStage.magick_args
+        """
+        return [u'-filter', u'Lanczos', u'-resize', u'{:g}%'.format(self._factor * 100)]
+
+
+def build_pipeline(trim=False, size=DEFAULT_SIZE, width=False):
+    """
+    Build stages applied on each rendered glyph before it is written
+
+    :param trim: Whether remove transparent border or not
+    :type trim: bool
+
+    :param size: Size in pixel of final image, no resize when default one
+    :type size: int
+
+    :param width: Whether use width as reference for resize or not
+    :type width: bool
+
+    :rtype: list
+    """
+    stages = []
+    if trim:
+        stages.append(TrimStage())
+    if int(size) != DEFAULT_SIZE:
+        stages.append(ResizeStage(size, width))
+    return stages
+
+
+def build_scaled_pipelines(trim=False, size=DEFAULT_SIZE, width=False, scales=(1,)):
+    """
+    Build stages of each scale, glyph being rendered once at highest scale: stages of highest scale (trim and resize
+    to size times scale, then alignment of dimensions on scale) are shared by all scales, lower ones being then
+    downscaled from it
+
+    :param scales: Scales of images (eg: 1, 2 and 3 for @1x, @2x and @3x images)
+    :type scales: list of int
+
+    :see: build_pipeline for other options
+
+    :return: Stages of each scale
+    :rtype: dict
+    """
+    max_scale = max(scales)
+    stages = []
+    if trim:
+        stages.append(TrimStage())
+    if int(size) != DEFAULT_SIZE:
+        stages.append(ResizeStage(int(size) * max_scale, width))
+    if max_scale > 1 and stages:
+        stages.append(AlignStage(max_scale))
+    return dict((scale, tuple(stages) if scale == max_scale else
+                 tuple(stages) + (ScaleStage(float(scale) / max_scale),)) for scale in scales)
+
+
+class ImageMagickBackend(object):
+    """
+    Rendering backend running one ImageMagick process per glyph, rendering all its images.
+    Commands are executed without shell, ImageMagick being located once (see find_imagemagick).
+    """
+    name = 'imagemagick'
+
+    def __init__(self, ttf_file_path, execute_binary_command, encoder=None):
+        """
+        :param execute_binary_command: Runner of argument vectors
+        :type execute_binary_command: callable
+
+        :raise ImportError if ImageMagick is not installed
+        """
+        super(ImageMagickBackend, self).__init__()
+
+        self._ttf_file_path = ttf_file_path
+        self._execute_binary_command = execute_binary_command
+        self._encoder = encoder if encoder is not None else ImageEncoder()
+        self._commands = find_imagemagick()
+
+    def render_data(self, code_point, size, targets):
+        """
+        Render one glyph centered on transparent square images, then apply stages on them and encode them
+
+        :param code_point: Code point of glyph to render
+        :type code_point: int
+
+        :param size: Size in pixel of rendered square image (before stages)
+        :type size: int
+
+        :param targets: Images to produce from this glyph
+        :type targets: list of RenderTarget
+
+        :return: Each target with its encoded image
+        :rtype: generator of (RenderTarget, bytes)
+        """
+        file_formats = [os.path.splitext(target.name)[1][1:] for target in targets]
+        outputs = [(file_format, self._encoder.magick_args(file_format)) for file_format in file_formats]
+        for target, data in zip(targets, self.__render(code_point, size, targets, outputs)):
+            yield target, data
+
+    def render_images(self, code_point, size, targets):
+        """
+        Render one glyph centered on transparent square images, then apply stages on them, without writing them.
+        Images are read back from convert output, which requires Pillow.
+
+        :see: render_data
+
+        :return: Each target with its RGBA image
+        :rtype: generator of (RenderTarget, PIL.Image.Image)
+        """
+        for target, png_data in zip(targets, self.__render(code_point, size, targets, [(u'png', [])] * len(targets))):
+            yield target, Image.open(io.BytesIO(png_data)).convert('RGBA')
+
+    def __render(self, code_point, size, targets, outputs):
+        """
+        Render targets with a single convert process: caption can't be reused between colors and point sizes, but
+        each target is rendered in its own image sequence of the same command. A single image is read from convert
+        output, many images are written in a temporary folder.
+
+        :param outputs: Format and encoding options of each target
+        :type outputs: list of (str, list)
+
+        :return: Encoded images, in targets order
+        :rtype: list of bytes
+        """
+        command = self._commands['convert'] + [u'-font', self._ttf_file_path, u'-background', u'none',
+                                               u'-gravity', u'center']
+        if len(targets) == 1:
+            file_format, options = outputs[0]
+            return [self._execute_binary_command(command + self.__get_caption_args(code_point, size, targets[0]) +
+                                                 options + [u"{format}:-".format(format=file_format)], output=True)]
+
+        folder = tempfile.mkdtemp(prefix='xwing-font-converter-')
+        try:
+            image_files = []
+            for number, (target, (file_format, options)) in enumerate(zip(targets, outputs)):
+                image_files.append(os.path.join(folder, u"{number}.{format}".format(number=number, format=file_format)))
+                command += [u'('] + self.__get_caption_args(code_point, size, target) + options + \
+                           [u'-write', u"{format}:{path}".format(format=file_format, path=image_files[-1]), u')']
+            self._execute_binary_command(command + [u'null:'])
+
+            images = []
+            for image_file in image_files:
+                with open(image_file, 'rb') as image:
+                    images.append(image.read())
+            return images
+        finally:
+            shutil.rmtree(folder, ignore_errors=True)
+
+    @staticmethod
+    def __get_caption_args(code_point, size, target):
+        """
+        Get convert arguments rendering glyph of given target and applying its stages
+
+        :rtype: list
+        """
+        return [u'-fill', target.color, u'-pointsize', u"{}".format(target.point_size),
+                u'-size', u"{size}x{size}".format(size=size),
+                u'caption:' + escape_text(get_character(code_point))] + \
+            [arg for stage in target.stages for arg in stage.magick_args()]
+
+    def process(self, image_files, stages):
+        """
+        Apply stages on already written images
+
+        :param image_files: Paths of images to update
+        :type image_files: list
+
+        :param stages: Pipeline stages to apply
+        :type stages: list
+
+        :rtype: None
+        """
+        stages_args = [arg for stage in stages for arg in stage.magick_args()]
+        for start in range(0, len(image_files), MAX_FILES_PER_COMMAND):
+            self._execute_binary_command(self._commands['mogrify'] + [u'-strip'] + stages_args +
+                                         list(image_files[start:start + MAX_FILES_PER_COMMAND]))
+
+
+class PillowBackend(object):
+    """
+    In-process rendering backend, TTF is loaded once per worker thread and point size then glyphs are rasterized
+    with FreeType
+    """
+    name = 'pillow'
+
+    def __init__(self, ttf_file_path, cache=None, metrics=None, encoder=None):
+        super(PillowBackend, self).__init__()
+
+        if ImageFont is None:
+            raise ImportError("Pillow is required by '{}' backend".format(self.name))
+
+        self._ttf_file_path = ttf_file_path
+        self._local = threading.local()  # FreeType faces must not be shared between threads
+        self._cache = cache
+        self._font_hash = get_file_hash(ttf_file_path) if cache is not None else None
+        self._metrics = metrics if metrics is not None else Metrics()
+        self._encoder = encoder if encoder is not None else ImageEncoder(metrics=self._metrics)
+
+    def get_font(self, point_size):
+        """
+        Get loaded font for given point size (loaded only on first call of current thread)
+
+        :param point_size: Size of font
+        :type point_size: int
+
+        :rtype: PIL.ImageFont.FreeTypeFont
+        """
+        fonts = self._local.__dict__.setdefault('fonts', {})
+        point_size = int(point_size)
+        if point_size not in fonts:
+            fonts[point_size] = ImageFont.truetype(self._ttf_file_path, point_size)
+        return fonts[point_size]
+
+    def render_data(self, code_point, size, targets):
+        """
+        Render one glyph centered on transparent square images, then apply stages on them and encode them.
+        Encoding is done by the calling worker, alongside rendering of other elements by other workers.
+
+        :see: ImageMagickBackend.render_data
+        """
+        for target, image in self.render_images(code_point, size, targets):
+            with self._metrics.timer('encode'):
+                data = self._encoder.encode(image, os.path.splitext(target.name)[1][1:])
+            yield target, data
+
+    def render_images(self, code_point, size, targets):
+        """
+        Render one glyph centered on transparent square images, then apply stages on them, without writing them.
+
+        Glyph is rasterized once per point size as an alpha mask, stages are applied once per point size and
+        stages chain (or chain prefix) on that mask, which is only then tinted for each color. Effects are painted
+        from final mask, their layers drawn behind glyph being shared by all colors, and image is trimmed again to fit
+        them (except images aligned for scales).
+
+        :see: ImageMagickBackend.render_images
+        """
+        character = get_character(code_point)
+        masks = {}
+        backgrounds = {}
+        for target in targets:
+            mask_key = (target.point_size, target.stages)
+            if mask_key not in masks:
+                raw_key = (target.point_size, ())
+                if raw_key not in masks:
+                    masks[raw_key] = self.render_mask(character, target.point_size, size)
+                with self._metrics.timer('stages'):
+                    # chains starting with same stages (eg: trim and resize shared by scales) apply them once
+                    for index in range(len(target.stages)):
+                        stages = target.stages[:index + 1]
+                        if (target.point_size, stages) not in masks:
+                            masks[(target.point_size, stages)] = \
+                                target.stages[index].apply(masks[(target.point_size, stages[:-1])])
+
+            with self._metrics.timer('tint'):
+                if target.effects:
+                    background_key = (mask_key, target.effects)
+                    if background_key not in backgrounds:
+                        backgrounds[background_key] = get_background(masks[mask_key], target.effects)
+                    image = paint(masks[mask_key], target.color, target.effects, backgrounds[background_key])
+                    if any(isinstance(stage, TrimStage) for stage in target.stages) \
+                            and not any(isinstance(stage, AlignStage) for stage in target.stages):
+                        image = TrimStage().apply(image)  # aligned images keep exact ratios between scales
+                else:
+                    image = paint(masks[mask_key], target.color)
+            yield target, image
+
+    def process(self, image_files, stages):
+        """
+        Apply stages on already written images
+
+        :see: ImageMagickBackend.process
+        """
+        for image_file in image_files:
+            with Image.open(image_file) as source:  # closed before image file is overwritten
+                image = source.convert('RGBA')
+            for stage in stages:
+                image = stage.apply(image)
+            self._encoder.save(image, image_file, os.path.splitext(image_file)[1][1:])
+
+    def render_mask(self, character, point_size, size):
+        """
+        Rasterize character as an alpha mask, centered like ImageMagick 'caption' with center gravity.
+        Mask is taken from glyph cache if any.
+
+        :param character: Character to render
+        :type character: unicode
+
+        :param point_size: Size of font
+        :type point_size: int
+
+        :param size: Size in pixel of generated square mask
+        :type size: int
+
+        :rtype: PIL.Image.Image
+        """
+        if self._cache is not None:
+            cache_key = self._cache.get_key(self._font_hash, ord(character), point_size, size)
+            mask = self._cache.get(cache_key)
+            if mask is not None:
+                self._metrics.count('cache_hits')
+                return mask
+            self._metrics.count('cache_misses')
+
+        with self._metrics.timer('rasterize'):
+            font = self.get_font(point_size)
+            ascent, descent = font.getmetrics()
+            width = _get_text_width(font, character)
+
+            mask = Image.new('L', (size, size), 0)
+            ImageDraw.Draw(mask).text(((size - width) // 2, (size - ascent - descent) // 2), character,
+                                      font=font, fill=255)
+
+        if self._cache is not None:
+            self._cache.put(cache_key, mask)
+        return mask
+
+
 class FontConverter(object):
     """
     Class implementing main conversion mechanism
     """
 
-    def __init__(self, map_file_path, ttf_file_path, output_folder):
+    def __init__(self, map_file_path, ttf_file_path, output_folder=None, backend=DEFAULT_BACKEND, cache_dir=None,
+                 metrics=None, scheduler=None, compression=DEFAULT_COMPRESSION, max_in_flight=None):
+        """
+        :param output_folder: Folder where images are written, only required to write them (see iter_images)
+        :type output_folder: str
+
+        :param backend: Rendering backend (in AVAILABLE_BACKENDS)
+        :type backend: str
+
+        :param cache_dir: Folder of glyphs cache shared between conversions (eg: DEFAULT_CACHE_DIR), None to disable it.
+                          Only used by pillow backend.
+        :type cache_dir: str
+
+        :param metrics: Collector of conversion timers and counters, a new one by default (see metrics property)
+        :type metrics: Metrics
+
+        :param scheduler: Scheduler shared with other converters (eg: of a batch), which overrides jobs option of
+                          conversions. A new one is used by each conversion by default.
+        :type scheduler: JobScheduler
+
+        :param compression: Compression level of raster images (in COMPRESSION_LEVELS)
+        :type compression: str
+
+        :param max_in_flight: Maximum number of elements rendered ahead of written ones, bounding memory of
+                              conversions whatever the number of elements is (default: 2 per job, see JobScheduler)
+        :type max_in_flight: int
+
+        :raise AttributeError in case of unknown compression level
+        """
         super(FontConverter, self).__init__()
 
         self._map_file_path = map_file_path
         self._ttf_file_path = ttf_file_path
         self._output_folder = output_folder
+        self._backend_name = backend
+        self._cache_dir = cache_dir
 
+        self._backend = None
+        self._svg_renderer = None
         self._element_map = {}
+        self._output_files = []
+        self._metrics = metrics if metrics is not None else Metrics()
+        self._encoder = ImageEncoder(compression, metrics=self._metrics)
+        self._scheduler = scheduler
+        self._max_in_flight = max_in_flight
+        self._coverage = None
+        self._missing_elements = {}
+        self._cancelled = threading.Event()
         self._log = get_logger()
 
     def init_font_converter(self):
         """
-        Check if given files are correct and create output folder if necessary
+        Check if given files are correct and create output folder if necessary (and given)
 
         :return: Whether initialisation was ok or not
         :rtype: bool
         """
         init_ok = True
 
-        init_ok = init_ok and self.__check_file_integrity(self._map_file_path, 'json')
+        init_ok = init_ok and self.__check_file_integrity(self._map_file_path, MAP_FORMATS)
         init_ok = init_ok and self.__check_file_integrity(self._ttf_file_path, 'ttf')
+        init_ok = init_ok and self.__init_backend()
 
-        self._output_folder = os.path.expanduser(os.path.normpath(self._output_folder))
-        if not os.path.exists(self._output_folder):
-            os.makedirs(self._output_folder)
-            time.sleep(0.25)  # to left system sync
+        if self._output_folder is not None:
+            self._output_folder = os.path.expanduser(os.path.normpath(self._output_folder))
+            if not os.path.exists(self._output_folder):
+                os.makedirs(self._output_folder)
+                time.sleep(0.25)  # to left system sync
 
         return init_ok
 
@@ -51,6 +624,81 @@ class FontConverter(object):
     def element_map(self):
         return self._element_map
 
+    @property
+    def missing_elements(self):
+        """
+        Elements of map skipped because font has nothing to render for them, with their code point
+
+        :rtype: dict
+        """
+        return self._missing_elements
+
+    @property
+    def coverage(self):
+        """
+        Code points of font which have a glyph with an outline, read once from font cmap table
+
+        :return: Covered code points, None if fontTools is not installed
+        :rtype: frozenset
+        """
+        if self._coverage is None:
+            try:
+                self._coverage = get_font_coverage(self._ttf_file_path)
+            except ImportError as err:
+                self._log.debug(err)
+        return self._coverage
+
+    @property
+    def backend(self):
+        return self._backend
+
+    @property
+    def output_files(self):
+        return self._output_files
+
+    @property
+    def metrics(self):
+        """
+        Timers (in seconds) and counters of conversions:
+
+        - 'stage.{method}': each call of get_elements_from_map, convert_2_images, convert_2_atlas, convert_2_archive,
+          trim_images and resize_images
+        - 'glyph': rendering of all images of an element (tagged with element name)
+        - 'rasterize', 'stages', 'tint', 'encode': pillow backend steps
+        - values 'encoded_bytes': size of each encoded raster image (tagged with format)
+        - 'subprocess': ImageMagick commands
+        - 'write': writing of an image on disk
+        - counters 'images_written', 'bytes_written', 'images_up_to_date', 'errors', 'cache_hits', 'cache_misses'
+
+        :rtype: Metrics
+        """
+        return self._metrics
+
+    def __init_backend(self):
+        """
+        Create rendering backend according given name
+
+        :return: whether backend is available or not
+        :rtype: bool
+        """
+        if self._backend_name not in AVAILABLE_BACKENDS:
+            self._log.error("Backend should be in {backends} (got: {backend})"
+                            .format(backends=','.join(AVAILABLE_BACKENDS), backend=self._backend_name))
+            return False
+
+        try:
+            if self._backend_name == 'pillow':
+                cache = GlyphCache(self._cache_dir) if self._cache_dir else None
+                self._backend = PillowBackend(self._ttf_file_path, cache=cache, metrics=self._metrics,
+                                              encoder=self._encoder)
+            else:
+                self._backend = ImageMagickBackend(self._ttf_file_path, self.execute_binary_command,
+                                                   encoder=self._encoder)
+        except ImportError as err:
+            self._log.error(err)
+            return False
+        return True
+
     def __check_file_integrity(self, file_path, exp_file_format):
         """
         Check if given file is valid or not
@@ -58,136 +706,707 @@ class FontConverter(object):
         :param file_path: Path to file to check
         :type file_path: str
 
-        :param exp_file_format: Expected file format (usually scss and tff)
-        :type exp_file_format: str
+        :param exp_file_format: Expected file format(s) (usually scss, json and tff)
+        :type exp_file_format: str or list
 
         :return: whether given file is valid or not
         :rtype: bool
         """
-        status = os.path.exists(file_path) and exp_file_format in os.path.splitext(file_path)[1]
+        exp_file_formats = as_list(exp_file_format)
+        status = os.path.exists(file_path) and os.path.splitext(file_path)[1][1:].lower() in exp_file_formats
         if not status:
-            self._log.error("Given '{}' file ({}) does not exist or invalid !".format(exp_file_format, file_path))
+            self._log.error("Given '{}' file ({}) does not exist or invalid !".format('/'.join(exp_file_formats),
+                                                                                     file_path))
         return status
 
-    def get_elements_from_map(self):
+    @timed('stage.get_elements_from_map')
+    def get_elements_from_map(self, use_index=True, check_coverage=True):
         """
-        Use regular expression on map file to extract elements names and key codes
+        Load elements names and code points of all sections of map file (.json or .scss)
+
+        Elements which have no glyph with an outline in font are skipped (see missing_elements), instead of being
+        rendered as blank images.
+
+        :param use_index: Whether use binary index stored next to map to skip parsing unchanged maps
+        :type use_index: bool
+
+        :param check_coverage: Whether check elements against font coverage (requires fontTools)
+        :type check_coverage: bool
+
+        :raise ValueError if map can not be parsed
 
         :return: None
         """
-        # open it
-        with open(self._map_file_path, 'r') as map_file:
-            json_data = map_file.read()
+        self._element_map = load_map(self._map_file_path, use_index=use_index)
+        self._missing_elements = {}
 
-        data = json.loads(json_data)
-        # get elements from first element in the loaded dict
-        elements = data.get(list(data.keys()).pop(0))
+        coverage = self.coverage if check_coverage else None
+        if coverage is not None:
+            for element, code_point in sorted(self._element_map.items()):
+                if code_point not in coverage:
+                    self._missing_elements[element] = self._element_map.pop(element)
+            if self._missing_elements:
+                self._log.warning(u"{count} element(s) skipped, font has no glyph for them: {elements}"
+                                  .format(count=len(self._missing_elements),
+                                          elements=u', '.join(u"{} (U+{:04X})".format(element, code_point)
+                                                              for element, code_point in
+                                                              sorted(self._missing_elements.items()))))
 
-        for match in elements:
-            element_name = match
-            element_code = elements.get(match, '')
+    def cancel(self):
+        """
+        Stop running conversion (from another thread, eg: a GUI): elements not started yet are skipped, elements
+        being rendered are still written, then conversion raises ConversionCancelled. A conversion started after a
+        cancel is cancelled too, until reset_cancel is called.
 
-            # because icons are in css code (eg: \011E mean Ğ)
-            if element_code.startswith('\\'):
-                # replace \ by \u to convert to unicode str
-                element_code = element_code.replace('\\', '\\u').decode('unicode-escape')
+        :rtype: None
+        """
+        self._cancelled.set()
 
-            # for better quote enclosing insert quoting here
-            if element_code == "'":
-                # if element code is the single-quote, surround with double-quotes instead
-                element_code = "\"" + element_code + "\""
-            else:
-                element_code = "'" + element_code + "'"
+    def reset_cancel(self):
+        """
+        Forget cancel of a previous conversion, to reuse converter. To be called where next conversion is started,
+        before it runs (not from conversion thread, which would lose a cancel made meanwhile).
 
-            self._element_map[element_name] = element_code
+        :rtype: None
+        """
+        self._cancelled.clear()
 
-    def convert_2_images(self, color='black', point_size=50, file_format='gif'):
+    @property
+    def cancelled(self):
         """
-        Convert all elements in map into images according given options
+        :return: Whether running (or last) conversion has been cancelled
+        :rtype: bool
+        """
+        return self._cancelled.is_set()
 
-        :param file_format: Image file format (in 'gif', 'png')
+    @timed('stage.convert_2_images')
+    def convert_2_images(self, color='black', point_size=50, file_format='gif', trim=False, size=DEFAULT_SIZE,
+                         width=False, jobs=DEFAULT_JOBS, force=False, prune=False, progress=None, effects=None,
+                         scales=None, elements=None):
+        """
+        Convert all elements in map into images according given options, elements are converted in parallel.
+        Trim and resize are done on each rendered element before it is written (once).
+
+        Color, point size and size can be lists to produce every combination of them in one run, each element being
+        rendered only once per point size. Point size and size are then appended to image names when many of them
+        are given.
+
+        Inputs of written images are recorded in a manifest of output folder, images already rendered from same
+        inputs (font content, code point and options) are skipped on next conversions.
+
+        :param file_format: Image file format (in AVAILABLE_FILE_FORMATS). svg images are made from glyphs outlines
+                            (requires fontTools), trimmed to the glyph and sized by size option whatever point size is.
         :type file_format: str
 
-        :param color: Color to use
-        :type color: str
+        :param color: Color(s) to use: names of AVAILABLE_COLORS, hex ('#rrggbb', '#rrggbbaa') or rgb()/rgba() colors
+        :type color: str or list
 
-        :param point_size: Size of font (default 50)
-        :type point_size: int
+        :param point_size: Size(s) of font (default 50)
+        :type point_size: int or list
+
+        :param trim: Whether remove transparent border or not
+        :type trim: bool
+
+        :param size: Size(s) in pixel of images, no resize when default one (default 72)
+        :type size: int or list
+
+        :param width: Whether use width as reference for resize or not
+        :type width: bool
+
+        :param jobs: Number of elements converted simultaneously (default CPU count)
+        :type jobs: int
+
+        :param force: Whether render all images even up to date ones or not
+        :type force: bool
+
+        :param prune: Whether remove images of previous conversions which are not part of this one or not
+        :type prune: bool
+
+        :param progress: Called once all images of an element are written (or skipped) with number of elements done,
+                         total number of elements and element name, from the thread running conversion
+        :type progress: callable
+
+        :param effects: Effects painted in given order after stages, as 'stroke:COLOR:WIDTH',
+                        'shadow:COLOR:X_OFFSET:Y_OFFSET:BLUR', 'glow:COLOR:RADIUS' or 'gradient:TOP_COLOR:BOTTOM_COLOR'
+                        (pillow backend only), images growing by effects margin
+        :type effects: list
+
+        :param scales: Scales of images (eg: [1, 2, 3]), '@2x' being appended to names of scales other than 1. Glyphs
+                       are rendered once at highest scale (point size and size times scale), lower scales being
+                       downscaled from it.
+        :type scales: list of int
+
+        :param elements: Names of elements to convert (eg: elements changed in a new font), all elements by default.
+                         Can not be combined with prune, images of other elements not being part of conversion.
+        :type elements: list
+
+        :raise AttributeError in case of wrong color, format, effect, scale or element, or without output folder
+        :raise ConversionError once all elements are processed if error occurs during conversion of some of them
+        :raise ConversionCancelled if conversion has been cancelled
+
+        :rtype: None
+        """
+        if self._output_folder is None:
+            raise AttributeError("Output folder is required to write images")
+        if prune and elements is not None:
+            raise AttributeError("Images can not be pruned when converting some elements only")
+
+        self._output_files = []
+        manifest = Manifest(self._output_folder)
+        manifest.load()
+        ttf_hash = get_file_hash(self._ttf_file_path)
+        planned_files = []  # all images of this conversion, even up to date ones
+        up_to_date_files = []
+
+        def get_entry(element, options):
+            return dict(options, ttf=ttf_hash, code_point=self._element_map[element], format=file_format, trim=trim,
+                        width=width, backend=self.__get_renderer(file_format).name,
+                        compression=self._encoder.compression)
+
+        def select_outdated(element, targets):
+            outdated = []
+            for target, options in targets:
+                output_file = os.path.join(self._output_folder, target.name)
+                planned_files.append(output_file)
+                if force or not manifest.is_up_to_date(output_file, get_entry(element, options)):
+                    outdated.append((target, options))
+                else:
+                    up_to_date_files.append(output_file)
+                    self._metrics.count('images_up_to_date')
+            return outdated
+
+        conversion_error = None
+        try:
+            for element, target, options, data in self.__iter_rendered(color, point_size, file_format, trim, size,
+                                                                       width, jobs, select=select_outdated,
+                                                                       progress=progress, effects=effects,
+                                                                       scales=scales, elements=elements):
+                output_file = os.path.join(self._output_folder, target.name)
+                with self._metrics.timer('write'):
+                    with open(output_file, 'wb') as image_file:
+                        image_file.write(data)
+                self._log.debug(u"{file}: {size} bytes".format(file=target.name, size=len(data)))
+                self._metrics.count('images_written')
+                self._metrics.count('bytes_written', len(data))
+                manifest.update(output_file, get_entry(element, options))
+                self._output_files.append(output_file)
+        except ConversionError as err:
+            conversion_error = err
+        finally:
+            manifest.save()  # keep track of written images, even on interruption
+
+        if prune:
+            removed = manifest.prune(planned_files)
+            manifest.save()
+            self._log.info("{} stale image(s) removed".format(len(removed)))
+
+        self._log.info("{written} image(s) written ({size} bytes), {skipped} up to date"
+                       .format(written=len(self._output_files), skipped=len(up_to_date_files),
+                               size=sum(os.path.getsize(output_file) for output_file in self._output_files)))
+
+        if conversion_error is not None:
+            raise conversion_error
+
+    def iter_images(self, color='black', point_size=50, file_format='gif', trim=False, size=DEFAULT_SIZE,
+                    width=False, jobs=DEFAULT_JOBS, progress=None, effects=None, scales=None, elements=None):
+        """
+        Render all elements in map according given options, yielding encoded images as soon as they are rendered,
+        without writing anything on disk (eg: to stream them into an archive or an HTTP response).
+
+        :see: convert_2_images for conversion options
+
+        :raise AttributeError in case of wrong color, format, effect, scale or element
+        :raise ConversionError once all elements are processed if error occurs during conversion of some of them
+        :raise ConversionCancelled if conversion has been cancelled
+
+        :return: Image names (as written by convert_2_images) with their encoded content, in elements order
+        :rtype: generator of (str, bytes)
+        """
+        rendered = self.__iter_rendered(color, point_size, file_format, trim, size, width, jobs, progress=progress,
+                                        effects=effects, scales=scales, elements=elements)
+        return ((target.name, data) for _, target, _, data in rendered)
+
+    @timed('stage.convert_2_archive')
+    def convert_2_archive(self, archive_path, color='black', point_size=50, file_format='gif', trim=False,
+                          size=DEFAULT_SIZE, width=False, jobs=DEFAULT_JOBS, progress=None, effects=None,
+                          scales=None, elements=None):
+        """
+        Convert all elements in map into images streamed into a zip or tar archive (according to its extension),
+        images never being written as files. Output folder is not used.
+
+        :see: convert_2_images for conversion options
+
+        :param archive_path: Path of archive (.zip, .tar, .tar.gz, .tgz or .tar.bz2)
+        :type archive_path: str
+
+        :raise AttributeError in case of wrong color, format, effect, scale, element or archive extension
+        :raise ConversionError once all elements are processed if error occurs during conversion of some of them,
+                               archive then holding images of other elements
+        :raise ConversionCancelled if conversion has been cancelled
+
+        :rtype: None
+        """
+        # options are checked before archive file is created
+        images = self.iter_images(color=color, point_size=point_size, file_format=file_format, trim=trim, size=size,
+                                  width=width, jobs=jobs, progress=progress, effects=effects, scales=scales,
+                                  elements=elements)
+        with ArchiveWriter(archive_path) as archive:
+            for name, data in images:
+                with self._metrics.timer('write'):
+                    archive.add(name, data)
+                self._metrics.count('images_written')
+                self._metrics.count('bytes_written', len(data))
+
+            self._log.info("{count} image(s) written in {archive}".format(count=archive.count, archive=archive_path))
+
+    def render_image(self, element, color='black', point_size=50, file_format='gif', trim=False, size=DEFAULT_SIZE,
+                     width=False, effects=None):
+        """
+        Render one element of map into an encoded image (eg: to serve it on demand)
+
+        :see: convert_2_images for conversion options (only single values here)
+
+        :param element: Element name
+        :type element: str
+
+        :raise KeyError if element is not in map
+        :raise AttributeError in case of wrong color, format or effect
+
+        :rtype: bytes
+        """
+        self.__check_options([color], file_format)
+        target = RenderTarget(color=color,
+                              point_size=point_size,
+                              stages=tuple(build_pipeline(trim, size, width)),
+                              name=get_output_name(element, color, file_format),
+                              effects=self.__parse_effects(effects, file_format))
+        for _, data in self.__get_renderer(file_format).render_data(code_point=self._element_map[element],
+                                                                    size=DEFAULT_SIZE, targets=[target]):
+            return data
+
+    def __iter_rendered(self, color, point_size, file_format, trim, size, width, jobs, select=None, progress=None,
+                        effects=None, scales=None, elements=None):
+        """
+        Render elements in parallel, yielding their encoded images in elements order. Options are checked when
+        called, before iteration starts.
+
+        :see: convert_2_images for conversion options
+
+        :param select: Filter of images to render for an element, all by default
+        :type select: callable taking element and its list of (RenderTarget, options) and returning selected ones
+
+        :param progress: Called after images of each element are consumed (see convert_2_images)
+        :type progress: callable
+
+        :raise AttributeError in case of wrong color, format, effect, scale or element
+        :raise ConversionError once all elements are processed if error occurs during conversion of some of them
+        :raise ConversionCancelled if conversion has been cancelled
+
+        :return: Element, render target, its options (color, point size, size, effects and scale) and encoded image
+        :rtype: generator of (str, RenderTarget, dict, bytes)
+        """
+        colors, point_sizes, sizes = as_list(color), as_list(point_size), as_list(size)
+        self.__check_options(colors, file_format)
+        effects = self.__parse_effects(effects, file_format)
+        scales = self.__check_scales(scales, file_format)
+        elements = self.__check_elements(elements)
+
+        # same stages instances for a given size and scale, to let backend share work between colors
+        pipelines = self.__get_pipelines(trim, sizes, width, scales)
+        render_size = DEFAULT_SIZE * max(scales or [1])
+        renderer = self.__get_renderer(file_format)
+
+        def render_element(element):
+            if self._cancelled.is_set():
+                return None  # pending elements are dropped by workers
+
+            targets = self.__get_targets(element, colors, point_sizes, sizes, pipelines, file_format, effects, scales)
+            if select is not None:
+                targets = select(element, targets)
+            if not targets:
+                self._log.debug(u"'{element}' images are up to date".format(element=element))
+                return []
+
+            self._log.info(u"Processing '{element}' (code point: U+{code_point:04X}) ...".
+                           format(element=element, code_point=self._element_map[element]))
+
+            options = dict(targets)
+            with self._metrics.timer('glyph', element=element):
+                return [(element, target, options[target], data) for target, data in
+                        renderer.render_data(code_point=self._element_map[element], size=render_size,
+                                             targets=[target for target, _ in targets])]
+
+        def iter_rendered():
+            # if ok convert TTF to images
+            errors = {}
+            done = 0
+            for result in self.__get_scheduler(jobs).run(render_element, elements):
+                if result.error is not None:
+                    self._log.error(u"Unable to convert '{element}': {error}".format(element=result.job,
+                                                                                     error=result.error))
+                    self._metrics.count('errors', element=result.job)
+                    errors[result.job] = result.error
+                elif result.value is None:
+                    continue
+                else:
+                    for rendered in result.value:
+                        yield rendered
+
+                done += 1
+                if progress is not None:
+                    progress(done, len(elements), result.job)
+
+            if self._cancelled.is_set():
+                raise ConversionCancelled("Conversion cancelled after {done}/{count} element(s)"
+                                          .format(done=done, count=len(elements)))
+            if errors:
+                raise ConversionError(errors)
+
+        return iter_rendered()
+
+    @timed('stage.convert_2_atlas')
+    def convert_2_atlas(self, color='black', point_size=50, file_format='png', trim=True, size=DEFAULT_SIZE,
+                        width=False, jobs=DEFAULT_JOBS, name=DEFAULT_ATLAS_NAME, atlas_size=DEFAULT_ATLAS_SIZE,
+                        effects=None):
+        """
+        Convert all elements in map into images packed in as few atlases (sprite sheets) as possible instead of one
+        file per image. Atlases are written as {name}-{number}.{format} along with {name}.json index of images
+        coordinates and {name}.css style sheet with one class per image.
+
+        Images are named as in convert_2_images (without extension), and trimmed by default to be packed tightly.
+
+        :see: convert_2_images for conversion options
+
+        :param name: Base name of atlas files
+        :type name: str
+
+        :param atlas_size: Maximum width and height of an atlas
+        :type atlas_size: int
+
+        :raise AttributeError in case of wrong color, format or effect, or without output folder
+        :raise ValueError if an image is bigger than atlas size
+        :raise ConversionError once all elements are processed if error occurs during conversion of some of them
+
+        :return: Index of images coordinates
+        :rtype: dict
+        """
+        if self._output_folder is None:
+            raise AttributeError("Output folder is required to write images")
+
+        colors, point_sizes, sizes = as_list(color), as_list(point_size), as_list(size)
+        self.__check_options(colors, file_format)
+        if file_format in VECTOR_FILE_FORMATS:
+            raise AttributeError("Atlases can not be made of {} images".format(file_format))
+        effects = self.__parse_effects(effects, file_format)
+
+        pipelines = self.__get_pipelines(trim, sizes, width)
+        self._output_files = []
+
+        def render_element(element):
+            self._log.info(u"Processing '{element}' (code point: U+{code_point:04X}) ...".
+                           format(element=element, code_point=self._element_map[element]))
+
+            targets = [target for target, _ in
+                       self.__get_targets(element, colors, point_sizes, sizes, pipelines, file_format, effects)]
+            with self._metrics.timer('glyph', element=element):
+                return [(os.path.splitext(target.name)[0], image) for target, image in
+                        self._backend.render_images(code_point=self._element_map[element], size=DEFAULT_SIZE,
+                                                    targets=targets)]
+
+        images = []
+        errors = {}
+        for result in self.__get_scheduler(jobs).run(render_element, sorted(self._element_map)):
+            if result.error is not None:
+                self._log.error(u"Unable to convert '{element}': {error}".format(element=result.job,
+                                                                                 error=result.error))
+                self._metrics.count('errors', element=result.job)
+                errors[result.job] = result.error
+            else:
+                images.extend(result.value)
+
+        atlases_files = []
+        for number, (atlas, coordinates) in enumerate(pack_atlases(images, atlas_size)):
+            atlas_file = u"{name}-{number}.{format}".format(name=name, number=number, format=file_format)
+            self._log.info(u"Writing {count} images in {atlas} ({width}x{height})"
+                           .format(count=len(coordinates), atlas=atlas_file, width=atlas.size[0],
+                                   height=atlas.size[1]))
+            with self._metrics.timer('write'):
+                self._encoder.save(atlas, os.path.join(self._output_folder, atlas_file), file_format)
+            self._metrics.count('images_written')
+            self._metrics.count('bytes_written', os.path.getsize(os.path.join(self._output_folder, atlas_file)))
+            atlases_files.append((atlas_file, coordinates))
+            self._output_files.append(os.path.join(self._output_folder, atlas_file))
+
+        index = get_index(atlases_files)
+        index_file = os.path.join(self._output_folder, u"{name}.json".format(name=name))
+        with open(index_file, 'w') as index_json:
+            json.dump(index, index_json, indent=1, sort_keys=True)
+
+        css_file = os.path.join(self._output_folder, u"{name}.css".format(name=name))
+        with io.open(css_file, 'w', encoding='utf-8') as css:
+            css.write(get_css(index))
+
+        if errors:
+            raise ConversionError(errors)
+        return index
+
+    def __get_scheduler(self, jobs):
+        """
+        :return: Shared scheduler if any, else a new one with given number of workers
+        :rtype: JobScheduler
+        """
+        if self._scheduler is not None:
+            return self._scheduler
+        return JobScheduler(jobs, max_in_flight=self._max_in_flight)
+
+    def __check_options(self, colors, file_format):
+        """
+        Check conversion options
 
         :raise AttributeError in case of wrong color or format
-        :raise subprocess.CalledProcessError is error occurs during conversion
 
         :rtype: None
         """
-        if color not in AVAILABLE_COLORS:
-            raise AttributeError("Color should be in {colors} (got: {color})".format(colors=','.join(AVAILABLE_COLORS),
-                                                                                     color=color))
+        for color in colors:
+            if not is_valid_color(color):
+                raise AttributeError("Color should be in {colors}, or a hex or rgb()/rgba() color (got: {color})"
+                                     .format(colors=','.join(AVAILABLE_COLORS), color=color))
 
         if file_format not in AVAILABLE_FILE_FORMATS:
             raise AttributeError("File format should be in {formats} (got: {format})"
                                  .format(formats=','.join(AVAILABLE_FILE_FORMATS), format=file_format))
+        if self._backend_name == 'pillow' and file_format not in VECTOR_FILE_FORMATS \
+                and not is_format_available(file_format):
+            raise AttributeError("Pillow is built without {} support".format(file_format))
 
-        # if ok convert TTF to images
-        for element in sorted(self._element_map):
-            self._log.info(u"Processing '{element}' (keycode: {keycode}) ...".
-                           format(element=element, keycode=self._element_map[element]))
+    def __parse_effects(self, effects, file_format):
+        """
+        Parse effects specifications, effects being painted by pillow backend only
 
-            output_file = os.path.join(self._output_folder, "{element}-{color}.{format}"
-                                       .format(element=element, color=color, format=file_format))
-            # todo: make it optional
-            # output_file = os.path.join(self._output_folder, "{element}.{format}"
-            #                            .format(element=element, format=file_format))
-            convert_cmd = u"convert -font {ttf_file} -background none -fill {color} -gravity center " \
-                          u"-pointsize {pointsize} -size {size}x{size} caption:{keycode} {output}". \
-                format(ttf_file=self._ttf_file_path,
-                       color=color,
-                       pointsize=point_size,
-                       size=72,
-                       keycode=self._element_map[element],
-                       output=output_file)
+        :raise AttributeError in case of wrong effect, or if effects are not available
 
-            self.execute_binary_command(convert_cmd)
+        :return: Effects, shared by all render targets of a conversion
+        :rtype: tuple
+        """
+        if not effects:
+            return ()
+        if self._backend_name != 'pillow' or file_format in VECTOR_FILE_FORMATS:
+            raise AttributeError("Effects are only available for raster images of pillow backend")
+        try:
+            return tuple(parse_effect(effect) for effect in as_list(effects))
+        except ValueError as err:
+            raise AttributeError(err)
 
-    def trim_images(self):
+    def __check_elements(self, elements):
         """
-        Trim images in output folder to remove excess transparent border
+        Check elements to convert
+
+        :raise AttributeError if an element is not in map
+
+        :return: Sorted elements names, all elements of map by default
+        :rtype: list
+        """
+        if elements is None:
+            return sorted(self._element_map)
+        unknown = [element for element in elements if element not in self._element_map]
+        if unknown:
+            raise AttributeError(u"Unknown element(s): {}".format(u', '.join(sorted(unknown))))
+        return sorted(set(elements))
+
+    def __check_scales(self, scales, file_format):
+        """
+        Check scales of images
+
+        :raise AttributeError in case of wrong scale, or for vector formats
+
+        :return: Sorted scales, None without scales
+        :rtype: list
+        """
+        if scales is None:
+            return None
+        scales = sorted(set(as_list(scales)))
+        if not scales or any(not isinstance(scale, int) or scale < 1 for scale in scales):
+            raise AttributeError("Scales should be positive integers (got: {})".format(scales))
+        if file_format in VECTOR_FILE_FORMATS:
+            raise AttributeError("Scales are only available for raster images")
+        return scales
+
+    @staticmethod
+    def __get_pipelines(trim, sizes, width, scales=None):
+        """
+        Build stages of each size and scale (None without scales)
+
+        :rtype: dict
+        """
+        if scales is None:
+            return dict(((size, None), tuple(build_pipeline(trim, size, width))) for size in sizes)
+
+        pipelines = {}
+        for size in sizes:
+            for scale, stages in build_scaled_pipelines(trim, size, width, scales).items():
+                pipelines[(size, scale)] = stages
+        return pipelines
+
+    def __get_renderer(self, file_format):
+        """
+        Get renderer of given format: outlines renderer for vector formats (created on first use), backend otherwise
+
+        :raise AttributeError if vector format is not available
+
+        :rtype: SvgRenderer or PillowBackend or ImageMagickBackend
+        """
+        if file_format not in VECTOR_FILE_FORMATS:
+            return self._backend
+
+        if self._svg_renderer is None:
+            try:
+                self._svg_renderer = SvgRenderer(self._ttf_file_path, extra_colors=EXTRA_COLORS)
+            except ImportError as err:
+                raise AttributeError(err)
+        return self._svg_renderer
+
+    def __get_targets(self, element, colors, point_sizes, sizes, pipelines, file_format, effects=(), scales=None):
+        """
+        Get images to render from element, one for each combination of options
+
+        :param pipelines: Stages to apply for each size and scale
+        :type pipelines: dict
+
+        :param effects: Effects painted on every image, scaled with images
+        :type effects: tuple
+
+        :param scales: Scales of images, glyph being rendered at highest one
+        :type scales: list
+
+        :return: Render targets with their options (color, point size, size, effects and scale if any)
+        :rtype: list of (RenderTarget, dict)
+        """
+        max_scale = max(scales or [1])
+        scaled_effects = dict((scale, scale_effects(effects, scale or 1)) for scale in scales or [None])
+        targets = []
+        for point_size in point_sizes:
+            for size in sizes:
+                for scale in scales or [None]:
+                    for color in colors:
+                        # todo: make it optional
+                        # output_file = os.path.join(self._output_folder, "{element}.{format}"
+                        #                            .format(element=element, format=file_format))
+                        output_name = get_output_name(element, color, file_format,
+                                                      point_size=point_size if len(point_sizes) > 1 else None,
+                                                      size=size if len(sizes) > 1 else None,
+                                                      scale=scale)
+                        target = RenderTarget(color=color,
+                                              point_size=point_size * max_scale,
+                                              stages=pipelines[(size, scale)],
+                                              name=output_name,
+                                              effects=scaled_effects[scale])
+                        options = {'color': color, 'point_size': point_size, 'size': size}
+                        if effects:
+                            options['effects'] = [str(effect) for effect in effects]
+                        if scale is not None:
+                            options['scale'] = scale
+                        targets.append((target, options))
+        return targets
+
+    @timed('stage.trim_images')
+    def trim_images(self, jobs=DEFAULT_JOBS):
+        """
+        Trim images written by last conversion to remove excess transparent border
+
+        :note: prefer trim option of convert_2_images which avoids writing images twice
+
+        :param jobs: Number of groups of images processed simultaneously (default CPU count)
+        :type jobs: int
 
         :rtype: None
         """
         self._log.info("Triming images in {}".format(self._output_folder))
-        resize_cmd = "mogrify -trim {folder}{sep}*".format(folder=self._output_folder, sep=os.sep)
-        self.execute_binary_command(resize_cmd)
+        self.__process_images([TrimStage()], jobs)
 
-    def resize_images(self, size, width=False):
+    @timed('stage.resize_images')
+    def resize_images(self, size, width=False, jobs=DEFAULT_JOBS):
         """
-        Resize all image in folder to given size (keep aspect ratio)
+        Resize images written by last conversion to given size (keep aspect ratio)
+
+        :note: prefer size option of convert_2_images which avoids writing images twice
+
         :param size: Size in pixel
         :type size: int
 
         :param width: Whether use width as reference or not
         :type width: bool
 
+        :param jobs: Number of groups of images processed simultaneously (default CPU count)
+        :type jobs: int
+
         :rtype: None
         """
-        # default resize by height
-        resize = 'x{size}'.format(size=size)
-        if width:
-            resize = '{size}x'.format(size=size)
+        self._log.info("Resizing images in {} to {}".format(self._output_folder, size))
+        self.__process_images([ResizeStage(size, width)], jobs)
+
+    def __process_images(self, stages, jobs):
+        """
+        Apply stages on images written by last conversion, split in one group of images per worker (one mogrify
+        command each for ImageMagick backend)
+
+        :param stages: Pipeline stages to apply
+        :type stages: list
 
-        self._log.info("Resizing images in {} to {}".format(self._output_folder, resize))
+        :param jobs: Number of workers
+        :type jobs: int
 
-        resize_cmd = "mogrify -unsharp 0x1 -geometry {resize} {folder}{sep}*".format(resize=resize,
-                                                                                     folder=self._output_folder,
-                                                                                     sep=os.sep)
-        self.execute_binary_command(resize_cmd)
+        :raise first error of backend once all groups are processed
 
-    def execute_binary_command(self, command):
-        self._log.debug(command)
-        args = command.encode(locale.getpreferredencoding())
+        :rtype: None
+        """
+        # vector images are already trimmed and sized
+        raster_files = [output_file for output_file in self._output_files
+                        if os.path.splitext(output_file)[1][1:] not in VECTOR_FILE_FORMATS]
+        scheduler = self.__get_scheduler(jobs)
+        group_size = min(MAX_FILES_PER_COMMAND, max(1, -(-len(raster_files) // scheduler.jobs)))
+        groups = [tuple(raster_files[start:start + group_size]) for start in range(0, len(raster_files), group_size)]
+
+        error = None
+        for result in scheduler.run(lambda group: self._backend.process(list(group), stages), groups):
+            if result.error is not None:
+                self._log.error(u"Unable to process {count} image(s) from {image}: {error}"
+                                .format(count=len(result.job), image=result.job[0], error=result.error))
+                self._metrics.count('errors')
+                error = error or result.error
+
+        # images no longer match inputs recorded in manifest
+        manifest = Manifest(self._output_folder)
+        manifest.load()
+        for output_file in self._output_files:
+            manifest.discard(output_file)
+        manifest.save()
+
+        if error is not None:
+            raise error
+
+    def execute_binary_command(self, command, output=False):
+        """
+        Execute a command directly, without shell
+
+        :param command: Program and its arguments
+        :type command: list
+
+        :param output: Whether return standard output of command or not
+        :type output: bool
+
+        :raise subprocess.CalledProcessError if command fails
+
+        :return: Standard output if requested
+        :rtype: bytes
+        """
+        self._log.debug(u' '.join(quote(arg) for arg in command))
+        encoding = locale.getpreferredencoding()
+        args = [arg if isinstance(arg, (str, bytes)) else arg.encode(encoding) for arg in command]  # python 2 unicode
         try:
-            # p = subprocess.Popen(args, shell=True)
-            # p.communicate()
-            subprocess.check_call(args, shell=True)
+            with self._metrics.timer('subprocess'):
+                if output:
+                    return subprocess.check_output(args)
+                subprocess.check_call(args)
         except subprocess.CalledProcessError as err:
             self._log.error(err)
             raise err
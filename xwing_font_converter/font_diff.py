@@ -0,0 +1,128 @@
+# coding=utf-8
+"""
+Comparison of two versions of a font and its map, glyph by glyph from outlines (not file dates or hashes), to know
+which elements images changed between them
+"""
+import hashlib
+from collections import namedtuple
+
+try:
+    from fontTools.pens.recordingPen import DecomposingRecordingPen
+    from fontTools.ttLib import TTFont
+except ImportError:  # fontTools is optional, only needed to compare fonts
+    DecomposingRecordingPen = TTFont = None
+
+# font wide values changing rendering of every glyph: metrics used to center glyphs and TrueType hinting programs
+GLOBAL_METRICS = [('head', 'unitsPerEm'),
+                  ('hhea', 'ascent'), ('hhea', 'descent'), ('hhea', 'lineGap'),
+                  ('OS/2', 'sTypoAscender'), ('OS/2', 'sTypoDescender'), ('OS/2', 'usWinAscent'),
+                  ('OS/2', 'usWinDescent')]
+HINTING_TABLES = ['cvt ', 'fpgm', 'prep', 'gasp']
+
+
+class FontDiff(namedtuple('FontDiff', ['added', 'removed', 'modified', 'unchanged'])):
+    """
+    Elements names added, removed, modified or unchanged between two versions of a font and its map
+    """
+    __slots__ = ()
+
+    @property
+    def changed(self):
+        """
+        :return: Elements whose images have to be rendered again (added and modified ones)
+        :rtype: list
+        """
+        return sorted(self.added + self.modified)
+
+
+def _get_global_hash(font):
+    """
+    :return: Hash of font wide values affecting all glyphs
+    :rtype: str
+    """
+    digest = hashlib.sha1()
+    for table, attribute in GLOBAL_METRICS:
+        if table in font:
+            digest.update(repr(getattr(font[table], attribute, None)).encode('utf-8'))
+    for table in HINTING_TABLES:
+        if table in font:
+            digest.update(font.getTableData(table))
+    return digest.hexdigest()
+
+
+def get_glyph_hashes(ttf_file_path, code_points):
+    """
+    Hash what rendering of each glyph depends on: outline (components decomposed), advance width and hinting
+    instructions of glyph, along with font wide metrics and hinting programs
+
+    :param ttf_file_path: Path of font
+    :type ttf_file_path: str
+
+    :param code_points: Code points of glyphs to hash
+    :type code_points: iterable
+
+    :raise ImportError if fontTools is not installed
+
+    :return: Hash of each code point glyph, None for code points without glyph
+    :rtype: dict
+    """
+    if TTFont is None:
+        raise ImportError("fontTools is required to compare fonts")
+
+    font = TTFont(ttf_file_path, lazy=True)
+    try:
+        cmap = font.getBestCmap() or {}
+        glyph_set = font.getGlyphSet()
+        global_hash = _get_global_hash(font)
+        hashes = {}
+        for code_point in code_points:
+            glyph_name = cmap.get(code_point)
+            if glyph_name is None:
+                hashes[code_point] = None
+                continue
+
+            pen = DecomposingRecordingPen(glyph_set)
+            glyph_set[glyph_name].draw(pen)
+            digest = hashlib.sha1(global_hash.encode('utf-8'))
+            digest.update(repr((pen.value, glyph_set[glyph_name].width)).encode('utf-8'))
+            if 'glyf' in font and hasattr(font['glyf'][glyph_name], 'program'):
+                digest.update(font['glyf'][glyph_name].program.getBytecode())
+            hashes[code_point] = digest.hexdigest()
+    finally:
+        font.close()
+    return hashes
+
+
+def diff_fonts(old_elements, old_ttf_file_path, new_elements, new_ttf_file_path):
+    """
+    Compare elements of two versions of a font and its map, an element being modified when its glyph would render
+    differently (whatever its code point is)
+
+    :param old_elements: Code point of each element of old map
+    :type old_elements: dict
+
+    :param old_ttf_file_path: Path of old font
+    :type old_ttf_file_path: str
+
+    :param new_elements: Code point of each element of new map
+    :type new_elements: dict
+
+    :param new_ttf_file_path: Path of new font
+    :type new_ttf_file_path: str
+
+    :raise ImportError if fontTools is not installed
+
+    :rtype: FontDiff
+    """
+    old_hashes = get_glyph_hashes(old_ttf_file_path, set(old_elements.values()))
+    new_hashes = get_glyph_hashes(new_ttf_file_path, set(new_elements.values()))
+
+    added = sorted(element for element in new_elements if element not in old_elements)
+    removed = sorted(element for element in old_elements if element not in new_elements)
+    modified, unchanged = [], []
+    for element in sorted(set(old_elements) & set(new_elements)):
+        if old_hashes[old_elements[element]] == new_hashes[new_elements[element]]:
+            unchanged.append(element)
+        else:
+            modified.append(element)
+    return FontDiff(added=added, removed=removed, modified=modified, unchanged=unchanged)
@@ -0,0 +1,55 @@
+# coding=utf-8
+"""
+Locating of ImageMagick commands (version 7 'magick' or version 6 'convert' and 'mogrify') and escaping of their
+arguments
+"""
+import threading
+
+try:
+    from shutil import which
+except ImportError:  # python 2
+    from distutils.spawn import find_executable as which
+
+_commands = {}  # detected commands by search path, ImageMagick is only looked for once
+_commands_lock = threading.Lock()
+
+
+def find_imagemagick(search_path=None):
+    """
+    Find ImageMagick commands, preferring version 7 'magick' (on Windows, 'convert' is also a system tool)
+
+    :param search_path: Folders to search (os.pathsep separated), PATH by default
+    :type search_path: str
+
+    :raise ImportError if ImageMagick is not installed
+
+    :return: Argument vector prefix of 'convert' and 'mogrify' commands
+    :rtype: dict
+    """
+    with _commands_lock:
+        if search_path not in _commands:
+            magick = which('magick', path=search_path)
+            if magick:
+                _commands[search_path] = {'convert': [magick], 'mogrify': [magick, 'mogrify']}
+            else:
+                convert, mogrify = which('convert', path=search_path), which('mogrify', path=search_path)
+                _commands[search_path] = {'convert': [convert], 'mogrify': [mogrify]} if convert and mogrify else None
+        commands = _commands[search_path]
+
+    if commands is None:
+        raise ImportError("ImageMagick ('magick' or 'convert' and 'mogrify' commands) is required by "
+                          "'imagemagick' backend")
+    return commands
+
+
+def escape_text(text):
+    """
+    Escape text of a caption: backslashes and percent escapes are interpreted by ImageMagick, and text starting
+    with '@' would be read from a file
+
+    :type text: unicode
+
+    :rtype: unicode
+    """
+    text = text.replace(u'\\', u'\\\\').replace(u'%', u'%%')
+    return u'\\' + text if text.startswith(u'@') else text
@@ -0,0 +1,128 @@
+# coding=utf-8
+"""
+Manifest of images written in an output folder, used to skip unchanged images on next conversions
+"""
+import hashlib
+import json
+import os
+
+from logger import get_logger
+
+MANIFEST_FILE_NAME = '.xwing-font-converter.json'
+MANIFEST_VERSION = 1
+
+
+def get_file_hash(file_path):
+    """
+    Get SHA-1 hex digest of given file content
+
+    :param file_path: Path of file to hash
+    :type file_path: str
+
+    :rtype: str
+    """
+    sha = hashlib.sha1()
+    with open(file_path, 'rb') as hashed_file:
+        for chunk in iter(lambda: hashed_file.read(65536), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+class Manifest(object):
+    """
+    Record, for each image of output folder, the inputs it has been rendered from
+    """
+
+    def __init__(self, output_folder):
+        super(Manifest, self).__init__()
+
+        self._output_folder = output_folder
+        self._path = os.path.join(output_folder, MANIFEST_FILE_NAME)
+        self._entries = {}
+        self._log = get_logger()
+
+    @property
+    def entries(self):
+        return self._entries
+
+    def load(self):
+        """
+        Load manifest from output folder, a missing or unreadable manifest is considered empty
+
+        :rtype: None
+        """
+        self._entries = {}
+        if not os.path.exists(self._path):
+            return
+
+        try:
+            with open(self._path, 'r') as manifest_file:
+                data = json.load(manifest_file)
+        except ValueError as err:
+            self._log.warning("Ignoring invalid manifest {}: {}".format(self._path, err))
+            return
+
+        if data.get('version') == MANIFEST_VERSION:
+            self._entries = data.get('entries', {})
+
+    def save(self):
+        """
+        Write manifest into output folder
+
+        :rtype: None
+        """
+        with open(self._path, 'w') as manifest_file:
+            json.dump({'version': MANIFEST_VERSION, 'entries': self._entries}, manifest_file, indent=1,
+                      sort_keys=True)
+
+    def is_up_to_date(self, output_file, entry):
+        """
+        Check if image exists and has been rendered from same inputs
+
+        :param output_file: Path of image
+        :type output_file: str
+
+        :param entry: Inputs of image (json serializable dict)
+        :type entry: dict
+
+        :rtype: bool
+        """
+        return self._entries.get(os.path.basename(output_file)) == entry and os.path.exists(output_file)
+
+    def update(self, output_file, entry):
+        """
+        Record inputs image has been rendered from
+
+        :see: is_up_to_date
+        """
+        self._entries[os.path.basename(output_file)] = entry
+
+    def discard(self, output_file):
+        """
+        Forget image inputs (image will be rendered again on next conversion)
+
+        :param output_file: Path of image
+        :type output_file: str
+
+        :rtype: None
+        """
+        self._entries.pop(os.path.basename(output_file), None)
+
+    def prune(self, kept_files):
+        """
+        Remove images of manifest which are not in kept ones, other files of output folder are never removed
+
+        :param kept_files: Paths of images to keep
+        :type kept_files: list
+
+        :return: Removed files names
+        :rtype: list
+        """
+        kept_names = set(os.path.basename(kept_file) for kept_file in kept_files)
+        removed = sorted(name for name in self._entries if name not in kept_names)
+        for name in removed:
+            stale_file = os.path.join(self._output_folder, name)
+            if os.path.exists(stale_file):
+                os.remove(stale_file)
+            del self._entries[name]
+        return removed
@@ -0,0 +1,207 @@
+# coding=utf-8
+"""
+Loading of element maps (.json or .scss) into an index of element name to code point, kept in a binary sidecar
+file next to the map for next runs to skip parsing
+"""
+import hashlib
+import io
+import json
+import os
+import re
+import struct
+import tempfile
+
+from logger import get_logger
+
+try:
+    unichr
+except NameError:  # python 3
+    unichr = chr
+
+MAP_FORMATS = ['json', 'scss']
+INDEX_EXTENSION = '.idx'
+INDEX_MAGIC = b'XWMI'
+INDEX_VERSION = 1
+INDEX_HEADER = struct.Struct('>4sHdQ20sI')  # magic, version, map mtime, map size, map sha1, number of elements
+INDEX_ENTRY = struct.Struct('>IH')  # code point, length of utf-8 name
+
+CSS_ESCAPE = re.compile(r'\\([0-9a-fA-F]{1,6})[ \t\n]?|\\(.)', re.DOTALL)
+SCSS_COMMENT = re.compile(r'/\*.*?\*/|//[^\n]*', re.DOTALL)
+SCSS_ENTRY = re.compile(r'''(?P<name_quote>['"]?)(?P<name>[\w-]+)(?P=name_quote)\s*:\s*'''
+                        r'''(?P<quote>['"])(?P<value>(?:\\.|(?!(?P=quote)).)*)(?P=quote)''', re.DOTALL)
+
+
+def get_character(code_point):
+    """
+    :return: Character of given code point (even outside basic multilingual plane on narrow python 2 builds)
+    :rtype: unicode
+    """
+    try:
+        return unichr(code_point)
+    except ValueError:
+        return struct.pack('<I', code_point).decode('utf-32-le')
+
+
+def get_code_point(value):
+    """
+    Get code point of a single character, CSS escapes (eg: \\011E) being decoded
+
+    :param value: Character or CSS escape
+    :type value: unicode
+
+    :return: Code point, None if value is not a single character
+    :rtype: int
+    """
+    value = CSS_ESCAPE.sub(lambda match: get_character(int(match.group(1), 16)) if match.group(1) else match.group(2),
+                           value)
+    if len(value) == 2 and u'\ud800' <= value[0] <= u'\udbff' and u'\udc00' <= value[1] <= u'\udfff':
+        # surrogate pair of narrow python 2 builds
+        return 0x10000 + ((ord(value[0]) - 0xd800) << 10) + ord(value[1]) - 0xdc00
+    return ord(value) if len(value) == 1 else None
+
+
+def parse_json_map(text):
+    """
+    Parse elements of all sections of a JSON map, eg: {"ships": {"t65xwing": "x", ...}, ...}
+
+    :rtype: list of (unicode, unicode)
+    """
+    data = json.loads(text)
+    elements = []
+    for section in sorted(data):
+        if isinstance(data[section], dict):
+            elements.extend(sorted(data[section].items()))
+    return elements
+
+
+def parse_scss_map(text):
+    """
+    Parse elements of all maps of a SCSS file, eg: $ship-map: ('t65xwing': 'x', ...);
+
+    :rtype: list of (unicode, unicode)
+    """
+    return [(match.group('name'), match.group('value'))
+            for match in SCSS_ENTRY.finditer(SCSS_COMMENT.sub(u'', text))]
+
+
+def parse_map(map_file_path):
+    """
+    Parse a map file into code point of each element, entries which are not a single character are skipped
+
+    :param map_file_path: Path of map (.json or .scss)
+    :type map_file_path: str
+
+    :raise ValueError if map can not be parsed
+
+    :rtype: dict
+    """
+    log = get_logger()
+    with io.open(map_file_path, 'r', encoding='utf-8') as map_file:
+        text = map_file.read()
+
+    if os.path.splitext(map_file_path)[1] == '.scss':
+        elements = parse_scss_map(text)
+    else:
+        elements = parse_json_map(text)
+
+    element_map = {}
+    for name, value in elements:
+        code_point = get_code_point(value)
+        if code_point is None:
+            log.warning(u"Ignoring '{name}' of {path}: {value!r} is not a single character"
+                        .format(name=name, path=map_file_path, value=value))
+        elif element_map.setdefault(name, code_point) != code_point:
+            log.warning(u"Ignoring duplicate '{name}' of {path}".format(name=name, path=map_file_path))
+    return element_map
+
+
+def read_index(index_file_path):
+    """
+    Read a binary index
+
+    :return: Header fields (mtime, size, sha1 digest) and code point of each element, None if index is unreadable
+    :rtype: tuple
+    """
+    try:
+        with open(index_file_path, 'rb') as index_file:
+            data = index_file.read()
+        magic, version, mtime, size, digest, count = INDEX_HEADER.unpack_from(data)
+        if magic != INDEX_MAGIC or version != INDEX_VERSION:
+            return None
+
+        element_map = {}
+        offset = INDEX_HEADER.size
+        for _ in range(count):
+            code_point, length = INDEX_ENTRY.unpack_from(data, offset)
+            offset += INDEX_ENTRY.size
+            element_map[data[offset:offset + length].decode('utf-8')] = code_point
+            offset += length
+    except (IOError, OSError, struct.error, UnicodeDecodeError):
+        return None
+    return (mtime, size, digest), element_map
+
+
+def write_index(index_file_path, header, element_map):
+    """
+    Write a binary index (atomically, for concurrent readers to never see partial indexes)
+
+    :param header: Map mtime, size and sha1 digest
+    :type header: tuple
+
+    :rtype: None
+    """
+    mtime, size, digest = header
+    chunks = [INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, mtime, size, digest, len(element_map))]
+    for name in sorted(element_map):
+        encoded_name = name.encode('utf-8')
+        chunks.append(INDEX_ENTRY.pack(element_map[name], len(encoded_name)) + encoded_name)
+
+    handle, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(index_file_path)))
+    with os.fdopen(handle, 'wb') as index_file:
+        index_file.write(b''.join(chunks))
+    if os.path.exists(index_file_path):  # rename does not overwrite on windows
+        os.remove(index_file_path)
+    os.rename(tmp_path, index_file_path)
+
+
+def load_map(map_file_path, use_index=True):
+    """
+    Load code point of each element of a map.
+
+    Parsed map is stored in a {map}.idx sidecar index, used as long as map modification time and size are unchanged,
+    or its content hash if they changed.
+
+    :param map_file_path: Path of map (.json or .scss)
+    :type map_file_path: str
+
+    :param use_index: Whether read and write sidecar index or always parse map
+    :type use_index: bool
+
+    :raise ValueError if map can not be parsed
+
+    :return: Code point of each element name
+    :rtype: dict
+    """
+    if not use_index:
+        return parse_map(map_file_path)
+
+    log = get_logger()
+    index_file_path = map_file_path + INDEX_EXTENSION
+    stat = os.stat(map_file_path)
+    index = read_index(index_file_path)
+    if index is not None and index[0][:2] == (stat.st_mtime, stat.st_size):
+        return index[1]
+
+    with open(map_file_path, 'rb') as map_file:
+        digest = hashlib.sha1(map_file.read()).digest()
+
+    if index is not None and index[0][2] == digest:
+        element_map = index[1]  # touched but unchanged map, only header is updated
+    else:
+        element_map = parse_map(map_file_path)
+
+    try:
+        write_index(index_file_path, (stat.st_mtime, stat.st_size, digest), element_map)
+    except (IOError, OSError) as err:
+        log.debug("Unable to write map index {}: {}".format(index_file_path, err))
+    return element_map
@@ -0,0 +1,251 @@
+# coding=utf-8
+"""
+Timers and counters of conversions, to know where time goes (rasterization, encoding, subprocesses, disk writes)
+"""
+import cProfile
+import functools
+import pstats
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+MAX_SAMPLES = 10000  # durations kept per timer for percentiles, count, total, min and max stay exact
+
+
+def percentile(values, percent):
+    """
+    Get percentile of values (nearest rank method)
+
+    :param values: Measured values
+    :type values: list
+
+    :param percent: Percentile to get, between 0 and 100
+    :type percent: float
+
+    :return: Percentile, None if there is no value
+    :rtype: float
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = int(round(percent / 100.0 * len(ordered) + 0.5)) - 1
+    return ordered[min(max(rank, 0), len(ordered) - 1)]
+
+
+class Metrics(object):
+    """
+    Thread safe collector of named timers and counters.
+
+    Observers are called on each measure with its kind ('timer', 'value' or 'counter'), name, value (seconds for
+    timers) and tags (eg: element name), from the thread which made the measure.
+    """
+
+    def __init__(self):
+        super(Metrics, self).__init__()
+
+        self._lock = threading.Lock()
+        self._observers = []
+        self._timers = {}  # name: [count, total, min, max, samples]
+        self._values = {}  # same as timers, for other measures (eg: sizes)
+        self._counters = {}
+
+    def add_observer(self, observer):
+        """
+        :param observer: Callable taking kind, name, value and tags dict
+        :type observer: callable
+
+        :rtype: None
+        """
+        self._observers.append(observer)
+
+    def remove_observer(self, observer):
+        self._observers.remove(observer)
+
+    @contextmanager
+    def timer(self, name, **tags):
+        """
+        Measure duration of enclosed block (also when it raises)
+
+        :param name: Timer name, eg: 'encode'
+        :type name: str
+        """
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.record(name, time.time() - start, **tags)
+
+    def record(self, name, seconds, **tags):
+        """
+        Add a duration to a timer
+
+        :param name: Timer name
+        :type name: str
+
+        :param seconds: Measured duration
+        :type seconds: float
+
+        :rtype: None
+        """
+        self.__add_sample(self._timers, name, seconds)
+        self.__notify('timer', name, seconds, tags)
+
+    def observe(self, name, value, **tags):
+        """
+        Add a measure to a distribution of values
+
+        :param name: Distribution name, eg: 'encoded_bytes'
+        :type name: str
+
+        :param value: Measured value
+        :type value: int or float
+
+        :rtype: None
+        """
+        self.__add_sample(self._values, name, value)
+        self.__notify('value', name, value, tags)
+
+    def __add_sample(self, distributions, name, value):
+        with self._lock:
+            distribution = distributions.get(name)
+            if distribution is None:
+                distribution = distributions[name] = [0, 0, value, value, deque(maxlen=MAX_SAMPLES)]
+            distribution[0] += 1
+            distribution[1] += value
+            distribution[2] = min(distribution[2], value)
+            distribution[3] = max(distribution[3], value)
+            distribution[4].append(value)
+
+    def count(self, name, value=1, **tags):
+        """
+        Increase a counter
+
+        :param name: Counter name, eg: 'bytes_written'
+        :type name: str
+
+        :param value: Increment
+        :type value: int
+
+        :rtype: None
+        """
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+        self.__notify('counter', name, value, tags)
+
+    def get_counter(self, name):
+        """
+        :return: Value of counter, 0 if never increased
+        :rtype: int
+        """
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def get_samples(self, name):
+        """
+        :return: Last durations of timer in seconds (or last values of distribution)
+        :rtype: list
+        """
+        with self._lock:
+            distribution = self._timers.get(name) or self._values.get(name)
+            return list(distribution[4]) if distribution is not None else []
+
+    def reset(self):
+        """
+        Forget all measures (observers are kept)
+
+        :rtype: None
+        """
+        with self._lock:
+            self._timers = {}
+            self._values = {}
+            self._counters = {}
+
+    def summary(self):
+        """
+        Get summary of measures, durations in milliseconds
+
+        :return: Count, total, mean, p50, p95 and max of each timer and distribution, and value of each counter.
+                 Percentiles are computed from last MAX_SAMPLES measures only.
+        :rtype: dict
+        """
+        with self._lock:
+            timers = dict((name, (count, total, minimum, maximum, sorted(samples)))
+                          for name, (count, total, minimum, maximum, samples) in self._timers.items())
+            values = dict((name, (count, total, minimum, maximum, sorted(samples)))
+                          for name, (count, total, minimum, maximum, samples) in self._values.items())
+            counters = dict(self._counters)
+
+        summary = {'timers': {}, 'values': {}, 'counters': counters}
+        for name, (count, total, _, maximum, samples) in timers.items():
+            summary['timers'][name] = {'count': count,
+                                       'total_ms': round(total * 1000, 3),
+                                       'mean_ms': round(total * 1000 / count, 3),
+                                       'p50_ms': round(percentile(samples, 50) * 1000, 3),
+                                       'p95_ms': round(percentile(samples, 95) * 1000, 3),
+                                       'max_ms': round(maximum * 1000, 3)}
+        for name, (count, total, minimum, maximum, samples) in values.items():
+            summary['values'][name] = {'count': count,
+                                       'total': total,
+                                       'mean': round(total / float(count), 3),
+                                       'min': minimum,
+                                       'p50': percentile(samples, 50),
+                                       'p95': percentile(samples, 95),
+                                       'max': maximum}
+        return summary
+
+    def __notify(self, kind, name, value, tags):
+        for observer in self._observers:
+            observer(kind, name, value, tags)
+
+
+def timed(name):
+    """
+    Decorator measuring duration of a method with a timer of its instance metrics (given by a 'metrics' attribute)
+
+    :param name: Timer name
+    :type name: str
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.metrics.timer(name):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def profile(func, output_file):
+    """
+    Execute func under cProfile, threads started meanwhile (eg: conversion workers) being profiled too
+
+    :param func: Callable to profile
+    :type func: callable
+
+    :param output_file: Path of pstats dump (readable with pstats or snakeviz)
+    :type output_file: str
+
+    :return: Value returned by func
+    """
+    profiles = [cProfile.Profile()]
+
+    def profile_thread(*_):
+        # called once on first event of each new thread, then replaced by thread profiler
+        thread_profile = cProfile.Profile()
+        profiles.append(thread_profile)
+        thread_profile.enable()
+
+    threading.setprofile(profile_thread)
+    profiles[0].enable()
+    try:
+        return func()
+    finally:
+        profiles[0].disable()
+        threading.setprofile(None)
+        stats = pstats.Stats(profiles[0])
+        for thread_profile in profiles[1:]:
+            try:
+                stats.add(thread_profile)
+            except TypeError:
+                pass  # thread did not call anything
+        stats.dump_stats(output_file)
@@ -0,0 +1,116 @@
+# coding=utf-8
+"""
+Scheduling of conversion jobs over a bounded pool of workers, with a bounded window of jobs in flight
+"""
+import multiprocessing
+from collections import deque, namedtuple
+from multiprocessing.pool import ThreadPool
+
+DEFAULT_JOBS = multiprocessing.cpu_count()
+IN_FLIGHT_PER_WORKER = 2  # default window: jobs started ahead of consumed results, per worker
+
+
+class JobResult(namedtuple('JobResult', ['job', 'value', 'error'])):
+    """
+    Outcome of one job: value returned by the job function or raised error (never both)
+    """
+    __slots__ = ()
+
+
+class JobScheduler(object):
+    """
+    Fan jobs out over a pool of threads.
+
+    Threads are enough here: ImageMagick backend waits on subprocesses and Pillow releases the GIL while encoding,
+    and workers can share the already loaded map, backend and logger.
+
+    Jobs are submitted as results are consumed, no more than max_in_flight of them being started and not consumed
+    yet: a slow consumer (eg: writing images) holds workers back instead of letting results pile up in memory, which
+    is then bounded by the window whatever the number of jobs is.
+    """
+
+    def __init__(self, jobs=DEFAULT_JOBS, pool=None, max_in_flight=None):
+        """
+        :param jobs: Number of workers (size of pool if given)
+        :type jobs: int
+
+        :param pool: Pool shared with other schedulers (eg: by converters of a batch), owned by caller.
+                     Runs of schedulers sharing it are executed by same workers.
+        :type pool: multiprocessing.pool.ThreadPool
+
+        :param max_in_flight: Maximum number of jobs running or done whose results are not consumed yet
+                              (default: IN_FLIGHT_PER_WORKER per worker, at least one per worker)
+        :type max_in_flight: int
+        """
+        super(JobScheduler, self).__init__()
+
+        self._jobs = max(1, int(jobs))
+        self._pool = pool
+        self._max_in_flight = max(self._jobs, int(max_in_flight)) if max_in_flight is not None \
+            else IN_FLIGHT_PER_WORKER * self._jobs
+
+    @property
+    def jobs(self):
+        return self._jobs
+
+    @property
+    def max_in_flight(self):
+        return self._max_in_flight
+
+    def run(self, func, jobs):
+        """
+        Execute func on each job, errors are collected per job instead of aborting the whole run
+
+        :param func: Callable taking one job as argument
+        :type func: callable
+
+        :param jobs: Jobs to execute, read as they are submitted
+        :type jobs: iterable
+
+        :return: Results, yielded in jobs order whatever the completion order is
+        :rtype: generator of JobResult
+        """
+        if self._pool is not None:
+            for result in self.__run_window(self._pool, func, jobs):
+                yield result
+            return
+
+        if self._jobs == 1:
+            for job in jobs:
+                yield _execute(func, job)
+            return
+
+        pool = ThreadPool(self._jobs)
+        try:
+            for result in self.__run_window(pool, func, jobs):
+                yield result
+        finally:
+            pool.terminate()
+            pool.join()
+
+    def __run_window(self, pool, func, jobs):
+        """
+        Submit jobs to pool as their predecessors results are consumed (ThreadPool.imap would submit all of them at
+        once and buffer all results)
+
+        :rtype: generator of JobResult
+        """
+        pending = deque()
+        for job in jobs:
+            if len(pending) >= self._max_in_flight:
+                yield pending.popleft().get()
+            pending.append(pool.apply_async(_execute, (func, job)))
+        while pending:
+            yield pending.popleft().get()
+
+
+def _execute(func, job):
+    """
+    Execute func on job and wrap its outcome
+
+    :rtype: JobResult
+    """
+    try:
+        return JobResult(job, func(job), None)
+    except Exception as err:
+        return JobResult(job, None, err)
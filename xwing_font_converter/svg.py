@@ -0,0 +1,112 @@
+# coding=utf-8
+"""
+Vector export of glyphs: outlines are read from the font and written as SVG paths, without any rasterization
+"""
+import threading
+
+try:
+    from fontTools.pens.boundsPen import BoundsPen
+    from fontTools.pens.svgPathPen import SVGPathPen
+    from fontTools.ttLib import TTFont
+except ImportError:  # fontTools is optional, only needed by svg format
+    BoundsPen = SVGPathPen = TTFont = None
+
+SVG_TEMPLATE = u'<svg xmlns="http://www.w3.org/2000/svg" viewBox="{x} {y} {width} {height}" ' \
+               u'width="{image_width}" height="{image_height}">' \
+               u'<path fill="{color}" transform="scale(1 -1)" d="{path}"/></svg>\n'
+
+
+def _format_number(value):
+    """
+    :return: Number without useless decimals
+    :rtype: str
+    """
+    return u"{:.3f}".format(value).rstrip('0').rstrip('.')
+
+
+class SvgRenderer(object):
+    """
+    Renderer of glyphs outlines into SVG images with a viewBox tight around the glyph.
+
+    Rendering time does not depend on output size, which is only given by width and height attributes.
+    """
+    name = 'svg'
+
+    def __init__(self, ttf_file_path, extra_colors=None):
+        """
+        :param ttf_file_path: Path of font
+        :type ttf_file_path: str
+
+        :param extra_colors: Hex code of color names unknown from SVG
+        :type extra_colors: dict
+        """
+        super(SvgRenderer, self).__init__()
+
+        if TTFont is None:
+            raise ImportError("fontTools is required by '{}' format".format(self.name))
+
+        self._font = TTFont(ttf_file_path, lazy=True)
+        self._cmap = self._font.getBestCmap() or {}
+        self._glyph_set = self._font.getGlyphSet()
+        self._extra_colors = extra_colors or {}
+        self._lock = threading.Lock()  # glyphs are decompiled on first access
+
+    def render_glyph(self, code_point, color, size, width=False):
+        """
+        Get SVG image of a glyph
+
+        :param code_point: Code point of glyph
+        :type code_point: int
+
+        :param color: Fill color name
+        :type color: str
+
+        :param size: Height (or width) in pixel of image, other dimension keeps glyph aspect ratio
+        :type size: int
+
+        :param width: Whether size is the width or height of image
+        :type width: bool
+
+        :raise ValueError if font has no outline for this code point
+
+        :rtype: bytes
+        """
+        if code_point not in self._cmap:
+            raise ValueError(u"No glyph for U+{:04X}".format(code_point))
+
+        with self._lock:
+            glyph = self._glyph_set[self._cmap[code_point]]
+            bounds_pen = BoundsPen(self._glyph_set)
+            glyph.draw(bounds_pen)
+            path_pen = SVGPathPen(self._glyph_set)
+            glyph.draw(path_pen)
+
+        if bounds_pen.bounds is None:
+            raise ValueError(u"No outline for U+{:04X}".format(code_point))
+
+        x_min, y_min, x_max, y_max = bounds_pen.bounds
+        glyph_width, glyph_height = max(x_max - x_min, 1), max(y_max - y_min, 1)
+        if width:
+            image_width, image_height = size, size * glyph_height / float(glyph_width)
+        else:
+            image_width, image_height = size * glyph_width / float(glyph_height), size
+
+        # font y axis goes up, path is flipped and viewBox is given in flipped coordinates
+        return SVG_TEMPLATE.format(x=_format_number(x_min), y=_format_number(-y_max),
+                                   width=_format_number(glyph_width), height=_format_number(glyph_height),
+                                   image_width=_format_number(image_width),
+                                   image_height=_format_number(image_height),
+                                   color=self._extra_colors.get(color, color),
+                                   path=path_pen.getCommands()).encode('utf-8')
+
+    def render_data(self, code_point, size, targets):
+        """
+        Render one glyph into SVG images, resize stage of targets giving their size (default one otherwise).
+        Other stages are not needed: images are always trimmed to the glyph outline.
+
+        :see: ImageMagickBackend.render_data
+        """
+        for target in targets:
+            resize = [stage for stage in target.stages if hasattr(stage, 'size')]
+            image_size, width = (resize[-1].size, resize[-1].width) if resize else (size, False)
+            yield target, self.render_glyph(code_point, target.color, image_size, width)
@@ -0,0 +1,61 @@
+"""
+Unit testing of ArchiveWriter class
+"""
+import os
+import shutil
+import tarfile
+import tempfile
+import unittest
+import zipfile
+
+from archive import ArchiveWriter, get_archive_format
+
+
+class TestArchiveWriter(unittest.TestCase):
+
+    def setUp(self):
+        super(TestArchiveWriter, self).setUp()
+
+        self._folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self._folder)
+
+    def test_get_archive_format(self):
+        self.assertEqual(get_archive_format('ships.zip'), ('zip', None))
+        self.assertEqual(get_archive_format('ships.TAR.GZ'), ('tar', 'w:gz'))
+        self.assertEqual(get_archive_format('ships.tar'), ('tar', 'w'))
+        self.assertIsNone(get_archive_format('ships.rar'))
+
+    def test_unknown_extension(self):
+        self.assertRaises(AttributeError, ArchiveWriter, os.path.join(self._folder, 'ships.rar'))
+
+    def test_zip(self):
+        archive_path = os.path.join(self._folder, 'ships.zip')
+        with ArchiveWriter(archive_path) as archive:
+            archive.add('t65xwing-black.png', b'png data')
+            archive.add('t65xwing-black.svg', b'<svg/>')
+            self.assertEqual(archive.count, 2)
+
+        with zipfile.ZipFile(archive_path) as archive:
+            self.assertEqual(archive.namelist(), ['t65xwing-black.png', 't65xwing-black.svg'])
+            self.assertEqual(archive.read('t65xwing-black.png'), b'png data')
+            self.assertEqual(archive.getinfo('t65xwing-black.png').compress_type, zipfile.ZIP_STORED,
+                             'Compressed images should be stored as is')
+            self.assertEqual(archive.getinfo('t65xwing-black.svg').compress_type, zipfile.ZIP_DEFLATED)
+
+    def test_tar_gz(self):
+        archive_path = os.path.join(self._folder, 'ships.tar.gz')
+        with ArchiveWriter(archive_path) as archive:
+            archive.add('t65xwing-black.gif', b'gif data')
+
+        archive = tarfile.open(archive_path, 'r:gz')
+        try:
+            self.assertEqual(archive.getnames(), ['t65xwing-black.gif'])
+            self.assertEqual(archive.extractfile('t65xwing-black.gif').read(), b'gif data')
+        finally:
+            archive.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
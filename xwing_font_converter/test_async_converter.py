@@ -0,0 +1,80 @@
+"""
+Unit testing of AsyncFontConverter class
+"""
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from async_converter import AsyncFontConverter, asyncio
+from font_converter import FontConverter
+
+
+@unittest.skipIf(asyncio is None, 'asyncio requires python 3')
+class TestAsyncFontConverter(unittest.TestCase):
+
+    def setUp(self):
+        super(TestAsyncFontConverter, self).setUp()
+
+        logging.disable(logging.CRITICAL)
+
+        self._output_folder = tempfile.mkdtemp()
+        fc = FontConverter(map_file_path=os.path.join('resources', 'ships-map.json'),
+                           ttf_file_path=os.path.join('resources', 'xwing-miniatures-ships.ttf'),
+                           output_folder=self._output_folder)
+        fc.init_font_converter()
+        fc.get_elements_from_map()
+        self.loop = asyncio.new_event_loop()
+        self.converter = AsyncFontConverter(fc, max_concurrency=2, loop=self.loop)
+
+    def tearDown(self):
+        self.converter.close()
+        self.loop.close()
+        shutil.rmtree(self._output_folder)
+
+    def test_render_image(self):
+        data = self.loop.run_until_complete(self.converter.render_image('t65xwing', color='red', file_format='png'))
+        self.assertEqual(data, self.converter.font_converter.render_image('t65xwing', color='red', file_format='png'))
+
+    def test_render_images(self):
+        elements = sorted(self.converter.font_converter.element_map)[:5] + ['unknown']
+        images = self.loop.run_until_complete(self.converter.render_images(elements, return_exceptions=True))
+        self.assertEqual(len(images), len(elements))
+        self.assertTrue(all(isinstance(image, bytes) for image in images[:-1]))
+        self.assertIsInstance(images[-1], KeyError, 'Errors should be returned in place of images')
+
+    def test_convert_2_images(self):
+        self.loop.run_until_complete(self.converter.convert_2_images(color='black', file_format='png'))
+        self.assertEqual(len(os.listdir(self._output_folder)) - 1,  # manifest
+                         len(self.converter.font_converter.element_map))
+
+    def test_convert_2_images_cancelled(self):
+        started, resume = threading.Event(), threading.Event()
+
+        def progress(done, total, element):
+            started.set()
+            resume.wait()
+
+        future = self.converter.convert_2_images(color='black', file_format='png', jobs=1, progress=progress)
+        try:
+            self.loop.run_until_complete(self.loop.run_in_executor(None, started.wait))
+            future.cancel()
+            self.assertRaises(asyncio.CancelledError, self.loop.run_until_complete, future)
+            self.assertTrue(self.converter.font_converter.cancelled, 'Running conversion should be cancelled')
+        finally:
+            # conversion has to stop before output folder is removed
+            resume.set()
+            self.converter.close(wait=True)
+
+
+@unittest.skipIf(asyncio is not None, 'asyncio is available')
+class TestAsyncFontConverterUnavailable(unittest.TestCase):
+
+    def test_init(self):
+        self.assertRaises(ImportError, AsyncFontConverter, None)
+
+
+if __name__ == '__main__':
+    unittest.main()
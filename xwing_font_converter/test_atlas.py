@@ -0,0 +1,46 @@
+"""
+Unit testing of atlas packing
+"""
+import itertools
+import unittest
+
+from PIL import Image
+
+from atlas import MaxRectsPacker, get_css, get_index, pack_atlases
+
+
+class TestAtlas(unittest.TestCase):
+
+    def test_packer_no_overlap(self):
+        packer = MaxRectsPacker(64, 64)
+        rects = []
+        for width, height in [(34, 44), (30, 20), (20, 30), (8, 40), (16, 16), (10, 10)]:
+            position = packer.insert(width, height)
+            self.assertIsNotNone(position, 'Rectangle should fit')
+            rects.append(position + (width, height))
+        for (x1, y1, w1, h1), (x2, y2, w2, h2) in itertools.combinations(rects, 2):
+            self.assertTrue(x1 + w1 <= x2 or x2 + w2 <= x1 or y1 + h1 <= y2 or y2 + h2 <= y1,
+                            'Rectangles should not overlap')
+        for x, y, width, height in rects:
+            self.assertTrue(x + width <= 64 and y + height <= 64, 'Rectangles should stay in bin')
+
+    def test_packer_full(self):
+        packer = MaxRectsPacker(32, 32)
+        self.assertEqual(packer.insert(32, 32), (0, 0))
+        self.assertIsNone(packer.insert(1, 1), 'Full bin should not accept rectangle')
+
+    def test_pack_many_atlases(self):
+        images = [('image{}'.format(i), Image.new('RGBA', (20, 20), (0, 0, 0, 255))) for i in range(10)]
+        atlases = pack_atlases(images, atlas_size=50, padding=1)
+        self.assertEqual(len(atlases), 3, 'Four images should fit per atlas')
+        index = get_index([('atlas-{}.png'.format(n), coordinates) for n, (_, coordinates) in enumerate(atlases)])
+        self.assertEqual(sorted(index), sorted(name for name, _ in images))
+        self.assertIn('.xwing-image0 {', get_css(index))
+
+    def test_pack_too_big(self):
+        with self.assertRaises(ValueError):
+            pack_atlases([('big', Image.new('RGBA', (100, 10)))], atlas_size=64)
+
+
+if __name__ == '__main__':
+    unittest.main()
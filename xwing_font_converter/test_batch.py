@@ -0,0 +1,106 @@
+"""
+Unit testing of batch conversion
+"""
+import glob
+import json
+import logging
+import os
+import shutil
+import tempfile
+import unittest
+
+from batch import BatchConverter, load_batch
+
+
+class TestBatch(unittest.TestCase):
+
+    def setUp(self):
+        super(TestBatch, self).setUp()
+
+        # disable log during tests
+        logging.disable(logging.CRITICAL)
+
+        self._folder = tempfile.mkdtemp()
+        resources = os.path.abspath('resources')
+        self._batch = {'defaults': {'format': 'png'},
+                       'jobs': [{'map': os.path.join(resources, 'ships-map.json'),
+                                 'ttf': os.path.join(resources, 'xwing-miniatures-ships.ttf'),
+                                 'output': 'ships', 'color': ['black', 'red']},
+                                {'map': os.path.join(resources, 'icons-map.json'),
+                                 'ttf': os.path.join(resources, 'xwing-miniatures.ttf'),
+                                 'output': 'icons', 'format': 'gif', 'name': 'icons'}]}
+
+    def tearDown(self):
+        shutil.rmtree(self._folder)
+
+    def __write_batch(self, batch):
+        batch_file = os.path.join(self._folder, 'batch.json')
+        with open(batch_file, 'w') as batch_json:
+            json.dump(batch, batch_json)
+        return batch_file
+
+    def test_load_batch(self):
+        jobs = load_batch(self.__write_batch(self._batch))
+        self.assertEqual(len(jobs), 2)
+        self.assertEqual(jobs[0]['output'], os.path.join(self._folder, 'ships'),
+                         'Output should be relative to manifest')
+        self.assertEqual(jobs[0]['format'], 'png', 'Defaults should apply to jobs')
+        self.assertEqual(jobs[1]['format'], 'gif', 'Jobs should override defaults')
+        self.assertEqual(jobs[0]['name'], 'ships-map', 'Name should default to map name')
+        self.assertEqual(jobs[0]['size'], 72)
+
+    def test_load_wrong_batch(self):
+        self._batch['jobs'][0]['colour'] = 'red'
+        self.assertRaises(ValueError, load_batch, self.__write_batch(self._batch))
+        del self._batch['jobs'][0]['colour']
+        del self._batch['jobs'][1]['ttf']
+        self.assertRaises(ValueError, load_batch, self.__write_batch(self._batch))
+        self.assertRaises(ValueError, load_batch, self.__write_batch({'jobs': []}))
+
+    def test_run(self):
+        batch = BatchConverter(load_batch(self.__write_batch(self._batch)), workers=3)
+        self.assertEqual(batch.run(), {})
+        self.assertEqual(len(glob.glob(os.path.join(self._folder, 'ships', '*.png'))), 56 * 2)
+        self.assertEqual(len(glob.glob(os.path.join(self._folder, 'icons', '*.gif'))), 160)
+        self.assertEqual(batch.metrics.get_counter('images_written'), 56 * 2 + 160,
+                         'Metrics should be shared by all jobs')
+
+    def test_run_failing_job(self):
+        self._batch['jobs'][0]['color'] = 'WRONG_COLOR'
+        errors = BatchConverter(load_batch(self.__write_batch(self._batch)), workers=2).run()
+        self.assertEqual(sorted(errors), ['ships-map'], 'Only failing job should be reported')
+        self.assertEqual(len(glob.glob(os.path.join(self._folder, 'icons', '*.gif'))), 160,
+                         'Other jobs should be converted')
+
+    def test_run_wrong_map(self):
+        wrong_map = os.path.join(self._folder, 'wrong-map.json')
+        with open(wrong_map, 'w') as map_file:
+            map_file.write('{not json')
+        self._batch['jobs'][0]['map'] = wrong_map
+        errors = BatchConverter(load_batch(self.__write_batch(self._batch)), workers=2).run()
+        self.assertEqual(sorted(errors), ['wrong-map'], 'Job with wrong map should be reported')
+        self.assertEqual(len(glob.glob(os.path.join(self._folder, 'icons', '*.gif'))), 160,
+                         'Other jobs should be converted')
+
+    def test_run_jobs_sharing_map(self):
+        self._batch['jobs'][1]['map'] = self._batch['jobs'][0]['map']
+        del self._batch['jobs'][1]['name']
+        self._batch['jobs'].append(dict(self._batch['jobs'][0], color='WRONG_COLOR', output='wrong'))
+        jobs = load_batch(self.__write_batch(self._batch))
+        self.assertEqual([job['name'] for job in jobs], ['ships-map', 'ships-map-1', 'ships-map-2'],
+                         'Jobs sharing a map should have distinct names')
+        errors = BatchConverter(jobs, workers=2).run()
+        self.assertEqual(sorted(errors), ['ships-map-2'], 'Only failing job should be reported')
+
+        self._batch['jobs'][1]['name'] = 'ships-map'
+        self.assertRaises(ValueError, load_batch, self.__write_batch(self._batch))
+
+    def test_load_batch_same_output(self):
+        self._batch['jobs'][1]['output'] = os.path.join('.', 'other', '..', 'ships')
+        with self.assertRaises(ValueError) as context:
+            load_batch(self.__write_batch(self._batch))
+        self.assertIn('same output folder', str(context.exception))
+
+
+if __name__ == '__main__':
+    unittest.main()
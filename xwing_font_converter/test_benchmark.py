@@ -0,0 +1,53 @@
+"""
+Unit testing of benchmark
+"""
+import logging
+import unittest
+
+from benchmark import compare, run_benchmark, run_case
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def setUp(self):
+        super(TestBenchmark, self).setUp()
+
+        # disable log during tests
+        logging.disable(logging.CRITICAL)
+
+    def test_run_case(self):
+        case = run_case('ships', 'png', 50, 2, backend='pillow')
+        self.assertEqual(sorted(case['stages']),
+                         ['convert_2_images', 'get_elements_from_map', 'resize_images', 'trim_images'])
+
+        convert = case['stages']['convert_2_images']
+        self.assertEqual(convert['glyphs'], 56, 'Every ship should be converted')
+        self.assertGreater(convert['bytes_written'], 0)
+        self.assertLessEqual(convert['latency_p50_ms'], convert['latency_p95_ms'])
+        self.assertGreater(case['stages']['resize_images']['bytes_written'], 0)
+        self.assertGreaterEqual(convert['peak_rss_increase_kb'], 0)
+
+    def test_run_case_svg(self):
+        case = run_case('ships', 'svg', 50, 1, backend='pillow')
+        self.assertEqual(sorted(case['stages']), ['convert_2_images', 'get_elements_from_map'],
+                         'svg images should not be trimmed nor resized')
+
+    def test_run_benchmark_skipped(self):
+        results = run_benchmark(['ships'], ['unknown'], [50], [1], backend='pillow')
+        self.assertEqual(len(results['cases']), 1)
+        self.assertIn('unknown', results['cases'][0]['skipped'], 'Unsupported case should be skipped with reason')
+        self.assertEqual(compare(results, results), [], 'Skipped cases should be comparable')
+
+    def test_compare(self):
+        def get_results(rate):
+            return {'cases': [{'font': 'ships', 'format': 'png', 'point_size': 50, 'jobs': 1, 'backend': 'pillow',
+                               'stages': {'convert_2_images': {'glyphs_per_sec': rate}}}]}
+
+        self.assertEqual(compare(get_results(95), get_results(100), tolerance=0.1), [])
+        self.assertEqual(len(compare(get_results(80), get_results(100), tolerance=0.1)), 1,
+                         'Throughput loss above tolerance should be reported')
+        self.assertEqual(compare(get_results(80), {'cases': []}), [], 'Unknown cases should be ignored')
+
+
+if __name__ == '__main__':
+    unittest.main()
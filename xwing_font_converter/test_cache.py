@@ -0,0 +1,65 @@
+"""
+Unit testing of GlyphCache class
+"""
+import logging
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from PIL import Image
+
+from cache import GlyphCache, MASK_HEADER
+
+
+class TestGlyphCache(unittest.TestCase):
+
+    def setUp(self):
+        super(TestGlyphCache, self).setUp()
+
+        # disable log during tests
+        logging.disable(logging.CRITICAL)
+
+        self._cache_dir = tempfile.mkdtemp()
+        self._mask = Image.new('L', (10, 12), 0)
+        self._mask.putpixel((3, 4), 255)
+
+    def test_get_key(self):
+        key = GlyphCache.get_key('font', 65, 50, 72)
+        self.assertEqual(key, GlyphCache.get_key('font', 65, 50, 72), 'Key should be stable')
+        self.assertNotEqual(key, GlyphCache.get_key('other_font', 65, 50, 72), 'Font should be part of key')
+        self.assertNotEqual(key, GlyphCache.get_key('font', 65, 40, 72), 'Point size should be part of key')
+
+    def test_put_get(self):
+        cache = GlyphCache(self._cache_dir)
+        self.assertIsNone(cache.get('0123'), 'Missing mask should not be found')
+        cache.put('0123', self._mask)
+        mask = GlyphCache(self._cache_dir).get('0123')
+        self.assertEqual(mask.tobytes(), self._mask.tobytes(), 'Mask should be shared between instances')
+        self.assertEqual(mask.size, (10, 12))
+
+    def test_lru_eviction(self):
+        entry_size = MASK_HEADER.size + 10 * 12
+        cache = GlyphCache(self._cache_dir, max_size=4 * entry_size)
+        for key in ['00', '01', '02', '03']:
+            cache.put(key, self._mask)
+            time.sleep(0.01)
+        os.utime(cache._GlyphCache__get_path('00'), None)  # as done by get
+        time.sleep(0.01)
+        cache.put('01', self._mask)  # overwritten mask should not be counted twice
+        self.assertTrue(os.path.exists(cache._GlyphCache__get_path('02')),
+                        'Cache should not be evicted under its maximum size')
+        time.sleep(0.01)
+        cache.put('04', self._mask)
+        self.assertIsNone(cache.get('02'), 'Least recently used mask should be evicted')
+        self.assertIsNone(cache.get('03'), 'Cache should be evicted under 90% of its maximum size')
+        for key in ['00', '01', '04']:
+            self.assertIsNotNone(cache.get(key), 'Recently used mask should be kept')
+
+    def tearDown(self):
+        shutil.rmtree(self._cache_dir)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+"""
+Unit testing of colors parsing
+"""
+import unittest
+
+from colors import get_color_name, get_rgba, is_valid_color, parse_color
+
+
+class TestColors(unittest.TestCase):
+
+    def test_parse_hex(self):
+        self.assertEqual(parse_color('#ff8000'), (255, 128, 0, 255))
+        self.assertEqual(parse_color('#F80'), (255, 136, 0, 255))
+        self.assertEqual(parse_color('#ff000080'), (255, 0, 0, 128))
+        self.assertIsNone(parse_color('#ff00zz'))
+        self.assertIsNone(parse_color('red'), 'Color names are not parsed')
+
+    def test_parse_rgb(self):
+        self.assertEqual(parse_color('rgb(10, 20, 30)'), (10, 20, 30, 255))
+        self.assertEqual(parse_color('rgba(10,20,30,0.5)'), (10, 20, 30, 128))
+        self.assertIsNone(parse_color('rgb(256, 0, 0)'))
+        self.assertIsNone(parse_color('rgba(0, 0, 0, 2)'))
+
+    def test_is_valid_color(self):
+        self.assertTrue(is_valid_color('steelblue1'))
+        self.assertTrue(is_valid_color('#123456'))
+        self.assertFalse(is_valid_color('WRONG_COLOR'))
+
+    def test_get_rgba(self):
+        self.assertEqual(get_rgba('red'), (255, 0, 0, 255))
+        self.assertEqual(get_rgba('steelblue1'), (99, 184, 255, 255), 'ImageMagick names should be known')
+        self.assertEqual(get_rgba('#00ff0040'), (0, 255, 0, 64))
+
+    def test_get_color_name(self):
+        self.assertEqual(get_color_name('red'), 'red')
+        self.assertEqual(get_color_name('#FF0000'), 'ff0000')
+        self.assertEqual(get_color_name('rgba(255, 0, 0, 0.5)'), 'ff000080')
+
+
+if __name__ == '__main__':
+    unittest.main()
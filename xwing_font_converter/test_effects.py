@@ -0,0 +1,89 @@
+"""
+Unit testing of glyph effects
+"""
+import unittest
+
+from PIL import Image, ImageDraw
+
+from effects import get_background, paint, parse_effect, scale_effects, tint
+
+
+def get_mask():
+    """
+    :return: Glyph like alpha mask, a square in the middle of a transparent image
+    :rtype: PIL.Image.Image
+    """
+    mask = Image.new('L', (20, 20), 0)
+    ImageDraw.Draw(mask).rectangle((5, 5, 14, 14), fill=255)
+    return mask
+
+
+class TestEffects(unittest.TestCase):
+
+    def test_parse_effect(self):
+        self.assertEqual(str(parse_effect('stroke:white:2')), 'stroke:white:2')
+        self.assertEqual(str(parse_effect('shadow')), 'shadow:black:2:2:2', 'Arguments should be optional')
+        self.assertEqual(str(parse_effect('gradient:#ff0000:blue')), 'gradient:#ff0000:blue')
+
+    def test_parse_wrong_effect(self):
+        for spec in ['blur', 'stroke:WRONG_COLOR', 'stroke:white:0', 'glow:yellow:big', 'glow:yellow:3:3']:
+            self.assertRaises(ValueError, parse_effect, spec)
+
+    def test_parse_huge_effect(self):
+        self.assertEqual(str(parse_effect('stroke:white:16')), 'stroke:white:16')
+        for spec in ['stroke:white:17', 'glow:yellow:33', 'shadow:black:-65:0:0', 'shadow:black:0:0:33']:
+            self.assertRaises(ValueError, parse_effect, spec)
+        self.assertEqual(str(parse_effect('stroke:white:16').scaled(3)), 'stroke:white:48',
+                         'Scaled effects can exceed maximums')
+
+    def test_tint_alpha(self):
+        image = tint(get_mask(), '#ff000080')
+        self.assertEqual(image.getpixel((10, 10)), (255, 0, 0, 128), 'Color alpha should apply on mask')
+
+    def test_paint_without_effect(self):
+        image = paint(get_mask(), 'red')
+        self.assertEqual(image.size, (20, 20))
+        self.assertEqual(image.getpixel((10, 10)), (255, 0, 0, 255))
+
+    def test_stroke(self):
+        image = paint(get_mask(), 'red', [parse_effect('stroke:white:2')])
+        self.assertEqual(image.size, (24, 24), 'Image should grow by effect margin')
+        self.assertEqual(image.getpixel((12, 12)), (255, 0, 0, 255), 'Glyph should be drawn over effect')
+        self.assertEqual(image.getpixel((5, 12)), (255, 255, 255, 255), 'Outline should surround glyph')
+        self.assertEqual(image.getpixel((1, 12))[3], 0)
+
+    def test_shadow(self):
+        image = paint(get_mask(), 'red', [parse_effect('shadow:black:3:3:0')])
+        margin = (image.size[0] - 20) // 2
+        self.assertEqual(image.getpixel((margin + 16, margin + 16)), (0, 0, 0, 255), 'Shadow should be offset')
+        self.assertEqual(image.getpixel((margin + 3, margin + 3))[3], 0)
+
+    def test_glow(self):
+        image = paint(get_mask(), 'red', [parse_effect('glow:yellow:2')])
+        margin = (image.size[0] - 20) // 2
+        alpha = image.getpixel((image.size[0] // 2, margin + 3))[3]
+        self.assertTrue(0 < alpha < 255, 'Glow should fade around glyph')
+
+    def test_gradient(self):
+        image = paint(get_mask(), 'red', [parse_effect('gradient:white:black')])
+        self.assertGreater(image.getpixel((10, 5))[0], 230, 'Gradient should start at top of glyph')
+        self.assertLess(image.getpixel((10, 14))[0], 30, 'Gradient should end at bottom of glyph')
+        self.assertEqual(image.getpixel((2, 2))[3], 0, 'Gradient should only fill glyph')
+
+    def test_scaled(self):
+        effects = (parse_effect('stroke:white:1'), parse_effect('shadow:black:1:2:1'), parse_effect('gradient'))
+        self.assertEqual([str(effect) for effect in scale_effects(effects, 2)],
+                         ['stroke:white:2', 'shadow:black:2:4:2', 'gradient:white:black'])
+        self.assertIs(scale_effects(effects, 1), effects)
+
+    def test_background_shared(self):
+        mask = get_mask()
+        effects = [parse_effect('stroke:white:1'), parse_effect('shadow')]
+        background = get_background(mask, effects)
+        for color in ['red', 'blue']:
+            self.assertEqual(list(paint(mask, color, effects, background).getdata()),
+                             list(paint(mask, color, effects).getdata()))
+
+
+if __name__ == '__main__':
+    unittest.main()
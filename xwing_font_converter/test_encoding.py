@@ -0,0 +1,109 @@
+"""
+Unit testing of ImageEncoder class
+"""
+import io
+import unittest
+
+from PIL import Image, ImageDraw, features
+
+from encoding import ImageEncoder
+from metrics import Metrics
+
+
+def get_glyph_image(color=(0, 0, 0), size=72):
+    """
+    :return: Single color RGBA image with antialiased edges, like rendered glyphs
+    :rtype: PIL.Image.Image
+    """
+    mask = Image.new('L', (size, size), 0)
+    ImageDraw.Draw(mask).ellipse((size // 7, size // 7, size - size // 7, size - size // 7), fill=255)
+    mask.putpixel((size // 7, size // 2), 100)
+    for x in range(size // 7, size // 2):
+        mask.putpixel((x, size // 2 + 1), x * 255 // size)  # alpha ramp
+    image = Image.new('RGBA', mask.size, color + (0,))
+    image.putalpha(mask)
+    return image
+
+
+class TestImageEncoder(unittest.TestCase):
+
+    def test_unknown_compression(self):
+        self.assertRaises(AttributeError, ImageEncoder, 'ultra')
+
+    def test_png_lossless(self):
+        for color in [(0, 0, 0), (255, 0, 0)]:
+            image = get_glyph_image(color)
+            for compression in ['fast', 'default', 'best']:
+                decoded = Image.open(io.BytesIO(ImageEncoder(compression).encode(image, 'png'))).convert('RGBA')
+                self.assertEqual(list(decoded.getdata()), list(image.getdata()),
+                                 'PNG should be lossless ({})'.format(compression))
+
+    def test_png_gray(self):
+        decoded = Image.open(io.BytesIO(ImageEncoder().encode(get_glyph_image(), 'png')))
+        self.assertEqual(decoded.mode, 'LA', 'Gray glyphs should be stored as grayscale')
+
+    def test_png_single_color(self):
+        image = get_glyph_image((70, 130, 180), size=512)
+        rgba_data = io.BytesIO()
+        image.save(rgba_data, format='PNG', compress_level=6)
+        for compression in ['default', 'best']:
+            data = ImageEncoder(compression).encode(image, 'png')
+            decoded = Image.open(io.BytesIO(data))
+            self.assertEqual(decoded.mode, 'P', 'Colored glyphs should be stored as palette when smaller ({})'
+                             .format(compression))
+            self.assertEqual(list(decoded.convert('RGBA').getdata()), list(image.getdata()))
+            self.assertLess(len(data), len(rgba_data.getvalue()))
+
+        image.putpixel((0, 0), (0, 0, 0, 0))  # other color, even if transparent
+        decoded = Image.open(io.BytesIO(ImageEncoder('best').encode(image, 'png')))
+        self.assertEqual(decoded.mode, 'RGBA', 'Many colors glyphs should not be stored as palette')
+
+    def test_png_best_smallest(self):
+        image = get_glyph_image((255, 0, 0))
+        self.assertLessEqual(len(ImageEncoder('best').encode(image, 'png')),
+                             len(ImageEncoder('default').encode(image, 'png')))
+
+    def test_metadata_stripped(self):
+        image = get_glyph_image()
+        image.info['dpi'] = (300, 300)
+        image.info['icc_profile'] = b'profile'
+        decoded = Image.open(io.BytesIO(ImageEncoder().encode(image, 'png')))
+        self.assertNotIn('dpi', decoded.info)
+        self.assertNotIn('icc_profile', decoded.info)
+        self.assertEqual(image.info['dpi'], (300, 300), 'Metadata of given image should be kept')
+
+    def test_gif_single_color(self):
+        image = get_glyph_image((255, 0, 0))
+        decoded = Image.open(io.BytesIO(ImageEncoder().encode(image, 'gif'))).convert('RGBA')
+        self.assertEqual(decoded.getpixel((36, 36)), (255, 0, 0, 255))
+        self.assertEqual(decoded.getpixel((0, 0))[3], 0, 'Background should be transparent')
+        self.assertEqual(decoded.getpixel((10, 36))[3], 0, 'Alpha below threshold should be transparent')
+
+    def test_gif_many_colors(self):
+        image = get_glyph_image()
+        image.paste((0, 0, 255, 255), (30, 30, 40, 40))
+        decoded = Image.open(io.BytesIO(ImageEncoder().encode(image, 'gif'))).convert('RGBA')
+        self.assertEqual(decoded.getpixel((35, 35)), (0, 0, 255, 255))
+        self.assertEqual(decoded.getpixel((20, 36)), (0, 0, 0, 255))
+        self.assertEqual(decoded.getpixel((0, 0))[3], 0)
+
+    @unittest.skipUnless(features.check('webp'), 'Pillow built without webp')
+    def test_webp_lossless(self):
+        image = get_glyph_image((255, 0, 0))
+        decoded = Image.open(io.BytesIO(ImageEncoder().encode(image, 'webp'))).convert('RGBA')
+        self.assertEqual([pixel for pixel in decoded.getdata() if pixel[3]],
+                         [pixel for pixel in image.getdata() if pixel[3]], 'WebP should be lossless')
+
+    def test_encoded_bytes(self):
+        metrics = Metrics()
+        data = ImageEncoder(metrics=metrics).encode(get_glyph_image(), 'png')
+        self.assertEqual(metrics.get_samples('encoded_bytes'), [len(data)])
+        self.assertEqual(metrics.summary()['values']['encoded_bytes']['total'], len(data))
+
+    def test_magick_args(self):
+        self.assertEqual(ImageEncoder('best').magick_args('png'), ['-strip', '-define', 'png:compression-level=9'])
+        self.assertEqual(ImageEncoder().magick_args('gif'), ['-strip'])
+
+
+if __name__ == '__main__':
+    unittest.main()
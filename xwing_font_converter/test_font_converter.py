@@ -1,13 +1,20 @@
 """
 Unit testing of FontConverter class
 """
+import glob
+import io
+import json
 import logging
 import os
 import shutil
+import tempfile
 import time
 import unittest
+import zipfile
 
-from font_converter import FontConverter
+from PIL import Image
+
+from font_converter import FontConverter, ConversionCancelled, ConversionError, DEFAULT_SIZE
 
 
 class TestFontConverter(unittest.TestCase):
@@ -29,30 +36,322 @@ class TestFontConverter(unittest.TestCase):
         self.assertTrue(self.fc.init_font_converter(), 'Unable to init font converter')
         self.assertTrue(os.path.exists(self._output_folder), 'Unable to create output folder')
 
+    def test_init_wrong_backend(self):
+        fc = FontConverter(map_file_path=os.path.join('resources', 'ships-map.json'),
+                           ttf_file_path=os.path.join('resources', 'xwing-miniatures-ships.ttf'),
+                           output_folder=self._output_folder,
+                           backend='WRONG_BACKEND')
+        self.assertFalse(fc.init_font_converter(), 'Init should fail with unknown backend')
+
     def test_get_element_on_map(self):
         self.fc.init_font_converter()
         self.fc.get_elements_from_map()
         self.assertNotEqual(len(self.fc.element_map), 0, 'Element map should not be empty')
 
+    def test_get_element_on_map_coverage(self):
+        map_folder = tempfile.mkdtemp()
+        try:
+            map_file = os.path.join(map_folder, 'map.json')
+            with open(map_file, 'w') as map_json:
+                json.dump({'ships': {'t65xwing': 'x', 'space': ' ', 'unknown': u'\u4e00'}}, map_json)
+            fc = FontConverter(map_file_path=map_file,
+                               ttf_file_path=os.path.join('resources', 'xwing-miniatures-ships.ttf'))
+            fc.init_font_converter()
+            self.assertIn(ord('x'), fc.coverage)
+            self.assertNotIn(ord(' '), fc.coverage, 'Glyph without outline should not be covered')
+
+            fc.get_elements_from_map()
+            self.assertEqual(fc.element_map, {'t65xwing': ord('x')})
+            self.assertEqual(fc.missing_elements, {'space': 0x20, 'unknown': 0x4e00},
+                             'Skipped elements should be reported')
+
+            fc.get_elements_from_map(check_coverage=False)
+            self.assertEqual(len(fc.element_map), 3)
+        finally:
+            shutil.rmtree(map_folder)
+
     def test_convert_2_images(self):
         self.fc.init_font_converter()
         self.fc.get_elements_from_map()
         self.fc.convert_2_images(color='black', point_size=50, file_format='gif')
         self.assertNotEqual(len(os.listdir(self._output_folder)), 0, 'Output folder should not be empty')
 
+    def test_convert_2_images_pillow_backend(self):
+        self.fc.init_font_converter()
+        self.fc.get_elements_from_map()
+        self.fc.convert_2_images(color='red', point_size=50, file_format='png')
+        image = Image.open(os.path.join(self._output_folder, 't65xwing-red.png'))
+        self.assertEqual(image.size, (DEFAULT_SIZE, DEFAULT_SIZE), 'Image should keep default size')
+        self.assertIsNotNone(image.split()[-1].getbbox(), 'Glyph should not be fully transparent')
+        self.assertEqual(image.getpixel((0, 0))[3], 0, 'Background should be transparent')
+
+    def test_convert_2_images_metrics(self):
+        self.fc.init_font_converter()
+        self.fc.get_elements_from_map()
+        self.fc.convert_2_images(color=['black', 'red'], point_size=50, file_format='png', jobs=2)
+        summary = self.fc.metrics.summary()
+        images = glob.glob1(self._output_folder, '*.png')
+        self.assertEqual(summary['timers']['glyph']['count'], len(self.fc.element_map), 'One timer per element')
+        self.assertEqual(summary['timers']['encode']['count'], len(images), 'One timer per image')
+        self.assertEqual(summary['counters']['images_written'], len(images))
+        self.assertEqual(summary['counters']['bytes_written'],
+                         sum(os.path.getsize(os.path.join(self._output_folder, image)) for image in images))
+        self.assertEqual(summary['timers']['stage.convert_2_images']['count'], 1)
+
+    def test_convert_2_images_svg(self):
+        self.fc.init_font_converter()
+        self.fc.get_elements_from_map()
+        self.fc.convert_2_images(color='red', file_format='svg', size=[32, 64])
+        self.assertEqual(len(glob.glob1(self._output_folder, '*.svg')), 2 * len(self.fc.element_map))
+        with open(os.path.join(self._output_folder, 't65xwing-red-64px.svg'), 'r') as svg_file:
+            self.assertIn('height="64"', svg_file.read())
+
+        self.fc.resize_images(16)  # nothing to do on vector images
+        self.assertRaises(AttributeError, self.fc.convert_2_atlas, file_format='svg')
+
+    def test_convert_2_images_webp(self):
+        self.fc.init_font_converter()
+        self.fc.get_elements_from_map()
+        self.fc.convert_2_images(color='red', file_format='webp')
+        self.assertEqual(len(glob.glob1(self._output_folder, '*.webp')), len(self.fc.element_map))
+        self.assertEqual(self.fc.metrics.summary()['values']['encoded_bytes']['count'], len(self.fc.element_map))
+
+    def test_convert_2_images_progress(self):
+        self.fc.init_font_converter()
+        self.fc.get_elements_from_map()
+        calls = []
+        self.fc.convert_2_images(color='black', jobs=2, progress=lambda *args: calls.append(args))
+        self.assertEqual([done for done, _, _ in calls], list(range(1, len(self.fc.element_map) + 1)))
+        self.assertEqual(set(total for _, total, _ in calls), {len(self.fc.element_map)})
+        self.assertEqual([element for _, _, element in calls], sorted(self.fc.element_map))
+
+    def test_convert_2_images_cancel(self):
+        self.fc.init_font_converter()
+        self.fc.get_elements_from_map()
+
+        def cancel_after_first(done, total, element):
+            self.fc.cancel()
+
+        self.assertRaises(ConversionCancelled, self.fc.convert_2_images, color='black', jobs=1,
+                          progress=cancel_after_first)
+        self.assertTrue(self.fc.cancelled)
+        self.assertEqual(len(self.fc.output_files), 1, 'Pending elements should be skipped')
+
+        self.assertRaises(ConversionCancelled, self.fc.convert_2_images, color='black', jobs=1)
+        self.assertEqual(len(self.fc.output_files), 0, 'Cancel made before conversion starts should not be lost')
+
+        self.fc.reset_cancel()
+        self.fc.convert_2_images(color='black', jobs=1)
+        self.assertFalse(self.fc.cancelled, 'Cancellation should be forgotten once reset')
+        self.assertEqual(len(self.fc.output_files), len(self.fc.element_map) - 1, 'Written image should be kept')
+
+    def test_convert_2_images_jobs(self):
+        self.fc.init_font_converter()
+        self.fc.get_elements_from_map()
+        self.fc.convert_2_images(color='black', point_size=50, file_format='gif', jobs=1)
+        sequential = sorted(os.listdir(self._output_folder))
+        shutil.rmtree(self._output_folder)
+        os.makedirs(self._output_folder)
+        self.fc.convert_2_images(color='black', point_size=50, file_format='gif', jobs=4)
+        self.assertEqual(sorted(os.listdir(self._output_folder)), sequential, 'Parallel run should give same files')
+
+    def test_convert_2_images_errors_collected(self):
+        self.fc.init_font_converter()
+        self.fc.get_elements_from_map()
+        with self.assertRaises(ConversionError) as context:
+            self.fc.convert_2_images(point_size=-3, jobs=2)
+        self.assertEqual(sorted(context.exception.errors), sorted(self.fc.element_map),
+                         'All failing elements should be reported')
+
+    def test_convert_2_images_trim_resize(self):
+        self.fc.init_font_converter()
+        self.fc.get_elements_from_map()
+        self.fc.convert_2_images(color='black', point_size=50, file_format='png', trim=True, size=20)
+        for f_name in glob.glob1(self._output_folder, '*.png'):
+            image = Image.open(os.path.join(self._output_folder, f_name))
+            self.assertEqual(image.size[1], 20, 'Image should be resized by height')
+            self.assertLess(image.size[0], DEFAULT_SIZE, 'Image should be trimmed')
+
+    def test_trim_images_only_converted(self):
+        self.fc.init_font_converter()
+        self.fc.get_elements_from_map()
+        other_file = os.path.join(self._output_folder, 'other.png')
+        Image.new('RGBA', (DEFAULT_SIZE, DEFAULT_SIZE)).save(other_file)
+        self.fc.convert_2_images(color='black', point_size=50, file_format='gif')
+        self.fc.trim_images()
+        self.assertEqual(Image.open(other_file).size, (DEFAULT_SIZE, DEFAULT_SIZE), 'Other files should be untouched')
+
+    def test_convert_2_images_batch(self):
+        self.fc.init_font_converter()
+        self.fc.get_elements_from_map()
+        self.fc.convert_2_images(color=['black', 'red'], point_size=[40, 50], size=[20, DEFAULT_SIZE],
+                                 file_format='png')
+        self.assertEqual(len(glob.glob1(self._output_folder, '*.png')), 8 * len(self.fc.element_map),
+                         'Every combination of options should be generated')
+        image = Image.open(os.path.join(self._output_folder, 't65xwing-red-40pt-20px.png'))
+        self.assertEqual(image.size[1], 20, 'Image should be resized to its batch size')
+        self.assertEqual(set(color[:3] for _, color in image.getcolors()), {(255, 0, 0)},
+                         'Resized mask should be tinted with requested color only')
+
+    def test_convert_2_images_incremental(self):
+        self.fc.init_font_converter()
+        self.fc.get_elements_from_map()
+        self.fc.convert_2_images(color='black', point_size=50, file_format='png')
+        image_file = os.path.join(self._output_folder, 't65xwing-black.png')
+        os.remove(image_file)
+        self.fc.convert_2_images(color='black', point_size=50, file_format='png')
+        self.assertEqual(self.fc.output_files, [image_file], 'Only missing image should be rendered')
+        self.fc.convert_2_images(color='black', point_size=40, file_format='png')
+        self.assertEqual(len(self.fc.output_files), len(self.fc.element_map), 'Changed option should render again')
+        self.fc.convert_2_images(color='black', point_size=40, file_format='png', force=True)
+        self.assertEqual(len(self.fc.output_files), len(self.fc.element_map), 'Forced conversion should render all')
+
+    def test_convert_2_images_effects(self):
+        self.fc.init_font_converter()
+        self.fc.get_elements_from_map()
+        self.fc.convert_2_images(color='#ff000080', point_size=50, file_format='png', trim=True)
+        image_file = os.path.join(self._output_folder, 't65xwing-ff000080.png')
+        plain = Image.open(image_file).convert('RGBA')
+        self.assertEqual(max(color for _, color in plain.getcolors()), (255, 0, 0, 128),
+                         'Hex color alpha should be kept')
+
+        self.fc.convert_2_images(color='#ff000080', point_size=50, file_format='png', trim=True,
+                                 effects=['stroke:white:2'])
+        self.assertEqual(len(self.fc.output_files), len(self.fc.element_map), 'Changed effects should render again')
+        stroked = Image.open(image_file).convert('RGBA')
+        self.assertEqual(stroked.size, (plain.size[0] + 4, plain.size[1] + 4), 'Image should fit outline')
+        self.assertIn((255, 255, 255, 255), [color for _, color in stroked.getcolors(4096)])
+
+    def test_convert_2_images_wrong_effect(self):
+        self.fc.init_font_converter()
+        self.fc.get_elements_from_map()
+        self.assertRaises(AttributeError, self.fc.convert_2_images, effects=['blur'])
+        self.assertRaises(AttributeError, self.fc.convert_2_images, file_format='svg', effects=['stroke'])
+
+    def test_convert_2_images_scales(self):
+        self.fc.init_font_converter()
+        self.fc.get_elements_from_map()
+        self.fc.convert_2_images(color='black', point_size=50, file_format='png', trim=True, size=20, scales=[1, 2, 3])
+        self.assertEqual(len(glob.glob1(self._output_folder, '*.png')), 3 * len(self.fc.element_map))
+        images = [Image.open(os.path.join(self._output_folder, name))
+                  for name in ['t65xwing-black.png', 't65xwing-black@2x.png', 't65xwing-black@3x.png']]
+        self.assertEqual(images[0].size[1], 20, 'Image should be resized to size')
+        for scale, image in enumerate(images[1:], 2):
+            self.assertEqual(image.size, (images[0].size[0] * scale, images[0].size[1] * scale),
+                             'Image should keep exact ratio with @1x one')
+        self.assertEqual(len(self.fc.metrics.get_samples('rasterize')), len(self.fc.element_map),
+                         'Glyphs should be rendered once for all scales')
+
+    def test_convert_2_images_wrong_scales(self):
+        self.fc.init_font_converter()
+        self.fc.get_elements_from_map()
+        self.assertRaises(AttributeError, self.fc.convert_2_images, scales=[0, 1])
+        self.assertRaises(AttributeError, self.fc.convert_2_images, file_format='svg', scales=[1, 2])
+
+    def test_convert_2_images_elements(self):
+        self.fc.init_font_converter()
+        self.fc.get_elements_from_map()
+        self.fc.convert_2_images(color='black', file_format='png', elements=['t65xwing'])
+        self.assertEqual(self.fc.output_files, [os.path.join(self._output_folder, 't65xwing-black.png')],
+                         'Only given elements should be converted')
+        self.assertRaises(AttributeError, self.fc.convert_2_images, elements=['WRONG_ELEMENT'])
+        self.assertRaises(AttributeError, self.fc.convert_2_images, elements=['t65xwing'], prune=True)
+
+    def test_convert_2_images_prune(self):
+        self.fc.init_font_converter()
+        self.fc.get_elements_from_map()
+        other_file = os.path.join(self._output_folder, 'other.png')
+        Image.new('RGBA', (DEFAULT_SIZE, DEFAULT_SIZE)).save(other_file)
+        self.fc.convert_2_images(color='black', point_size=50, file_format='png')
+        self.fc.convert_2_images(color='red', point_size=50, file_format='png', prune=True)
+        self.assertEqual(glob.glob1(self._output_folder, '*-black.png'), [], 'Stale images should be removed')
+        self.assertTrue(os.path.exists(other_file), 'Files not written by converter should be kept')
+
+    def test_convert_2_atlas(self):
+        self.fc.init_font_converter()
+        self.fc.get_elements_from_map()
+        index = self.fc.convert_2_atlas(color='black', point_size=50, file_format='png', atlas_size=256)
+        self.assertEqual(len(index), len(self.fc.element_map), 'All images should be indexed')
+        self.assertTrue(os.path.exists(os.path.join(self._output_folder, 'atlas.css')), 'CSS index should be written')
+        with open(os.path.join(self._output_folder, 'atlas.json')) as index_file:
+            self.assertEqual(json.load(index_file), index, 'JSON index should be written')
+        atlas = Image.open(os.path.join(self._output_folder, index['t65xwing-black']['atlas']))
+        self.assertLessEqual(max(atlas.size), 256, 'Atlas should not exceed its size')
+
+    def test_convert_2_images_cache(self):
+        cache_dir = tempfile.mkdtemp()
+        try:
+            fc = FontConverter(map_file_path=os.path.join('resources', 'ships-map.json'),
+                               ttf_file_path=os.path.join('resources', 'xwing-miniatures-ships.ttf'),
+                               output_folder=self._output_folder,
+                               cache_dir=cache_dir)
+            fc.init_font_converter()
+            fc.get_elements_from_map()
+            fc.convert_2_images(color='black', point_size=50, file_format='png', force=True)
+            self.assertNotEqual(os.listdir(cache_dir), [], 'Cache should be filled')
+            uncached = Image.open(os.path.join(self._output_folder, 't65xwing-black.png')).tobytes()
+            fc.convert_2_images(color='black', point_size=50, file_format='png', force=True)
+            cached = Image.open(os.path.join(self._output_folder, 't65xwing-black.png')).tobytes()
+            self.assertEqual(cached, uncached, 'Cached mask should give same image')
+        finally:
+            shutil.rmtree(cache_dir)
+
+    def test_iter_images(self):
+        fc = FontConverter(map_file_path=os.path.join('resources', 'ships-map.json'),
+                           ttf_file_path=os.path.join('resources', 'xwing-miniatures-ships.ttf'))
+        self.assertTrue(fc.init_font_converter(), 'Output folder should not be required')
+        self.assertFalse(os.path.exists(self._output_folder), 'No folder should be created')
+        fc.get_elements_from_map()
+        images = fc.iter_images(color='black', point_size=50, file_format='png', jobs=2)
+        name, data = next(images)
+        self.assertEqual(name, sorted(fc.element_map)[0] + '-black.png', 'Images should be yielded in elements order')
+        self.assertEqual(Image.open(io.BytesIO(data)).size, (DEFAULT_SIZE, DEFAULT_SIZE))
+        self.assertEqual(len(list(images)) + 1, len(fc.element_map), 'All elements should be yielded')
+        with self.assertRaises(AttributeError):
+            fc.convert_2_images()
+
+        images = fc.iter_images(color='black', point_size=50, file_format='png', jobs=1)
+        fc.cancel()
+        with self.assertRaises(ConversionCancelled):
+            list(images)  # cancel before iteration should not be lost
+
+    def test_convert_2_archive(self):
+        fc = FontConverter(map_file_path=os.path.join('resources', 'ships-map.json'),
+                           ttf_file_path=os.path.join('resources', 'xwing-miniatures-ships.ttf'))
+        fc.init_font_converter()
+        fc.get_elements_from_map()
+        archive_folder = tempfile.mkdtemp()
+        try:
+            archive_path = os.path.join(archive_folder, 'ships.zip')
+            fc.convert_2_archive(archive_path, color='black', file_format='png', trim=True)
+            with zipfile.ZipFile(archive_path) as archive:
+                self.assertEqual(archive.namelist(), [element + '-black.png' for element in sorted(fc.element_map)])
+                image = Image.open(io.BytesIO(archive.read(archive.namelist()[0])))
+                self.assertLess(image.size[1], DEFAULT_SIZE, 'Images should be trimmed')
+            self.assertEqual(os.listdir(archive_folder), ['ships.zip'], 'No image file should be written')
+            self.assertEqual(fc.metrics.get_counter('images_written'), len(fc.element_map))
+
+            for options in [{'color': 'WRONG_COLOR'}, {'file_format': 'jpg'}, {'effects': ['blur']},
+                            {'scales': [0]}, {'elements': ['unknown']}]:
+                wrong_path = os.path.join(archive_folder, 'wrong.tar')
+                self.assertRaises(AttributeError, fc.convert_2_archive, wrong_path, **options)
+                self.assertFalse(os.path.exists(wrong_path), 'No archive should be created with wrong options')
+        finally:
+            shutil.rmtree(archive_folder)
+
     def test_convert_2_images_wrong_color(self):
         self.fc.init_font_converter()
         self.fc.get_elements_from_map()
         with self.assertRaises(AttributeError) as context:
             self.fc.convert_2_images(color='WRONG_COLOR')
-        self.assertIn("WRONG_COLOR", context.exception.message, "Should display error message")
+        self.assertIn("WRONG_COLOR", str(context.exception), "Should display error message")
 
     def test_convert_2_images_wrong_format(self):
         self.fc.init_font_converter()
         self.fc.get_elements_from_map()
         with self.assertRaises(AttributeError) as context:
             self.fc.convert_2_images(file_format='jpg')
-        self.assertIn("jpg", context.exception.message, "Should display error message")
+        self.assertIn("jpg", str(context.exception), "Should display error message")
 
     def test_trim_images(self):
         self.fc.init_font_converter()
@@ -72,6 +371,18 @@ class TestFontConverter(unittest.TestCase):
         diff = set(old_date.values()).intersection(new_date.values())
         self.assertEqual(len(diff), 0, "No updated date found, mean image not updated")
 
+    def test_process_images_jobs(self):
+        self.fc.init_font_converter()
+        self.fc.get_elements_from_map()
+        contents = []
+        for jobs in [1, 3]:
+            self.fc.convert_2_images(color='black', point_size=50, file_format='png', force=True)
+            self.fc.trim_images(jobs=jobs)
+            self.fc.resize_images(20, jobs=jobs)
+            contents.append([Image.open(output_file).size for output_file in self.fc.output_files])
+        self.assertEqual(contents[0], contents[1], 'Parallel processing should give same images')
+        self.assertTrue(all(height == 20 for _, height in contents[0]))
+
     def resize_images(self):
         self.fc.init_font_converter()
         self.fc.get_elements_from_map()
@@ -91,7 +402,8 @@ class TestFontConverter(unittest.TestCase):
         self.assertEqual(len(diff), 0, "No updated date found, mean image not updated")
 
     def tearDown(self):
-        shutil.rmtree(self._output_folder)
+        if os.path.exists(self._output_folder):
+            shutil.rmtree(self._output_folder)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,75 @@
+"""
+Unit testing of font comparison
+"""
+import os
+import shutil
+import tempfile
+import unittest
+
+from fontTools.ttLib import TTFont
+
+from font_diff import diff_fonts, get_glyph_hashes
+
+TTF_FILE = os.path.join('resources', 'xwing-miniatures-ships.ttf')
+ELEMENTS = {'t65xwing': ord('x'), 'btla4ywing': ord('y'), 'aggressorassaultfighter': ord('i')}
+
+
+class TestFontDiff(unittest.TestCase):
+
+    def setUp(self):
+        super(TestFontDiff, self).setUp()
+
+        self._folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self._folder)
+
+    def __save_font(self, shrunk_characters=()):
+        """
+        :return: Path of a rebuilt copy of font, outlines of given characters being shrunk
+        :rtype: str
+        """
+        font = TTFont(TTF_FILE)
+        cmap = font.getBestCmap()
+        for character in shrunk_characters:
+            coordinates = font['glyf'][cmap[ord(character)]].coordinates
+            for index, (x, y) in enumerate(coordinates):
+                coordinates[index] = (x // 2, y // 2)
+        ttf_file = os.path.join(self._folder, 'font-{}.ttf'.format(''.join(shrunk_characters)))
+        font.save(ttf_file)
+        font.close()
+        return ttf_file
+
+    def test_rebuilt_font_unchanged(self):
+        self.assertEqual(get_glyph_hashes(TTF_FILE, ELEMENTS.values()),
+                         get_glyph_hashes(self.__save_font(), ELEMENTS.values()),
+                         'Glyphs should be compared from outlines, not font file')
+
+    def test_missing_glyph(self):
+        self.assertIsNone(get_glyph_hashes(TTF_FILE, [0x4e00])[0x4e00])
+
+    def test_diff_fonts(self):
+        new_elements = dict(ELEMENTS, xwing=ord('x'))
+        del new_elements['aggressorassaultfighter']
+        diff = diff_fonts(ELEMENTS, TTF_FILE, new_elements, self.__save_font('y'))
+        self.assertEqual(diff.added, ['xwing'])
+        self.assertEqual(diff.removed, ['aggressorassaultfighter'])
+        self.assertEqual(diff.modified, ['btla4ywing'])
+        self.assertEqual(diff.unchanged, ['t65xwing'])
+        self.assertEqual(diff.changed, ['btla4ywing', 'xwing'])
+
+    def test_diff_fonts_moved_code_point(self):
+        new_elements = dict(ELEMENTS, t65xwing=0xe000)
+        ttf_file = self.__save_font()
+        font = TTFont(ttf_file)
+        for table in font['cmap'].tables:
+            if table.isUnicode() and table.format != 0:
+                table.cmap[0xe000] = table.cmap[ord('x')]
+        font.save(ttf_file)
+        font.close()
+        self.assertEqual(diff_fonts(ELEMENTS, TTF_FILE, new_elements, ttf_file).modified, [],
+                         'Element with same glyph at another code point should be unchanged')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+"""
+Unit testing of ImageMagick commands location and arguments escaping
+"""
+import os
+import shutil
+import stat
+import tempfile
+import unittest
+
+from magick import escape_text, find_imagemagick
+
+
+class TestMagick(unittest.TestCase):
+
+    def setUp(self):
+        super(TestMagick, self).setUp()
+
+        self._folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self._folder)
+
+    def add_command(self, name):
+        """
+        Create an empty executable in test folder
+        """
+        path = os.path.join(self._folder, name)
+        open(path, 'w').close()
+        os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR)
+        return path
+
+    def test_find_imagemagick_6(self):
+        convert, mogrify = self.add_command('convert'), self.add_command('mogrify')
+        self.assertEqual(find_imagemagick(self._folder), {'convert': [convert], 'mogrify': [mogrify]})
+
+    def test_find_imagemagick_7(self):
+        self.add_command('convert')
+        self.add_command('mogrify')
+        magick = self.add_command('magick')
+        self.assertEqual(find_imagemagick(self._folder), {'convert': [magick], 'mogrify': [magick, 'mogrify']},
+                         'magick command should be preferred')
+
+    def test_find_imagemagick_missing(self):
+        self.add_command('convert')  # eg: windows disk tool
+        self.assertRaises(ImportError, find_imagemagick, self._folder)
+
+    def test_escape_text(self):
+        self.assertEqual(escape_text(u'x'), u'x')
+        self.assertEqual(escape_text(u'%'), u'%%')
+        self.assertEqual(escape_text(u'\\'), u'\\\\')
+        self.assertEqual(escape_text(u'@'), u'\\@', 'Text should not be read from a file')
+
+
+if __name__ == '__main__':
+    unittest.main()
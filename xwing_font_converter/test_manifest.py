@@ -0,0 +1,62 @@
+"""
+Unit testing of Manifest class
+"""
+import logging
+import os
+import shutil
+import tempfile
+import unittest
+
+from manifest import Manifest, MANIFEST_FILE_NAME
+
+
+class TestManifest(unittest.TestCase):
+
+    def setUp(self):
+        super(TestManifest, self).setUp()
+
+        # disable log during tests
+        logging.disable(logging.CRITICAL)
+
+        self._output_folder = tempfile.mkdtemp()
+        self._image_file = os.path.join(self._output_folder, 'image.png')
+        open(self._image_file, 'w').close()
+
+    def test_save_load(self):
+        manifest = Manifest(self._output_folder)
+        manifest.update(self._image_file, {'color': 'black', 'trim': False})
+        manifest.save()
+
+        manifest = Manifest(self._output_folder)
+        manifest.load()
+        self.assertTrue(manifest.is_up_to_date(self._image_file, {'color': 'black', 'trim': False}))
+        self.assertFalse(manifest.is_up_to_date(self._image_file, {'color': 'black', 'trim': True}),
+                         'Changed input should not be up to date')
+
+    def test_missing_image(self):
+        manifest = Manifest(self._output_folder)
+        manifest.update(self._image_file, {})
+        os.remove(self._image_file)
+        self.assertFalse(manifest.is_up_to_date(self._image_file, {}), 'Missing image should not be up to date')
+
+    def test_invalid_manifest(self):
+        with open(os.path.join(self._output_folder, MANIFEST_FILE_NAME), 'w') as manifest_file:
+            manifest_file.write('{not json')
+        manifest = Manifest(self._output_folder)
+        manifest.load()
+        self.assertEqual(manifest.entries, {}, 'Invalid manifest should be ignored')
+
+    def test_prune(self):
+        manifest = Manifest(self._output_folder)
+        manifest.update(self._image_file, {})
+        manifest.update(os.path.join(self._output_folder, 'kept.png'), {})
+        self.assertEqual(manifest.prune([os.path.join(self._output_folder, 'kept.png')]), ['image.png'])
+        self.assertFalse(os.path.exists(self._image_file), 'Stale image should be removed')
+        self.assertEqual(list(manifest.entries), ['kept.png'])
+
+    def tearDown(self):
+        shutil.rmtree(self._output_folder)
+
+
+if __name__ == '__main__':
+    unittest.main()
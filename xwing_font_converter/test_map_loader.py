@@ -0,0 +1,104 @@
+# coding=utf-8
+"""
+Unit testing of map loading
+"""
+import io
+import logging
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from map_loader import INDEX_EXTENSION, get_code_point, load_map, parse_scss_map
+
+SCSS_MAP = u"""// ships of the game
+$ship-map: (
+  'aggressorassaultfighter': 'i',
+  "alphaclassstarwing": '&',
+  quote: "'",  /* unquoted name */
+  'base-all': '\\00c0',
+  'empty': '',
+);
+"""
+
+
+class TestMapLoader(unittest.TestCase):
+
+    def setUp(self):
+        super(TestMapLoader, self).setUp()
+
+        # disable log during tests
+        logging.disable(logging.CRITICAL)
+
+        self._folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self._folder)
+
+    def __write_map(self, name, content):
+        map_file = os.path.join(self._folder, name)
+        with io.open(map_file, 'w', encoding='utf-8') as map_output:
+            map_output.write(content)
+        return map_file
+
+    def test_get_code_point(self):
+        self.assertEqual(get_code_point(u'i'), ord('i'))
+        self.assertEqual(get_code_point(u'\\011E'), 0x011e, 'CSS escape should be decoded')
+        self.assertEqual(get_code_point(u'\\\''), ord("'"))
+        self.assertEqual(get_code_point(u'\\1F600'), 0x1f600)
+        self.assertIsNone(get_code_point(u'ab'))
+        self.assertIsNone(get_code_point(u''))
+
+    def test_parse_scss_map(self):
+        self.assertEqual(parse_scss_map(SCSS_MAP), [('aggressorassaultfighter', 'i'), ('alphaclassstarwing', '&'),
+                                                    ('quote', "'"), ('base-all', '\\00c0'), ('empty', '')])
+
+    def test_load_scss_map(self):
+        element_map = load_map(self.__write_map('_ships-map.scss', SCSS_MAP), use_index=False)
+        self.assertEqual(element_map, {'aggressorassaultfighter': ord('i'), 'alphaclassstarwing': ord('&'),
+                                       'quote': ord("'"), 'base-all': 0xc0}, 'Empty entry should be ignored')
+
+    def test_load_json_map_sections(self):
+        map_file = self.__write_map('map.json', u'{"ships": {"t65xwing": "x"}, "icons": {"agility": "\\\\005e"}, '
+                                               u'"version": 2}')
+        self.assertEqual(load_map(map_file, use_index=False), {'t65xwing': ord('x'), 'agility': 0x5e},
+                         'All sections should be loaded')
+
+    def test_load_bundled_map(self):
+        map_file = os.path.join(self._folder, 'ships-map.json')
+        shutil.copy(os.path.join('resources', 'ships-map.json'), map_file)
+        element_map = load_map(map_file)
+        self.assertEqual(len(element_map), 56)
+        self.assertEqual(element_map['t65xwing'], ord('x'))
+
+    def test_index(self):
+        map_file = self.__write_map('map.json', u'{"ships": {"t65xwing": "x", "Ğship": "Ğ"}}')
+        element_map = load_map(map_file)
+        self.assertTrue(os.path.exists(map_file + INDEX_EXTENSION), 'Index should be written next to map')
+
+        # index is trusted while map is unchanged
+        with open(map_file + INDEX_EXTENSION, 'r+b') as index_file:
+            index_file.seek(-1, os.SEEK_END)
+            index_file.write(b'z')
+        self.assertEqual(load_map(map_file)[u'Ğshiz'], 0x011e, 'Unchanged map should be read from index')
+
+        # touched map with same content keeps index
+        os.utime(map_file, (time.time() + 10, time.time() + 10))
+        self.assertIn(u'Ğshiz', load_map(map_file))
+
+        # changed map is parsed again
+        self.__write_map('map.json', u'{"ships": {"t65xwing": "y"}}')
+        os.utime(map_file, (time.time() + 20, time.time() + 20))
+        self.assertEqual(load_map(map_file), {'t65xwing': ord('y')})
+        self.assertEqual(element_map[u'Ğship'], 0x011e)
+
+    def test_corrupted_index(self):
+        map_file = self.__write_map('map.json', u'{"ships": {"t65xwing": "x"}}')
+        with open(map_file + INDEX_EXTENSION, 'wb') as index_file:
+            index_file.write(b'XWMI\x00')
+        self.assertEqual(load_map(map_file), {'t65xwing': ord('x')}, 'Corrupted index should be ignored')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+"""
+Unit testing of metrics
+"""
+import os
+import pstats
+import tempfile
+import unittest
+from multiprocessing.pool import ThreadPool
+
+from metrics import MAX_SAMPLES, Metrics, percentile, profile, timed
+
+
+def busy_function(value):
+    return sum(range(value))
+
+
+class TestMetrics(unittest.TestCase):
+
+    def test_percentile(self):
+        values = [5, 1, 4, 2, 3]
+        self.assertEqual(percentile(values, 50), 3)
+        self.assertEqual(percentile(values, 95), 5)
+        self.assertEqual(percentile(values, 0), 1)
+        self.assertIsNone(percentile([], 50))
+
+    def test_timers_and_counters(self):
+        metrics = Metrics()
+        events = []
+        metrics.add_observer(lambda kind, name, value, tags: events.append((kind, name, tags)))
+
+        for seconds in [0.001, 0.003, 0.002]:
+            metrics.record('encode', seconds, element='t65xwing')
+        with metrics.timer('write'):
+            pass
+        metrics.count('bytes_written', 10)
+        metrics.count('bytes_written', 5)
+
+        summary = metrics.summary()
+        self.assertEqual(summary['timers']['encode']['count'], 3)
+        self.assertEqual(summary['timers']['encode']['p50_ms'], 2)
+        self.assertEqual(summary['timers']['encode']['max_ms'], 3)
+        self.assertEqual(summary['timers']['write']['count'], 1)
+        self.assertEqual(summary['counters'], {'bytes_written': 15})
+        self.assertEqual(events[0], ('timer', 'encode', {'element': 't65xwing'}))
+        self.assertEqual(len(events), 6, 'Observer should be called on each measure')
+
+        metrics.reset()
+        self.assertEqual(metrics.summary(), {'timers': {}, 'values': {}, 'counters': {}})
+
+    def test_max_beyond_samples(self):
+        metrics = Metrics()
+        metrics.record('encode', 1.0)
+        metrics.observe('encoded_bytes', 1)
+        for _ in range(MAX_SAMPLES):
+            metrics.record('encode', 0.001)
+            metrics.observe('encoded_bytes', 10)
+        metrics.observe('encoded_bytes', 100)
+
+        summary = metrics.summary()
+        self.assertEqual(summary['timers']['encode']['count'], MAX_SAMPLES + 1)
+        self.assertEqual(summary['timers']['encode']['max_ms'], 1000, 'Max should not be lost with old samples')
+        self.assertEqual(summary['values']['encoded_bytes']['min'], 1, 'Min should not be lost with old samples')
+        self.assertEqual(summary['values']['encoded_bytes']['max'], 100)
+        self.assertEqual(len(metrics.get_samples('encode')), MAX_SAMPLES)
+
+    def test_timed(self):
+        class Timed(object):
+            metrics = Metrics()
+
+            @timed('stage.run')
+            def run(self):
+                raise ValueError()
+
+        self.assertRaises(ValueError, Timed().run)
+        self.assertEqual(len(Timed.metrics.get_samples('stage.run')), 1, 'Failed call should be measured')
+
+    def test_profile(self):
+        handle, profile_file = tempfile.mkstemp()
+        os.close(handle)
+        try:
+            def run():
+                pool = ThreadPool(2)
+                try:
+                    return pool.map(busy_function, [10, 20])
+                finally:
+                    pool.close()
+                    pool.join()
+
+            self.assertEqual(profile(run, profile_file), [45, 190])
+            functions = [function for _, _, function in pstats.Stats(profile_file).stats]
+            self.assertIn('busy_function', functions, 'Worker threads should be profiled')
+        finally:
+            os.remove(profile_file)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+"""
+Unit testing of JobScheduler class
+"""
+import threading
+import time
+import unittest
+from multiprocessing.pool import ThreadPool
+
+from scheduler import JobScheduler
+
+
+class TestJobScheduler(unittest.TestCase):
+
+    def test_results_order(self):
+        def job(value):
+            time.sleep(0.01 * (5 - value))  # first jobs finish last
+            return value * 2
+
+        results = list(JobScheduler(4).run(job, range(5)))
+        self.assertEqual([result.job for result in results], list(range(5)), 'Results should keep jobs order')
+        self.assertEqual([result.value for result in results], [0, 2, 4, 6, 8])
+
+    def test_errors_collected(self):
+        def job(value):
+            if value % 2:
+                raise ValueError(value)
+            return value
+
+        results = list(JobScheduler(2).run(job, range(4)))
+        self.assertEqual(len(results), 4, 'All jobs should run despite errors')
+        self.assertEqual([result.job for result in results if result.error is not None], [1, 3])
+
+    def test_bounded_pool(self):
+        lock = threading.Lock()
+        running = [0, 0]  # current, max
+
+        def job(_):
+            with lock:
+                running[0] += 1
+                running[1] = max(running)
+            time.sleep(0.01)
+            with lock:
+                running[0] -= 1
+
+        list(JobScheduler(3).run(job, range(12)))
+        self.assertLessEqual(running[1], 3, 'No more than 3 jobs should run simultaneously')
+
+    def test_min_jobs(self):
+        self.assertEqual(JobScheduler(0).jobs, 1, 'At least one worker should be used')
+        self.assertEqual(JobScheduler(4).max_in_flight, 8)
+        self.assertEqual(JobScheduler(4, max_in_flight=1).max_in_flight, 4, 'Every worker should have a job')
+
+    def test_backpressure(self):
+        lock = threading.Lock()
+        started = [0]
+
+        def job(value):
+            with lock:
+                started[0] += 1
+            return value
+
+        in_flight = []
+        for result in JobScheduler(2, max_in_flight=3).run(job, range(20)):
+            time.sleep(0.005)  # slow consumer, workers are faster
+            with lock:
+                in_flight.append(started[0] - result.job)
+        self.assertLessEqual(max(in_flight), 3, 'No more than 3 jobs should be started ahead of consumed results')
+
+    def test_lazy_jobs(self):
+        consumed = []
+
+        def jobs():
+            for value in range(100):
+                consumed.append(value)
+                yield value
+
+        results = JobScheduler(2, max_in_flight=2).run(lambda value: value, jobs())
+        next(results)
+        self.assertLessEqual(len(consumed), 3, 'Jobs should be read as they are submitted')
+        self.assertEqual([result.value for result in results], list(range(1, 100)))
+
+    def test_shared_pool(self):
+        pool = ThreadPool(2)
+        try:
+            workers = set()
+
+            def job(value):
+                workers.add(threading.current_thread().name)
+                return value
+
+            first, second = JobScheduler(2, pool=pool), JobScheduler(2, pool=pool)
+            self.assertEqual([result.value for result in first.run(job, range(10))], list(range(10)))
+            self.assertEqual([result.value for result in second.run(job, range(5))], list(range(5)))
+            self.assertLessEqual(len(workers), 2, 'Schedulers should share pool workers')
+        finally:
+            pool.terminate()
+            pool.join()
+
+
+if __name__ == '__main__':
+    unittest.main()
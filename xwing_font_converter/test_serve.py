@@ -0,0 +1,105 @@
+"""
+Unit testing of glyph HTTP server
+"""
+import io
+import logging
+import os
+import threading
+import unittest
+
+try:
+    from urllib2 import HTTPError, Request, urlopen
+except ImportError:  # python 3
+    from urllib.error import HTTPError
+    from urllib.request import Request, urlopen
+
+from PIL import Image
+
+from font_converter import FontConverter
+from xwing_font_converter_serve import GlyphServer, ImageCache
+
+
+class TestGlyphServer(unittest.TestCase):
+
+    def setUp(self):
+        super(TestGlyphServer, self).setUp()
+
+        # disable log during tests
+        logging.disable(logging.CRITICAL)
+
+        fc = FontConverter(map_file_path=os.path.join('resources', 'ships-map.json'),
+                           ttf_file_path=os.path.join('resources', 'xwing-miniatures-ships.ttf'),
+                           backend='pillow')
+        fc.init_font_converter()
+        fc.get_elements_from_map()
+
+        self.server = GlyphServer(('localhost', 0), fc, prefix='/ship', jobs=2)
+        self._thread = threading.Thread(target=self.server.serve_forever)
+        self._thread.start()
+        self._url = 'http://localhost:{}/ship/'.format(self.server.server_port)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self._thread.join()
+
+    def __get_status(self, path, headers=None):
+        try:
+            return urlopen(Request(self._url + path, headers=headers or {})).getcode()
+        except HTTPError as err:
+            return err.code
+
+    def test_get_image(self):
+        response = urlopen(self._url + 't65xwing.png?color=red&size=32')
+        self.assertEqual(response.info()['Content-Type'], 'image/png')
+        image = Image.open(io.BytesIO(response.read()))
+        self.assertEqual(image.size, (32, 32), 'Image should be resized')
+        self.assertEqual(len(self.server.image_cache), 1, 'Image should be cached')
+
+        etag = response.info()['ETag']
+        self.assertEqual(self.__get_status('t65xwing.png?color=red&size=32', {'If-None-Match': etag}), 304)
+        self.assertEqual(len(self.server.image_cache), 1, 'Cached image should be reused')
+
+    def test_get_wrong_image(self):
+        self.assertEqual(self.__get_status('WRONG_ELEMENT.png'), 404)
+        self.assertEqual(self.__get_status('t65xwing.bmp'), 404)
+        self.assertEqual(self.__get_status('t65xwing.png?color=WRONG_COLOR'), 400)
+        self.assertEqual(self.__get_status('t65xwing.png?size=0'), 400)
+        self.assertEqual(self.__get_status('t65xwing.png?pointsize=big'), 400)
+        self.assertEqual(self.__get_status('t65xwing.png?effect=blur'), 400)
+
+    def test_get_image_unsupported_options(self):
+        self.assertEqual(self.__get_status('t65xwing.svg?effect=stroke:white:2'), 400,
+                         'Options not supported by format should be refused')
+        self.assertEqual(self.__get_status('t65xwing.png'), 200)
+
+    def test_get_image_huge_effects(self):
+        for effect in ['stroke:red:160', 'glow:red:3000', 'shadow:red:500:0:0', 'shadow:red:0:0:100']:
+            self.assertEqual(self.__get_status('t65xwing.png?effect=' + effect), 400,
+                             'Effect above its maximum should be refused')
+        self.assertEqual(self.__get_status('t65xwing.png?' + '&'.join(['effect=stroke:red:1'] * 5)), 400,
+                         'Too many effects should be refused')
+        self.assertEqual(len(self.server.image_cache), 0, 'Nothing should be rendered')
+
+    def test_get_image_effects(self):
+        response = urlopen(self._url + 't65xwing.png?color=%23ff0000&trim=1&effect=stroke:white:2')
+        image = Image.open(io.BytesIO(response.read())).convert('RGBA')
+        self.assertIn((255, 255, 255, 255), [color for _, color in image.getcolors(4096)], 'Outline should be drawn')
+
+
+class TestImageCache(unittest.TestCase):
+
+    def test_eviction(self):
+        cache = ImageCache(10)
+        etag, _ = cache.put('a', b'aaaa')
+        cache.put('b', b'bbbb')
+        self.assertEqual(cache.get('a'), (etag, b'aaaa'))
+
+        cache.put('c', b'cccc')  # b is least recently used
+        self.assertIsNone(cache.get('b'), 'Least recently used image should be evicted')
+        self.assertIsNotNone(cache.get('a'))
+        self.assertIsNotNone(cache.get('c'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+"""
+Unit testing of SvgRenderer class
+"""
+import os
+import unittest
+from xml.etree import ElementTree
+
+from svg import SvgRenderer
+
+SVG_NAMESPACE = '{http://www.w3.org/2000/svg}'
+
+
+class TestSvgRenderer(unittest.TestCase):
+
+    def setUp(self):
+        super(TestSvgRenderer, self).setUp()
+
+        self.renderer = SvgRenderer(os.path.join('resources', 'xwing-miniatures-ships.ttf'),
+                                    extra_colors={'steelblue1': '#63b8ff'})
+
+    def test_render_glyph(self):
+        svg = ElementTree.fromstring(self.renderer.render_glyph(ord('x'), 'red', 32))
+        self.assertEqual(svg.tag, SVG_NAMESPACE + 'svg')
+        self.assertEqual(svg.get('height'), '32', 'Height should be requested size')
+
+        x, y, width, height = [float(value) for value in svg.get('viewBox').split()]
+        self.assertAlmostEqual(float(svg.get('width')), 32 * width / height, places=2,
+                               msg='Width should keep glyph aspect ratio')
+
+        path = svg.find(SVG_NAMESPACE + 'path')
+        self.assertEqual(path.get('fill'), 'red')
+        self.assertTrue(path.get('d').startswith('M'), 'Glyph outline should be drawn')
+
+    def test_render_glyph_width(self):
+        svg = ElementTree.fromstring(self.renderer.render_glyph(ord('x'), 'steelblue1', 100, width=True))
+        self.assertEqual(svg.get('width'), '100')
+        self.assertEqual(svg.find(SVG_NAMESPACE + 'path').get('fill'), '#63b8ff', 'Extra colors should be converted')
+
+    def test_render_missing_glyph(self):
+        self.assertRaises(ValueError, self.renderer.render_glyph, ord(' '), 'red', 32)
+        self.assertRaises(ValueError, self.renderer.render_glyph, 0x4e00, 'red', 32)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -11,12 +11,20 @@ Used to convert xwing geordanr's font into png images.
 :seealso: https://github.com/geordanr/xwing-miniatures-font
 """
 import argparse
+import json
 from sys import exit
 
 from os.path import basename
 
-from font_converter import FontConverter, AVAILABLE_COLORS, AVAILABLE_FILE_FORMATS, DEFAULT_SIZE, DEFAULT_POINTSIZE
+from font_converter import FontConverter, AVAILABLE_COLORS, AVAILABLE_FILE_FORMATS, DEFAULT_SIZE, DEFAULT_POINTSIZE, \
+    AVAILABLE_BACKENDS, DEFAULT_BACKEND, ConversionError, as_list
+from atlas import DEFAULT_ATLAS_NAME, DEFAULT_ATLAS_SIZE
+from batch import BatchConverter, load_batch
+from cache import DEFAULT_CACHE_DIR
+from encoding import COMPRESSION_LEVELS, DEFAULT_COMPRESSION
 from logger import get_logger
+from metrics import profile
+from scheduler import DEFAULT_JOBS
 
 # __all__ = ['main']
 
@@ -30,15 +38,26 @@ __url__ = 'https://github.com/kalhamaar/xwing_font_converter'
 parser = argparse.ArgumentParser(description='X-Wing font to image converter by KalHamaar')
 
 # optional arguments
-parser.add_argument('-c', '--color', dest='COLOR', default='black', action='store',
-                    choices=AVAILABLE_COLORS,
-                    help='color of font to use (default: %(default)s)')
+parser.add_argument('-c', '--color', dest='COLOR', default='black', action='store', nargs='+', metavar='COLOR',
+                    help='color(s) of font to use in {{{colors}}}, or hex (#rrggbb, #rrggbbaa) or rgb()/rgba() '
+                         'color(s) (default: %(default)s)'
+                    .format(colors=','.join(AVAILABLE_COLORS)))
 
-parser.add_argument('-p', '--pointsize', dest='PS', default=DEFAULT_POINTSIZE, action='store',
-                    help='size of font to use (default: %(default)s)')
+parser.add_argument('-p', '--pointsize', dest='PS', default=DEFAULT_POINTSIZE, action='store', type=int, nargs='+',
+                    help='size(s) of font to use (default: %(default)s)')
 
-parser.add_argument('-s', '--size', dest='SIZE', default=DEFAULT_SIZE, action='store',
-                    help='size of generated image as x*x (default: %(default)sx%(default)s)')
+parser.add_argument('-s', '--size', dest='SIZE', default=DEFAULT_SIZE, action='store', type=int, nargs='+',
+                    help='size(s) of generated image as x*x (default: %(default)sx%(default)s), every combination '
+                         'of colors, point sizes and sizes is generated')
+
+parser.add_argument('-e', '--effect', dest='EFFECTS', default=None, action='store', nargs='+', metavar='SPEC',
+                    help='effect(s) painted in given order with pillow backend: stroke:COLOR:WIDTH, '
+                         'shadow:COLOR:X_OFFSET:Y_OFFSET:BLUR, glow:COLOR:RADIUS or gradient:TOP_COLOR:BOTTOM_COLOR '
+                         '(arguments are optional, eg: stroke:white:2), images growing by effects margin')
+
+parser.add_argument('--scales', dest='SCALES', default=None, action='store', type=int, nargs='+', metavar='SCALE',
+                    help='scale(s) of images, eg: 1 2 3 for name.png, name@2x.png and name@3x.png: glyphs are '
+                         'rendered once at highest scale, lower ones being downscaled from it')
 
 parser.add_argument('--trim', dest='TRIM', default=False, action='store_true',
                     help='Trim images (remove transparent border) (default: %(default)s)')
@@ -50,13 +69,64 @@ parser.add_argument('-f', '--format', dest='FORMAT', default='gif', action='stor
                     choices=AVAILABLE_FILE_FORMATS,
                     help='output file format (default: %(default)s)')
 
+parser.add_argument('-b', '--backend', dest='BACKEND', default=DEFAULT_BACKEND, action='store',
+                    choices=AVAILABLE_BACKENDS,
+                    help='rendering backend, pillow renders in-process, imagemagick spawns one convert per glyph '
+                         '(default: %(default)s)')
+
+parser.add_argument('--compression', dest='COMPRESSION', default=DEFAULT_COMPRESSION, action='store',
+                    choices=COMPRESSION_LEVELS,
+                    help='compression level of raster images, best is smallest but slowest (default: %(default)s)')
+
+parser.add_argument('-j', '--jobs', dest='JOBS', default=DEFAULT_JOBS, action='store', type=int,
+                    help='number of elements converted in parallel (default: CPU count)')
+
+parser.add_argument('--max-in-flight', dest='MAX_IN_FLIGHT', default=None, action='store', type=int, metavar='N',
+                    help='maximum number of elements rendered ahead of written ones, bounding memory whatever the '
+                         'number of elements is (default: 2 per job)')
+
+parser.add_argument('--force', dest='FORCE', default=False, action='store_true',
+                    help='Render all images, even ones up to date with previous conversion (default: %(default)s)')
+
+parser.add_argument('--prune', dest='PRUNE', default=False, action='store_true',
+                    help='Remove images of previous conversions not generated anymore (default: %(default)s)')
+
+parser.add_argument('--atlas', dest='ATLAS', default=None, action='store', nargs='?', const=DEFAULT_ATLAS_NAME,
+                    metavar='NAME',
+                    help='pack images into NAME-N atlases with NAME.json and NAME.css coordinates index instead of '
+                         'one file per image (default name: {})'.format(DEFAULT_ATLAS_NAME))
+
+parser.add_argument('--atlas-size', dest='ATLAS_SIZE', default=DEFAULT_ATLAS_SIZE, action='store', type=int,
+                    help='maximum width and height of an atlas (default: %(default)s)')
+
+parser.add_argument('--archive', dest='ARCHIVE', default=None, action='store',
+                    help='stream images into given archive (.zip, .tar, .tar.gz, .tgz or .tar.bz2) instead of writing '
+                         'them in output folder, which is then not required')
+
+parser.add_argument('--cache-dir', dest='CACHE_DIR', default=DEFAULT_CACHE_DIR, action='store',
+                    help='folder of rendered glyphs cache shared between runs (default: user cache folder, '
+                         'eg: ~/.cache/xwing-font-converter)')
+
+parser.add_argument('--no-cache', dest='NO_CACHE', default=False, action='store_true',
+                    help='Do not use rendered glyphs cache (default: %(default)s)')
+
+parser.add_argument('--batch', dest='BATCH', default=None, action='store',
+                    help='job manifest (.json or .yaml) listing many map, font, output folder and options to convert '
+                         'together, instead of map, ttf and output arguments')
+
+parser.add_argument('--metrics-json', dest='METRICS_JSON', default=None, action='store',
+                    help='write timers (rasterize, encode, write, ...) and counters of conversion to given JSON file')
+
+parser.add_argument('--profile', dest='PROFILE', default=None, action='store',
+                    help='profile conversion (workers included) and write cProfile stats to given file')
+
 parser.add_argument('-v', '--verbosity', dest='VERBOSITY', default='INFO', action='store',
                     choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
                     help='log level to use (default: %(default)s)')
 
 required = parser.add_argument_group('required arguments')
 
-required.add_argument('-m', '--map', dest='MAP', help='mapping file to use (.json)')
+required.add_argument('-m', '--map', dest='MAP', help='mapping file to use (.json or .scss)')
 required.add_argument('-t', '--ttf', dest='TTF', help='TrueType Font file to use (.ttf)')
 required.add_argument('-o', '--output', dest='OUT', help='output folder (will created if not exist)')
 
@@ -71,10 +141,21 @@ def main():
 
     logger = get_logger(loglevel=args.VERBOSITY)
 
-    if any(l is None for l in [args.MAP, args.TTF, args.OUT]):
+    if args.BATCH:
+        exit(run_batch(args))
+
+    if any(l is None for l in [args.MAP, args.TTF]) or (args.OUT is None and args.ARCHIVE is None):
         parser.print_help()
         exit(-1)
 
+    if args.ARCHIVE and args.ATLAS:
+        logger.error("Atlases can not be written into an archive")
+        exit(-1)
+
+    if args.SCALES and args.ATLAS:
+        logger.error("Atlases can not be made of many scales")
+        exit(-1)
+
     logger.info('Starting extraction of {}'.format(basename(args.TTF)))
 
     logger.debug("Map file: {map_file_path} TTF File: {ttf_file_path} Output folder: {output_folder}"
@@ -84,28 +165,77 @@ def main():
 
     fc = FontConverter(map_file_path=args.MAP,
                        ttf_file_path=args.TTF,
-                       output_folder=args.OUT)
+                       output_folder=args.OUT,
+                       backend=args.BACKEND,
+                       cache_dir=None if args.NO_CACHE else args.CACHE_DIR,
+                       compression=args.COMPRESSION,
+                       max_in_flight=args.MAX_IN_FLIGHT)
 
     if not fc.init_font_converter():
         exit(-1)
 
     fc.get_elements_from_map()
 
-    logger.debug("Converting {point_size} point size font to {color} {size}x{size} {file_format} images"
-                 .format(point_size=args.PS,
-                         color=args.COLOR,
-                         size=args.SIZE,
+    logger.debug("Converting {point_size} point size font to {color} {size} {file_format} images"
+                 .format(point_size=','.join(str(ps) for ps in as_list(args.PS)),
+                         color=','.join(as_list(args.COLOR)),
+                         size=','.join('{size}x{size}'.format(size=size) for size in as_list(args.SIZE)),
                          file_format=args.FORMAT))
 
-    fc.convert_2_images(color=args.COLOR, point_size=args.PS, file_format=args.FORMAT)
+    def convert():
+        if args.ARCHIVE:
+            fc.convert_2_archive(args.ARCHIVE, color=args.COLOR, point_size=args.PS, file_format=args.FORMAT,
+                                 trim=args.TRIM, size=args.SIZE, width=args.WIDTH, jobs=args.JOBS,
+                                 effects=args.EFFECTS, scales=args.SCALES)
+        elif args.ATLAS:
+            fc.convert_2_atlas(color=args.COLOR, point_size=args.PS, file_format=args.FORMAT,
+                               trim=args.TRIM, size=args.SIZE, width=args.WIDTH, jobs=args.JOBS,
+                               name=args.ATLAS, atlas_size=args.ATLAS_SIZE, effects=args.EFFECTS)
+        else:
+            fc.convert_2_images(color=args.COLOR, point_size=args.PS, file_format=args.FORMAT,
+                                trim=args.TRIM, size=args.SIZE, width=args.WIDTH, jobs=args.JOBS,
+                                force=args.FORCE, prune=args.PRUNE, effects=args.EFFECTS, scales=args.SCALES)
+
+    try:
+        if args.PROFILE:
+            profile(convert, args.PROFILE)
+            logger.info("Profile written in: {}".format(args.PROFILE))
+        else:
+            convert()
+    except (AttributeError, ConversionError, ValueError) as err:
+        logger.error(err)
+        exit(-1)
+    finally:
+        if args.METRICS_JSON:
+            with open(args.METRICS_JSON, 'w') as metrics_file:
+                json.dump(fc.metrics.summary(), metrics_file, indent=1, sort_keys=True)
+
+    logger.info("Extraction done, files available in: {}".format(args.ARCHIVE or args.OUT))
 
-    if args.TRIM:
-        fc.trim_images()
 
-    if args.SIZE != DEFAULT_SIZE:
-        fc.resize_images(args.SIZE, args.WIDTH)
+def run_batch(args):
+    """
+    Run conversions listed in job manifest
 
-    logger.info("Extraction done, files available in: {}".format(args.OUT))
+    :return: Exit status
+    :rtype: int
+    """
+    logger = get_logger()
+    try:
+        jobs = load_batch(args.BATCH)
+    except (IOError, ValueError) as err:
+        logger.error(err)
+        return -1
+
+    batch = BatchConverter(jobs, workers=args.JOBS, backend=args.BACKEND,
+                           cache_dir=None if args.NO_CACHE else args.CACHE_DIR, max_in_flight=args.MAX_IN_FLIGHT)
+    try:
+        errors = profile(batch.run, args.PROFILE) if args.PROFILE else batch.run()
+    finally:
+        if args.METRICS_JSON:
+            with open(args.METRICS_JSON, 'w') as metrics_file:
+                json.dump(batch.metrics.summary(), metrics_file, indent=1, sort_keys=True)
+    return -1 if errors else 0
 
 
 if __name__ == '__main__':
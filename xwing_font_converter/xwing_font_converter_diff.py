@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""
+X-Wing font diff
+
+List elements added, removed or modified between two versions of geordanr's font and its map, comparing glyphs
+outlines, and optionally render images of added and modified elements only.
+
+:seealso: https://github.com/geordanr/xwing-miniatures-font
+"""
+import argparse
+import json
+from sys import exit, stdout
+
+from font_converter import FontConverter, AVAILABLE_FILE_FORMATS, DEFAULT_SIZE, DEFAULT_POINTSIZE, \
+    AVAILABLE_BACKENDS, DEFAULT_BACKEND, ConversionError
+from font_diff import diff_fonts
+from logger import get_logger
+from scheduler import DEFAULT_JOBS
+
+__all__ = ['main']
+
+# marks of listed elements, as in 'git diff --name-status'
+STATUS_MARKS = [('added', 'A'), ('removed', 'D'), ('modified', 'M')]
+
+
+parser = argparse.ArgumentParser(description='X-Wing font diff by KalHamaar: list elements changed between two '
+                                             'versions of a font and render them only')
+
+# optional arguments
+parser.add_argument('--json', dest='JSON', default=False, action='store_true',
+                    help='print added, removed and modified elements as JSON (default: %(default)s)')
+
+parser.add_argument('-o', '--output', dest='OUT', default=None, action='store',
+                    help='render images of added and modified elements of new font into given folder')
+
+parser.add_argument('-c', '--color', dest='COLOR', default='black', action='store', nargs='+', metavar='COLOR',
+                    help='color(s) of rendered images (default: %(default)s)')
+
+parser.add_argument('-p', '--pointsize', dest='PS', default=DEFAULT_POINTSIZE, action='store', type=int, nargs='+',
+                    help='size(s) of font to use (default: %(default)s)')
+
+parser.add_argument('-s', '--size', dest='SIZE', default=DEFAULT_SIZE, action='store', type=int, nargs='+',
+                    help='size(s) of rendered images as x*x (default: %(default)sx%(default)s)')
+
+parser.add_argument('--trim', dest='TRIM', default=False, action='store_true',
+                    help='Trim images (remove transparent border) (default: %(default)s)')
+
+parser.add_argument('--width', dest='WIDTH', default=False, action='store_true',
+                    help='Resize with width as reference (default: %(default)s)')
+
+parser.add_argument('-f', '--format', dest='FORMAT', default='gif', action='store',
+                    choices=AVAILABLE_FILE_FORMATS,
+                    help='output file format (default: %(default)s)')
+
+parser.add_argument('-b', '--backend', dest='BACKEND', default=DEFAULT_BACKEND, action='store',
+                    choices=AVAILABLE_BACKENDS,
+                    help='rendering backend (default: %(default)s)')
+
+parser.add_argument('-j', '--jobs', dest='JOBS', default=DEFAULT_JOBS, action='store', type=int,
+                    help='number of elements rendered in parallel (default: CPU count)')
+
+parser.add_argument('-v', '--verbosity', dest='VERBOSITY', default='INFO', action='store',
+                    choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+                    help='log level to use (default: %(default)s)')
+
+required = parser.add_argument_group('required arguments')
+
+required.add_argument('--old-map', dest='OLD_MAP', help='mapping file of previous version (.json or .scss)')
+required.add_argument('--old-ttf', dest='OLD_TTF', help='TrueType Font file of previous version (.ttf)')
+required.add_argument('-m', '--map', dest='MAP', help='mapping file of new version (.json or .scss)')
+required.add_argument('-t', '--ttf', dest='TTF', help='TrueType Font file of new version (.ttf)')
+
+
+def main():
+    """
+    Main entry point for font diff
+
+    :return:
+    """
+    args = parser.parse_args()
+
+    logger = get_logger(loglevel=args.VERBOSITY)
+
+    if any(l is None for l in [args.OLD_MAP, args.OLD_TTF, args.MAP, args.TTF]):
+        parser.print_help()
+        exit(-1)
+
+    old_fc = FontConverter(map_file_path=args.OLD_MAP, ttf_file_path=args.OLD_TTF)
+    fc = FontConverter(map_file_path=args.MAP, ttf_file_path=args.TTF, output_folder=args.OUT, backend=args.BACKEND)
+    if not old_fc.init_font_converter() or not fc.init_font_converter():
+        exit(-1)
+
+    try:
+        old_fc.get_elements_from_map()
+        fc.get_elements_from_map()
+        diff = diff_fonts(old_fc.element_map, args.OLD_TTF, fc.element_map, args.TTF)
+    except (ImportError, ValueError) as err:
+        logger.error(err)
+        exit(-1)
+
+    if args.JSON:
+        json.dump(dict((status, getattr(diff, status)) for status, _ in STATUS_MARKS), stdout, indent=1,
+                  sort_keys=True)
+        stdout.write('\n')
+    else:
+        for status, mark in STATUS_MARKS:
+            for element in getattr(diff, status):
+                stdout.write(u"{mark}\t{element}\n".format(mark=mark, element=element))
+    logger.info("{added} added, {removed} removed, {modified} modified, {unchanged} unchanged element(s)"
+                .format(added=len(diff.added), removed=len(diff.removed), modified=len(diff.modified),
+                        unchanged=len(diff.unchanged)))
+
+    if args.OUT is None or not diff.changed:
+        return
+
+    try:
+        fc.convert_2_images(color=args.COLOR, point_size=args.PS, file_format=args.FORMAT, trim=args.TRIM,
+                            size=args.SIZE, width=args.WIDTH, jobs=args.JOBS, force=True, elements=diff.changed)
+    except (AttributeError, ConversionError) as err:
+        logger.error(err)
+        exit(-1)
+
+    logger.info("{count} image(s) of changed elements written in: {output}"
+                .format(count=len(fc.output_files), output=args.OUT))
+
+
+if __name__ == '__main__':
+    main()
@@ -10,15 +10,23 @@ Used to convert xwing geordanr's font into png images.
 
 :seealso: https://github.com/geordanr/xwing-miniatures-font
 """
+import threading
+from collections import deque
+
+import gobject
 import gtk
 from os.path import basename, join, exists
 
 import xwing_font_converter
-from font_converter import AVAILABLE_COLORS, AVAILABLE_FILE_FORMATS, FontConverter, DEFAULT_SIZE, DEFAULT_POINTSIZE
+from font_converter import AVAILABLE_COLORS, AVAILABLE_FILE_FORMATS, FontConverter, DEFAULT_SIZE, DEFAULT_POINTSIZE, \
+    ConversionCancelled, ConversionError
 from logger import get_logger
 
 __all__ = ['main']
 
+PREVIEW_COUNT = 8  # number of latest glyphs shown while converting
+PREVIEW_SIZE = 48
+
 
 class XWingFontConvertGui(gtk.Window):
 
@@ -42,6 +50,10 @@ class XWingFontConvertGui(gtk.Window):
         self._font_entry = None
         self._output_entry = None
 
+        self._converter = None  # converter of running conversion, if any
+        self._preview_pixbufs = deque(maxlen=PREVIEW_COUNT)  # latest glyphs first
+        self._last_preview = None
+
         self.logger = get_logger(loglevel='DEBUG')
 
         # create a new window
@@ -67,7 +79,7 @@ class XWingFontConvertGui(gtk.Window):
         filemenu.append(about)
 
         exit_m = gtk.MenuItem("Exit")
-        exit_m.connect("activate", gtk.main_quit)
+        exit_m.connect("activate", self.on_quit)
         filemenu.append(exit_m)
         mb.append(filem)
         main_vbox.pack_start(mb, False, False, 0)
@@ -131,17 +143,39 @@ class XWingFontConvertGui(gtk.Window):
         c_halign.add(c_hbox)
         main_vbox.pack_start(c_halign, False, False, 0)
 
-        # ---------- add RUN and Close button ----------
+        # ---------- Preview of latest glyphs ----------
+
+        preview_hbox = gtk.HBox(True, 3)
+        self._previews = []
+        for _ in range(PREVIEW_COUNT):
+            preview = gtk.Image()
+            preview.set_size_request(PREVIEW_SIZE, PREVIEW_SIZE)
+            preview_hbox.add(preview)
+            self._previews.append(preview)
+
+        p_halign = gtk.Alignment(0.5, 0, 0, 0)
+        p_halign.add(preview_hbox)
+        main_vbox.pack_start(p_halign, False, False, 3)
+
+        self.progressbar = gtk.ProgressBar()
+        main_vbox.pack_start(self.progressbar, False, False, 3)
+
+        # ---------- add RUN, Cancel and Close button ----------
 
         buttons_hbox = gtk.HBox(False, 5)
-        run_button = gtk.Button(stock=gtk.STOCK_EXECUTE)
-        run_button.set_size_request(70, 30)
-        run_button.connect("clicked", self.on_run_clicked)
+        self.run_button = gtk.Button(stock=gtk.STOCK_EXECUTE)
+        self.run_button.set_size_request(70, 30)
+        self.run_button.connect("clicked", self.on_run_clicked)
+
+        self.cancel_button = gtk.Button(stock=gtk.STOCK_CANCEL)
+        self.cancel_button.connect("clicked", self.on_cancel_clicked)
+        self.cancel_button.set_sensitive(False)
 
         close_button = gtk.Button(stock=gtk.STOCK_CLOSE)
-        close_button.connect("clicked", gtk.main_quit)
+        close_button.connect("clicked", self.on_quit)
 
-        buttons_hbox.add(run_button)
+        buttons_hbox.add(self.run_button)
+        buttons_hbox.add(self.cancel_button)
         buttons_hbox.add(close_button)
 
         b_halign = gtk.Alignment(1, 0, 0, 0)
@@ -153,7 +187,7 @@ class XWingFontConvertGui(gtk.Window):
         main_vbox.pack_start(self.statusbar, False, False, 0)
 
         self.add(main_vbox)
-        self.connect("destroy", gtk.main_quit)
+        self.connect("destroy", self.on_quit)
         self.show_all()
 
     def init_file_selection(self, entry_type):
@@ -256,25 +290,101 @@ class XWingFontConvertGui(gtk.Window):
             widget.set_sensitive(True)  # re-enable button
             return
 
-        fc.get_elements_from_map()
+        try:
+            fc.get_elements_from_map()
+        except ValueError as err:
+            self.raise_error_message_dialog("Unable to read map: {}".format(err))
+            widget.set_sensitive(True)  # re-enable button
+            return
+
         self.logger.debug("Converting {point_size} point size font to {color} {size}x{size} {file_format} images"
                           .format(point_size=self._point_size,
                                   color=self._color,
                                   size=self._size,
                                   file_format=self._file_format))
 
-        fc.convert_2_images(point_size=self._point_size,
-                            color=self._color,
-                            file_format=self._file_format)
-
-        if self._trim:
-            fc.trim_images()
+        self._preview_pixbufs.clear()
+        self._last_preview = None
+        for preview in self._previews:
+            preview.clear()
+        self.progressbar.set_fraction(0)
+        self.progressbar.set_text("0/{}".format(len(fc.element_map)))
+        self.cancel_button.set_sensitive(True)
+        self._converter = fc
+
+        # conversion runs in background for main loop to keep window responsive, widgets are only read here and
+        # updated by idle callbacks of main loop
+        options = dict(point_size=self._point_size, color=self._color, file_format=self._file_format,
+                       trim=self._trim, size=self._size, width=self._resize_width)
+        thread = threading.Thread(target=self.convert, args=(fc, options, self._output_entry.get_text()))
+        thread.daemon = True  # do not wait for conversion on exit
+        thread.start()
+
+    def convert(self, fc, options, output_folder):
+        """
+        Run conversion (in background thread), reporting its progress and outcome to main loop. Widgets must not be
+        read from here, options are read from them before thread starts.
+
+        :param options: Options of convert_2_images
+        :type options: dict
+
+        :param output_folder: Output folder, for outcome message
+        :type output_folder: str
+        """
+        def progress(done, total, element):
+            output_file = fc.output_files[-1] if fc.output_files else None
+            gobject.idle_add(self.on_progress, done, total, element, output_file)
 
-        if self._size != DEFAULT_SIZE:
-            fc.resize_images(self._size)
-
-        self.logger.info("Extraction done, files available in: {}".format(self._output_entry.get_text()))
-        widget.set_sensitive(True)  # re-enable button
+        try:
+            fc.convert_2_images(progress=progress, **options)
+        except ConversionCancelled as err:
+            gobject.idle_add(self.on_conversion_done, str(err), None)
+        except (AttributeError, ConversionError) as err:
+            gobject.idle_add(self.on_conversion_done, "Conversion failed", err)
+        except Exception as err:  # any error has to re-enable run button
+            self.logger.exception(err)
+            gobject.idle_add(self.on_conversion_done, "Unexpected conversion error", err)
+        else:
+            gobject.idle_add(self.on_conversion_done,
+                             "Extraction done, files available in: {}".format(output_folder), None)
+
+    def on_progress(self, done, total, element, output_file):
+        self.progressbar.set_fraction(float(done) / total)
+        self.progressbar.set_text("{done}/{total}".format(done=done, total=total))
+        self.statusbar.push(0, u"'{element}' converted".format(element=element))
+
+        if output_file is not None and output_file != self._last_preview:  # up to date elements write nothing
+            self._last_preview = output_file
+            try:
+                self._preview_pixbufs.appendleft(gtk.gdk.pixbuf_new_from_file_at_size(output_file, PREVIEW_SIZE,
+                                                                                      PREVIEW_SIZE))
+            except gobject.GError:
+                pass  # format not supported by gdk-pixbuf (eg: webp), no preview
+            for preview, pixbuf in zip(self._previews, self._preview_pixbufs):
+                preview.set_from_pixbuf(pixbuf)
+        return False  # run once
+
+    def on_conversion_done(self, message, error):
+        self._converter = None
+        self.cancel_button.set_sensitive(False)
+        self.run_button.set_sensitive(True)
+        self.logger.info(message)
+        self.statusbar.push(0, message)
+        if error is not None:
+            self.logger.error(error)
+            self.raise_error_message_dialog("{}: {}".format(message, error))
+        return False  # run once
+
+    def on_cancel_clicked(self, widget):
+        if self._converter is not None:
+            widget.set_sensitive(False)
+            self._converter.cancel()
+            self.statusbar.push(0, "Cancelling, waiting for elements being converted ...")
+
+    def on_quit(self, widget):
+        if self._converter is not None:
+            self._converter.cancel()
+        gtk.main_quit()
 
     def on_about_clicked(self, widget):
 
@@ -319,9 +429,10 @@ class XWingFontConvertGui(gtk.Window):
 
         elif widget.name == "map":
             j_filter = gtk.FileFilter()
-            j_filter.set_name("Json")
+            j_filter.set_name("Map (json, scss)")
             j_filter.add_mime_type("text/plain")
             j_filter.add_pattern("*.json")
+            j_filter.add_pattern("*.scss")
             dialog.add_filter(j_filter)
             dialog.set_filter(j_filter)
 
@@ -379,6 +490,7 @@ class XWingFontConvertGui(gtk.Window):
 
 
 def main():
+    gobject.threads_init()  # conversion runs in a background thread
     XWingFontConvertGui()
     gtk.main()
     return 0
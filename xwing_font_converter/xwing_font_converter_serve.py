@@ -0,0 +1,319 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""
+X-Wing font to image HTTP server
+
+Render images of geordanr's font on demand, eg: /ship/t65xwing.png?color=red&size=32&effect=stroke:white:2
+
+:seealso: https://github.com/geordanr/xwing-miniatures-font
+"""
+import argparse
+import hashlib
+import threading
+from collections import OrderedDict
+from multiprocessing.pool import ThreadPool
+from sys import exit
+
+try:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from urllib import unquote
+    from urlparse import parse_qs, urlparse
+except ImportError:  # python 3
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from urllib.parse import parse_qs, unquote, urlparse
+
+import xwing_font_converter
+from colors import AVAILABLE_COLORS, is_valid_color
+from effects import parse_effect
+from font_converter import FontConverter, AVAILABLE_FILE_FORMATS, DEFAULT_SIZE, DEFAULT_POINTSIZE, \
+    AVAILABLE_BACKENDS, DEFAULT_BACKEND
+from logger import get_logger
+from scheduler import DEFAULT_JOBS
+
+__all__ = ['main']
+
+DEFAULT_HOST = 'localhost'
+DEFAULT_PORT = 8000
+DEFAULT_PREFIX = '/'
+DEFAULT_MEMORY_CACHE_SIZE = 32  # MB
+DEFAULT_MAX_AGE = 24 * 60 * 60  # seconds
+MAX_SIZE = 1024  # maximum requested size (and point size) in pixel
+MAX_EFFECTS = 4  # maximum effects of a requested image, their arguments being bounded by parse_effect
+CONTENT_TYPES = {'gif': 'image/gif', 'png': 'image/png', 'webp': 'image/webp', 'svg': 'image/svg+xml'}
+
+
+class ImageCache(object):
+    """
+    Thread safe in-memory LRU cache of encoded images, bounded by total size of images
+    """
+
+    def __init__(self, max_size):
+        super(ImageCache, self).__init__()
+
+        self._max_size = max_size
+        self._size = 0
+        self._images = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._images)
+
+    def get(self, key):
+        """
+        Get cached image and mark it as recently used
+
+        :param key: Image options
+        :type key: tuple
+
+        :return: ETag and encoded image, None if not cached
+        :rtype: tuple
+        """
+        with self._lock:
+            image = self._images.pop(key, None)
+            if image is not None:
+                self._images[key] = image
+            return image
+
+    def put(self, key, data):
+        """
+        Cache image, evicting least recently used ones if needed
+
+        :param key: Image options
+        :type key: tuple
+
+        :param data: Encoded image
+        :type data: bytes
+
+        :return: ETag and encoded image
+        :rtype: tuple
+        """
+        image = ('"{}"'.format(hashlib.sha1(data).hexdigest()), data)
+        with self._lock:
+            previous = self._images.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous[1])
+            self._images[key] = image
+            self._size += len(data)
+            while self._size > self._max_size and len(self._images) > 1:
+                _, (_, evicted) = self._images.popitem(last=False)
+                self._size -= len(evicted)
+        return image
+
+
+class GlyphRequestHandler(BaseHTTPRequestHandler):
+    """
+    Serve images at {prefix}/{element}.{format}?color=...&size=...&pointsize=...&trim=1&width=1&effect=...
+    (effect can be repeated, hex colors are given with an escaped '#': %23ff0000)
+    """
+    server_version = 'XWingFontConverter/{}'.format(xwing_font_converter.__version__)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        path = unquote(url.path)
+        if not path.startswith(self.server.prefix):
+            self.send_error(404)
+            return
+
+        element, _, file_format = path[len(self.server.prefix):].rpartition('.')
+        if file_format not in AVAILABLE_FILE_FORMATS or element not in self.server.font_converter.element_map:
+            self.send_error(404, "Unknown image")
+            return
+
+        query = parse_qs(url.query)
+        try:
+            options = self.__get_options(query)
+        except ValueError as err:
+            self.send_error(400, str(err))
+            return
+
+        key = (element, file_format) + tuple(sorted(options.items()))
+        image = self.server.image_cache.get(key)
+        if image is None:
+            try:
+                data = self.server.font_converter.render_image(element, file_format=file_format, **options)
+            except (AttributeError, ValueError) as err:  # options not supported by backend or format
+                self.send_error(400, str(err))
+                return
+            except Exception as err:
+                self.server.logger.error(u"Unable to render '{element}': {error}".format(element=element, error=err))
+                self.send_error(500)
+                return
+            image = self.server.image_cache.put(key, data)
+        etag, data = image
+
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPES[file_format])
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', 'public, max-age={}'.format(self.server.max_age))
+        self.end_headers()
+        self.wfile.write(data)
+
+    @staticmethod
+    def __get_options(query):
+        """
+        Get rendering options from query string
+
+        :param query: Parsed query string
+        :type query: dict
+
+        :raise ValueError in case of wrong option
+
+        :rtype: dict
+        """
+        def get(name, default):
+            return query.get(name, [default])[-1]
+
+        color = get('color', 'black')
+        if not is_valid_color(color):
+            raise ValueError("color should be in {}, or a hex or rgb()/rgba() color".format(','.join(AVAILABLE_COLORS)))
+
+        effects = tuple(query.get('effect', []))
+        if len(effects) > MAX_EFFECTS:
+            raise ValueError("At most {} effects can be requested".format(MAX_EFFECTS))
+        for effect in effects:
+            parse_effect(effect)
+
+        options = {'color': color,
+                   'trim': get('trim', '0') in ('1', 'true', 'yes'),
+                   'width': get('width', '0') in ('1', 'true', 'yes'),
+                   'effects': effects}
+        for name, option, default in [('size', 'size', DEFAULT_SIZE), ('pointsize', 'point_size', DEFAULT_POINTSIZE)]:
+            try:
+                options[option] = int(get(name, default))
+            except ValueError:
+                raise ValueError("{} should be an integer".format(name))
+            if not 0 < options[option] <= MAX_SIZE:
+                raise ValueError("{} should be between 1 and {}".format(name, MAX_SIZE))
+        return options
+
+    def log_message(self, log_format, *args):
+        self.server.logger.debug("{} - {}".format(self.address_string(), log_format % args))
+
+
+class GlyphServer(HTTPServer):
+    """
+    HTTP server rendering images on demand through a font converter (map and font are loaded once).
+
+    Requests are handled by a fixed pool of threads, which keeps fonts loaded by backend in each thread.
+    """
+
+    def __init__(self, server_address, font_converter, prefix=DEFAULT_PREFIX,
+                 memory_cache_size=DEFAULT_MEMORY_CACHE_SIZE, max_age=DEFAULT_MAX_AGE, jobs=DEFAULT_JOBS):
+        """
+        :param font_converter: Initialized font converter, with its map loaded
+        :type font_converter: FontConverter
+
+        :param prefix: URL path prefix of images
+        :type prefix: str
+
+        :param memory_cache_size: Maximum size of in-memory images cache in MB
+        :type memory_cache_size: int
+
+        :param max_age: Cache-Control max age of images in seconds
+        :type max_age: int
+
+        :param jobs: Number of requests handled simultaneously
+        :type jobs: int
+        """
+        HTTPServer.__init__(self, server_address, GlyphRequestHandler)
+
+        self.font_converter = font_converter
+        self.prefix = prefix.rstrip('/') + '/'
+        self.image_cache = ImageCache(memory_cache_size * 1024 * 1024)
+        self.max_age = max_age
+        self.logger = get_logger()
+        self._pool = ThreadPool(max(1, jobs))
+
+    def process_request(self, request, client_address):
+        self._pool.apply_async(self.__process_request_thread, (request, client_address))
+
+    def __process_request_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        HTTPServer.server_close(self)
+        self._pool.terminate()
+        self._pool.join()
+
+
+parser = argparse.ArgumentParser(description='X-Wing font to image HTTP server by KalHamaar')
+
+# optional arguments
+parser.add_argument('--host', dest='HOST', default=DEFAULT_HOST, action='store',
+                    help='address to listen on (default: %(default)s)')
+
+parser.add_argument('--port', dest='PORT', default=DEFAULT_PORT, action='store', type=int,
+                    help='port to listen on (default: %(default)s)')
+
+parser.add_argument('--prefix', dest='PREFIX', default=DEFAULT_PREFIX, action='store',
+                    help='URL path prefix of images, eg: /ship (default: %(default)s)')
+
+parser.add_argument('--memory-cache', dest='MEMORY_CACHE', default=DEFAULT_MEMORY_CACHE_SIZE, action='store',
+                    type=int, help='maximum size of rendered images kept in memory in MB (default: %(default)s)')
+
+parser.add_argument('-b', '--backend', dest='BACKEND', default=DEFAULT_BACKEND, action='store',
+                    choices=AVAILABLE_BACKENDS,
+                    help='rendering backend (default: %(default)s)')
+
+parser.add_argument('-j', '--jobs', dest='JOBS', default=DEFAULT_JOBS, action='store', type=int,
+                    help='number of requests handled in parallel (default: CPU count)')
+
+parser.add_argument('-v', '--verbosity', dest='VERBOSITY', default='INFO', action='store',
+                    choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+                    help='log level to use (default: %(default)s)')
+
+required = parser.add_argument_group('required arguments')
+
+required.add_argument('-m', '--map', dest='MAP', help='mapping file to use (.json or .scss)')
+required.add_argument('-t', '--ttf', dest='TTF', help='TrueType Font file to use (.ttf)')
+
+
+def main():
+    """
+    Main entry point for font server
+
+    :return:
+    """
+    args = parser.parse_args()
+
+    logger = get_logger(loglevel=args.VERBOSITY)
+
+    if any(l is None for l in [args.MAP, args.TTF]):
+        parser.print_help()
+        exit(-1)
+
+    fc = FontConverter(map_file_path=args.MAP,
+                       ttf_file_path=args.TTF,
+                       backend=args.BACKEND)
+
+    if not fc.init_font_converter():
+        exit(-1)
+
+    fc.get_elements_from_map()
+
+    server = GlyphServer((args.HOST, args.PORT), fc, prefix=args.PREFIX, memory_cache_size=args.MEMORY_CACHE,
+                         jobs=args.JOBS)
+    logger.info("Serving {count} elements on http://{host}:{port}{prefix}{{element}}.{{format}}"
+                .format(count=len(fc.element_map), host=args.HOST, port=server.server_port, prefix=server.prefix))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Server stopped")
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()